@@ -0,0 +1,183 @@
+"""Benchmarks the betting page parsers against the previous parsers, which
+re-parsed the weekly page once per matchup and built the historical rows
+one game at a time. Pages saved from the HTTP cache can be passed in;
+otherwise pages with the layout of each site are generated.
+
+Usage:
+    $ python benchmarks/bench_betting.py --n_matchups 16 --n_games 272
+"""
+import argparse
+import sys
+import time
+from io import StringIO
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path.cwd()))
+from pipeline.collect.collect_betting import (  # noqa: E402
+    HISTORICAL_BETTING_COLUMNS,
+    parse_betting_page,
+    parse_historical_betting_page,
+)
+from pipeline.utils import retrieve_team_abbreviation  # noqa: E402
+
+TEAMS = ["Buffalo Bills", "Los Angeles Rams", "Baltimore Ravens", "New York Jets"]
+
+
+def create_table(rows: list) -> str:
+    header, *body = rows
+    return (
+        "<table><thead><tr>"
+        + "".join(f"<th>{value}</th>" for value in header)
+        + "</tr></thead><tbody>"
+        + "".join(
+            "<tr>" + "".join(f"<td>{value}</td>" for value in row) + "</tr>"
+            for row in body
+        )
+        + "</tbody></table>"
+    )
+
+
+def create_betting_page(n_matchups: int) -> str:
+    return "".join(
+        create_table(
+            [
+                ["Team", "Spread", "Moneyline", "Total", "Picks"],
+                [f"Team{i}A", "-3.5", "-180", "O 44.5", "Pick"],
+                [f"Team{i}B", "+3.5", "+150", "U 44.5", "Pick"],
+            ]
+        )
+        for i in range(n_matchups)
+    )
+
+
+def create_historical_betting_page(n_games: int) -> str:
+    header_tables = "".join(create_table([["Season"], [2022]]) for _ in range(5))
+    games = [
+        [
+            "Sun",
+            "Sep 11, 2022",
+            "1:00 PM",
+            "",
+            TEAMS[i % 4],
+            "W 24-9",
+            "W -14",
+            "@",
+            TEAMS[(i + 1) % 4],
+            "U 88",
+            "",
+        ]
+        for i in range(n_games)
+    ]
+    return header_tables + create_table(
+        [HISTORICAL_BETTING_COLUMNS] + games + [["Total"] * 11]
+    )
+
+
+def legacy_parse_betting_page(betting_page: str) -> pd.DataFrame:
+    raw_betting_data = pd.DataFrame()
+    for matchup in range(0, 16):
+        try:
+            df = pd.read_html(StringIO(betting_page))[matchup]
+            df = df[df.columns[:-1].tolist()]
+            df.columns = ["team", "spread", "moneyline", "total_points"]
+            raw_betting_data = pd.concat([raw_betting_data, df], axis=0)
+        except IndexError:
+            pass
+    return raw_betting_data
+
+
+def legacy_parse_historical_betting_page(
+    betting_page: str, season_year: int
+) -> pd.DataFrame:
+    df = pd.read_html(StringIO(betting_page))[5]
+    df.columns = HISTORICAL_BETTING_COLUMNS
+    df = df.iloc[:-1]
+    df["favored_team"] = df["favored_team"].apply(retrieve_team_abbreviation)
+    df["underdog_team"] = df["underdog_team"].apply(retrieve_team_abbreviation)
+    df["spread"] = df["spread"].apply(lambda x: abs(float(x.split(" ")[1]) / 2))
+    df["over_under"] = df["over_under"].apply(lambda x: float(x.split(" ")[1]) / 2)
+    df["projected_favorite"] = (df["over_under"] + df["spread"]).round(0)
+    df["projected_underdog"] = (df["over_under"] - df["spread"]).round(0)
+    df["date"] = pd.to_datetime(df["date"], format="%b %d, %Y")
+    out_df = pd.DataFrame()
+    for row in df.itertuples():
+        row1 = [
+            row.favored_team,
+            row.underdog_team,
+            row.projected_favorite,
+            row.date,
+            season_year,
+        ]
+        row2 = [
+            row.underdog_team,
+            row.favored_team,
+            row.projected_underdog,
+            row.date,
+            season_year,
+        ]
+        out_df = pd.concat(
+            [
+                out_df,
+                pd.DataFrame(
+                    [row1, row2],
+                    columns=["team", "opp", "projected_off_pts", "date", "season_year"],
+                ),
+            ]
+        )
+    return out_df.reset_index(drop=True)
+
+
+def time_it(func, n_repeat: int = 5) -> float:
+    """Returns the best wall time, in milliseconds, of `n_repeat` runs."""
+    timings = list()
+    for _ in range(n_repeat):
+        start_time = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start_time)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n_matchups", type=int, default=16)
+    parser.add_argument("--n_games", type=int, default=272)
+    parser.add_argument("--betting_page_path", type=Path)
+    parser.add_argument("--historical_betting_page_path", type=Path)
+    args = parser.parse_args()
+    betting_page = (
+        args.betting_page_path.read_text()
+        if args.betting_page_path
+        else create_betting_page(args.n_matchups)
+    )
+    historical_betting_page = (
+        args.historical_betting_page_path.read_text()
+        if args.historical_betting_page_path
+        else create_historical_betting_page(args.n_games)
+    )
+    pd.testing.assert_frame_equal(
+        parse_betting_page(betting_page).head(32),
+        legacy_parse_betting_page(betting_page),
+    )
+    pd.testing.assert_frame_equal(
+        parse_historical_betting_page(historical_betting_page, 2022),
+        legacy_parse_historical_betting_page(historical_betting_page, 2022),
+    )
+
+    benchmarks = {
+        "weekly page (per matchup)": lambda: legacy_parse_betting_page(betting_page),
+        "weekly page (parsed once)": lambda: parse_betting_page(betting_page),
+        "historical page (per game)": lambda: legacy_parse_historical_betting_page(
+            historical_betting_page, 2022
+        ),
+        "historical page (vectorized)": lambda: parse_historical_betting_page(
+            historical_betting_page, 2022
+        ),
+    }
+    for name, func in benchmarks.items():
+        print(f"{name:<32} {time_it(func):>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmarks FantasyFeatures at multi-season scale.
+
+Usage:
+    $ python benchmarks/bench_features.py --season_year_start 2015 --position WR
+"""
+import argparse
+import time
+from copy import deepcopy
+
+from fantasyfootball.data import FantasyData
+from fantasyfootball.features import FantasyFeatures
+
+
+def time_it(func, setup=lambda: None, n_repeat: int = 5) -> float:
+    """Returns the best wall time, in milliseconds, of `n_repeat` runs.
+    The output of `setup` is passed to `func` and is not timed."""
+    timings = list()
+    for _ in range(n_repeat):
+        setup_output = setup()
+        start_time = time.perf_counter()
+        func(setup_output)
+        timings.append(time.perf_counter() - start_time)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--season_year_start", type=int, default=2015)
+    parser.add_argument("--season_year_end", type=int, default=2021)
+    parser.add_argument("--position", type=str, default="WR")
+    args = parser.parse_args()
+    fantasy_data = FantasyData(args.season_year_start, args.season_year_end)
+    fantasy_data.create_fantasy_points_column("yahoo")
+    ff_df = fantasy_data.data
+    y = ff_df.columns[-1]
+    features = FantasyFeatures(ff_df, y=y, position=args.position)
+    future_df = features.data.assign(
+        is_future_week=(features.data["week"] == features.data["week"].max()) * 1
+    )
+    cv_df = future_df.assign(cv=future_df[y].where(future_df["week"] % 3 > 0))
+
+    def run(method_name: str, *args, **kwargs):
+        def _run(features_copy: FantasyFeatures):
+            getattr(features_copy, method_name)(*args, **kwargs)
+
+        return _run
+
+    def recipe(recipe_features: FantasyFeatures):
+        recipe_features.add_coefficient_of_variation(n_week_window=8)
+        recipe_features.add_lag_feature(n_week_lag=[1, 2, 3], lag_columns=y)
+        recipe_features.add_moving_avg_feature(
+            n_week_window=[2, 4, 8], window_columns=[y, "off_snaps_pct"]
+        )
+        recipe_features.create_ff_signature()
+
+    def ewm(ewm_features: FantasyFeatures):
+        ewm_features.add_ewm_feature(
+            ewm_columns=[y, "off_snaps_pct"], halflife=[2, 4, 8]
+        )
+        ewm_features.create_ff_signature()
+
+    def rolling_quantile(quantile_features: FantasyFeatures):
+        quantile_features.add_rolling_quantile_feature(
+            n_week_window=8, window_columns=y, quantiles=[0, 0.25, 0.5, 0.75, 1]
+        )
+        quantile_features.create_ff_signature()
+
+    def rolling_quantile_pandas(pandas_features: FantasyFeatures):
+        # the per-group rolling route the transformer replaces
+        grouped = pandas_features.data.groupby(pandas_features.player_group_columns)
+        for quantile in [0, 0.25, 0.5, 0.75, 1]:
+            grouped[y].transform(
+                lambda x: x.rolling(8, min_periods=1).quantile(quantile).shift(1)
+            )
+
+    benchmarks = {
+        "log_transform_y": run("log_transform_y"),
+        "filter_inactive_games": run("filter_inactive_games"),
+        "_forward_fill_future_week_cv": lambda _: (
+            features._forward_fill_future_week_cv(cv_df)
+        ),
+        "add_coefficient_of_variation": run("add_coefficient_of_variation", 8),
+        "lag + moving average + cv recipe": recipe,
+        "ewm recipe": ewm,
+        "rolling quantile recipe": rolling_quantile,
+        "rolling quantile (pandas groupby)": rolling_quantile_pandas,
+    }
+    print(f"{features.data.shape[0]} {args.position} rows")
+    for name, func in benchmarks.items():
+        timing = time_it(func, setup=lambda: deepcopy(features))
+        print(f"{name:<40} {timing:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmarks the throughput of the pipeline scraper against a local server
+that serves a recorded gamelog page with a fixed latency per request.
+
+Usage:
+    $ python benchmarks/bench_scraper.py --n_pages 200 --latency_ms 50
+"""
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.append(str(Path.cwd()))
+from pipeline.scraper import AsyncScraper  # noqa: E402
+
+GAMELOG_HTML = "<table>" + "<tr><td>2021-09-09</td><td>TAM</td></tr>" * 20 + "</table>"
+
+
+def serve(latency_ms: float) -> ThreadingHTTPServer:
+    """Starts a local server that answers every request after `latency_ms`."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency_ms / 1000)
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(GAMELOG_HTML.encode())
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n_pages", type=int, default=200)
+    parser.add_argument("--latency_ms", type=float, default=50)
+    parser.add_argument("--max_concurrency", type=int, default=16)
+    args = parser.parse_args()
+    server = serve(args.latency_ms)
+    urls = [
+        f"http://127.0.0.1:{server.server_port}/gamelog/{i}/"
+        for i in range(args.n_pages)
+    ]
+
+    start_time = time.perf_counter()
+    for url in urls:
+        requests.get(url).text
+    serial_seconds = time.perf_counter() - start_time
+
+    scraper = AsyncScraper(
+        default_rate_limit=(10_000, args.max_concurrency),
+        max_concurrency=args.max_concurrency,
+    )
+    start_time = time.perf_counter()
+    pages = asyncio.run(scraper.fetch_all(urls))
+    async_seconds = time.perf_counter() - start_time
+    scraper.close()
+    server.shutdown()
+    assert all(page == GAMELOG_HTML for page in pages)
+
+    print(f"{'engine':<28}{'seconds':>10}{'pages/s':>10}")
+    for engine, seconds in [
+        ("serial requests", serial_seconds),
+        (f"async ({args.max_concurrency} in flight)", async_seconds),
+    ]:
+        print(f"{engine:<28}{seconds:>10.2f}{args.n_pages / seconds:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
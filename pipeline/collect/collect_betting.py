@@ -1,13 +1,14 @@
 import sys
+from io import StringIO
 from pathlib import Path
-from datetime import datetime
 
 import pandas as pd
-import requests
 
 sys.path.append(str(Path.cwd()))
-from pipeline.pipeline_config import betting_url, root_dir, header  # noqa: E402
+from pipeline.http_cache import HttpCache  # noqa: E402
+from pipeline.pipeline_config import betting_url, root_dir  # noqa: E402
 from pipeline.utils import (  # noqa: E402
+    create_calendar,
     get_module_purpose,
     retrieve_team_abbreviation,
     fetch_current_week,
@@ -17,82 +18,135 @@ from pipeline.utils import (  # noqa: E402
 )
 
 
-def collect_historical_betting(season_year: int) -> pd.DataFrame:
-    url = f"https://www.sportsoddshistory.com/nfl-game-season/?y={season_year}"
-    request = requests.get(url, headers=header)
-    df = pd.read_html(request.text)[5]
-    df.columns = [
-        "dow",
-        "date",
-        "time",
-        "home",
-        "favored_team",
-        "score",
-        "spread",
-        "place",
-        "underdog_team",
-        "over_under",
-        "placeholder",
-    ]
+HISTORICAL_BETTING_COLUMNS = [
+    "dow",
+    "date",
+    "time",
+    "home",
+    "favored_team",
+    "score",
+    "spread",
+    "place",
+    "underdog_team",
+    "over_under",
+    "placeholder",
+]
+BETTING_COLUMNS = ["team", "spread", "moneyline", "total_points"]
+# headers of the odds columns of a matchup table, after the team column
+MATCHUP_TABLE_HEADERS = ["spread", "moneyline", "total"]
+
+
+def _map_team_abbreviation(team_names: pd.Series) -> pd.Series:
+    "Maps team names to abbreviations, looking up each unique name once."
+    abbreviations = {
+        team_name: retrieve_team_abbreviation(team_name)
+        for team_name in team_names.unique()
+    }
+    return team_names.map(abbreviations)
+
+
+def parse_historical_betting_page(betting_page: str, season_year: int) -> pd.DataFrame:
+    """Parses the projected points of each team from a season's page of
+    historical odds.
+
+    Args:
+        betting_page (str): The html of the page.
+        season_year (int): The year of the season.
+
+    Returns:
+        pd.DataFrame: Two rows per game, one for each team, with the
+        team, opponent, projected points and date of the game.
+    """
+    df = pd.read_html(StringIO(betting_page))[5]
+    df.columns = HISTORICAL_BETTING_COLUMNS
     # drop the last row of data
     df = df.iloc[:-1]
-    df["favored_team"] = df["favored_team"].apply(
-        lambda x: retrieve_team_abbreviation(x)
+    favored_team = _map_team_abbreviation(df["favored_team"])
+    underdog_team = _map_team_abbreviation(df["underdog_team"])
+    # take the line from values such as 'W -3.5'
+    spread = df["spread"].str.split(" ").str[1].astype(float).div(2).abs()
+    over_under = df["over_under"].str.split(" ").str[1].astype(float).div(2)
+    # parse the game date 'Sep 8, 2022'
+    date = pd.to_datetime(df["date"], format="%b %d, %Y")
+    favored_df = pd.DataFrame(
+        {
+            "team": favored_team,
+            "opp": underdog_team,
+            "projected_off_pts": (over_under + spread).round(0),
+            "date": date,
+        }
     )
-    df["underdog_team"] = df["underdog_team"].apply(
-        lambda x: retrieve_team_abbreviation(x)
+    underdog_df = pd.DataFrame(
+        {
+            "team": underdog_team,
+            "opp": favored_team,
+            "projected_off_pts": (over_under - spread).round(0),
+            "date": date,
+        }
     )
-    df["spread"] = df["spread"].apply(lambda x: abs(float(x.split(" ")[1]) / 2))
-    df["over_under"] = df["over_under"].apply(lambda x: float(x.split(" ")[1]) / 2)
-    df["projected_favorite"] = (df["over_under"] + df["spread"]).round(0)
-    df["projected_underdog"] = (df["over_under"] - df["spread"]).round(0)
-    # parse the game date 'Sep 8, 2022'
-    df["date"] = df["date"].apply(lambda x: datetime.strptime(x, "%b %d, %Y"))
-    out_df = pd.DataFrame()
-    for row in df.itertuples():
-        row1 = [
-            row.favored_team,
-            row.underdog_team,
-            row.projected_favorite,
-            row.date,
-            2022,
-        ]
-        row2 = [
-            row.underdog_team,
-            row.favored_team,
-            row.projected_underdog,
-            row.date,
-            2022,
-        ]
-        out_df = pd.concat(
-            [
-                out_df,
-                pd.DataFrame(
-                    [row1, row2],
-                    columns=["team", "opp", "projected_off_pts", "date", "season_year"],
-                ),
-            ]
-        )
+    # interleave the favored and underdog rows of each game
+    out_df = (
+        pd.concat([favored_df, underdog_df])
+        .sort_index(kind="stable")
+        .reset_index(drop=True)
+    )
+    out_df["season_year"] = season_year
     return out_df
 
 
-def collect_betting(betting_url: str) -> pd.DataFrame:
-    request = requests.get(betting_url, headers=header)
-    raw_betting_data = pd.DataFrame()
-    for matchup in range(0, 16):
-        try:
-            df = pd.read_html(request.text)[matchup]
-            # exclude last column
-            df = df[df.columns[:-1].tolist()]
-            # rename columns
-            df.columns = ["team", "spread", "moneyline", "total_points"]
-            raw_betting_data = pd.concat([raw_betting_data, df], axis=0)
-        # catch IndexError
-        except IndexError:
-            # Someone weeks there will be buys;
-            # unclear how many games will be played each week
-            pass
-    return raw_betting_data
+def collect_historical_betting(
+    season_year: int, http_cache: HttpCache = None
+) -> pd.DataFrame:
+    url = f"https://www.sportsoddshistory.com/nfl-game-season/?y={season_year}"
+    http_cache = http_cache or HttpCache()
+    betting_page = http_cache.get(url, source="betting")
+    return parse_historical_betting_page(betting_page, season_year)
+
+
+def is_matchup_table(table: pd.DataFrame) -> bool:
+    """Checks that a table has the layout of a matchup: a team column, the
+    odds columns and a trailing column that is dropped. Other tables on the
+    page (e.g., standings) are not matchups, even with the same width.
+
+    Args:
+        table (pd.DataFrame): A table parsed from the odds page.
+
+    Returns:
+        bool: True if the table is a matchup.
+    """
+    if table.shape[1] != len(BETTING_COLUMNS) + 1:
+        return False
+    headers = [str(column).strip().lower() for column in table.columns]
+    return headers[1:4] == MATCHUP_TABLE_HEADERS
+
+
+def parse_betting_page(betting_page: str) -> pd.DataFrame:
+    """Parses the odds of each matchup from the weekly odds page. The page
+    is parsed once, and has one table per matchup, so weeks with byes
+    have fewer tables.
+
+    Args:
+        betting_page (str): The html of the page.
+
+    Returns:
+        pd.DataFrame: The team, spread, moneyline and total points of
+        each team.
+    """
+    matchup_tables = [
+        # exclude last column
+        table.iloc[:, :-1].set_axis(BETTING_COLUMNS, axis=1)
+        for table in pd.read_html(StringIO(betting_page))
+        if is_matchup_table(table)
+    ]
+    if not matchup_tables:
+        return pd.DataFrame(columns=BETTING_COLUMNS)
+    return pd.concat(matchup_tables, axis=0)
+
+
+def collect_betting(betting_url: str, http_cache: HttpCache = None) -> pd.DataFrame:
+    http_cache = http_cache or HttpCache()
+    betting_page = http_cache.get(betting_url, source="betting")
+    return parse_betting_page(betting_page)
 
 
 if __name__ == "__main__":
@@ -101,10 +155,11 @@ if __name__ == "__main__":
     data_dir = (
         root_dir / "staging_datasets" / "season" / str(args.season_year) / "processed"
     )
-    calendar_df = read_ff_csv(data_dir / "calendar")
+    calendar = create_calendar(read_ff_csv(data_dir / "calendar"))
+    http_cache = HttpCache(offline=args.offline)
     if args.is_historical:
         betting_raw_historical = collect_historical_betting(
-            season_year=args.season_year
+            season_year=args.season_year, http_cache=http_cache
         )
         betting_raw_historical.write_ff_csv(
             root_dir=root_dir,
@@ -113,8 +168,8 @@ if __name__ == "__main__":
             data_type=data_type,
         )
     else:
-        betting_raw = collect_betting(betting_url=betting_url)
-        current_season_week = fetch_current_week(calendar_df)
+        betting_raw = collect_betting(betting_url=betting_url, http_cache=http_cache)
+        current_season_week = fetch_current_week(calendar)
         betting_raw.write_ff_csv(
             root_dir,
             args.season_year,
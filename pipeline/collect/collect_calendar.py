@@ -1,26 +1,31 @@
 import sys
+from io import StringIO
 from pathlib import Path
 
 import pandas as pd
 
 sys.path.append(str(Path.cwd()))
+from pipeline.http_cache import HttpCache  # noqa: E402
 from pipeline.pipeline_config import root_dir, stats_url  # noqa: E402
 
 from pipeline.utils import get_module_purpose, read_args, write_ff_csv  # noqa: E402
 
 
-def collect_calendar(calendar_url: str) -> pd.DataFrame:
+def collect_calendar(calendar_url: str, http_cache: HttpCache = None) -> pd.DataFrame:
     """Collects the calendar data for a complete season. Includes
        data on date, time, winner, loser, box-score, total points
        for each team.
 
     Args:
         calendar_url (str): The url to scrape the calendar data from.
+        http_cache (HttpCache, optional): Cache of responses. Defaults to None.
 
     Returns:
         pd.DataFrame: The calendar data.
     """
-    calendar_df = pd.read_html(calendar_url)[0]
+    http_cache = http_cache or HttpCache()
+    calendar_page = http_cache.get(calendar_url, source="calendar")
+    calendar_df = pd.read_html(StringIO(calendar_page))[0]
     return calendar_df
 
 
@@ -28,7 +33,9 @@ if __name__ == "__main__":
     args = read_args()
     dir_type, data_type = get_module_purpose(module_path=__file__)
     calendar_url = f"{stats_url}/years/{args.season_year}/games.htm"
-    calendar_raw = collect_calendar(calendar_url=calendar_url)
+    calendar_raw = collect_calendar(
+        calendar_url=calendar_url, http_cache=HttpCache(offline=args.offline)
+    )
     print(root_dir)
     calendar_raw.write_ff_csv(
         root_dir=root_dir,
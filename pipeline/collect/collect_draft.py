@@ -4,19 +4,19 @@ import sys
 
 from bs4 import BeautifulSoup as bs
 from bs4.element import Tag
-import urllib.request
 
 sys.path.append(str(Path.cwd()))
+from pipeline.http_cache import HttpCache  # noqa: E402
 from pipeline.pipeline_config import root_dir, draft_url, header  # noqa: E402
 from pipeline.pipeline_logger import logger  # noqa: E402
 from pipeline.utils import get_module_purpose, read_args, write_ff_csv  # noqa: E402
 
 
-def collect_draft() -> bs:
+def collect_draft(http_cache: HttpCache = None) -> bs:
     url = "https://www.fantasypros.com/nfl/adp/overall.php"
-    request = urllib.request.Request(url, None, header)
-    response = urllib.request.urlopen(request)
-    draft_data_soup = bs(response.read(), "html.parser")
+    http_cache = http_cache or HttpCache()
+    draft_page = http_cache.get(url, source="draft", headers=header)
+    draft_data_soup = bs(draft_page, "html.parser")
     return draft_data_soup
 
 
@@ -44,7 +44,7 @@ if __name__ == "__main__":
     dir_type, data_type = get_module_purpose(module_path=__file__)
     draft_url = f"{draft_url}{args.season_year}"
     logger.info("Collecting draft position")
-    draft_raw_bs = collect_draft()
+    draft_raw_bs = collect_draft(http_cache=HttpCache(offline=args.offline))
     draft_raw_df = prep_raw_draft(draft_raw_bs)
     draft_raw_df.write_ff_csv(
         root_dir=root_dir,
@@ -1,31 +1,32 @@
 import sys
+from io import StringIO
 from pathlib import Path
-import requests
 
 import pandas as pd
 
 sys.path.append(str(Path.cwd()))
-from pipeline.pipeline_config import root_dir, draft_url  # noqa: E402
+from pipeline.http_cache import HttpCache  # noqa: E402
+from pipeline.pipeline_config import root_dir, draft_url, header  # noqa: E402
 from pipeline.pipeline_logger import logger  # noqa: E402
 from pipeline.utils import get_module_purpose, read_args, write_ff_csv  # noqa: E402
 
 
-def collect_average_draft_position(draft_url: str) -> pd.DataFrame:
+def collect_average_draft_position(
+    draft_url: str, http_cache: HttpCache = None
+) -> pd.DataFrame:
     """Collects the average draft position for each player by year.
 
     Args:
         draft_url (str): The url to scrape the draft data from.
+        http_cache (HttpCache, optional): Cache of responses. Defaults to None.
 
     Returns:
         pd.DataFrame: The raw draft data for a single season.
 
     """
-    header = {
-        "User-Agent": "Mozilla/5.0 (Windows; U; Windows NT 5.1; en-US; rv:1.9.0.7) Gecko/2009021910 Firefox/3.0.7",  # noqa: E501
-        "X-Requested-With": "XMLHttpRequest",
-    }
-    request = requests.get(draft_url, headers=header)
-    draft_df = pd.read_html(request.text)[0]
+    http_cache = http_cache or HttpCache()
+    draft_page = http_cache.get(draft_url, source="historical_draft", headers=header)
+    draft_df = pd.read_html(StringIO(draft_page))[0]
     return draft_df
 
 
@@ -34,7 +35,9 @@ if __name__ == "__main__":
     dir_type, data_type = get_module_purpose(module_path=__file__)
     draft_url = f"{draft_url}{args.season_year}"
     logger.info("Collecting average draft position")
-    draft_raw = collect_average_draft_position(draft_url=draft_url)
+    draft_raw = collect_average_draft_position(
+        draft_url=draft_url, http_cache=HttpCache(offline=args.offline)
+    )
     draft_raw.write_ff_csv(
         root_dir=root_dir,
         season_year=args.season_year,
@@ -2,7 +2,6 @@ import sys
 from pathlib import Path
 import re
 import time
-import urllib.request
 from itertools import chain
 from typing import List
 
@@ -11,6 +10,7 @@ from bs4 import BeautifulSoup as bs
 from bs4.element import Tag
 
 sys.path.append(str(Path.cwd()))
+from pipeline.http_cache import HttpCache  # noqa: E402
 from pipeline.pipeline_config import injury_url, root_dir  # noqa: E402
 from pipeline.pipeline_logger import logger  # noqa: E402
 from pipeline.utils import get_module_purpose, read_args, write_ff_csv  # noqa: E402
@@ -124,11 +124,14 @@ if __name__ == "__main__":
     if args.season_year < 2016:
         raise ValueError("Injury data is only available for 2016 and later seasons.")
     logger.info(f"collecting injury data for {args.season_year}")
+    http_cache = HttpCache(offline=args.offline)
     for week in range(1, 18):
         weekly_injury_url = f"{injury_url}?yr={args.season_year}&wk={week}&type=reg"
-        request = urllib.request.Request(weekly_injury_url, None, HEADERS)
-        response = urllib.request.urlopen(request)
-        injury_data_soup = bs(response.read(), "html.parser")
+        response = http_cache.fetch(
+            weekly_injury_url, source=data_type, headers=HEADERS
+        )
+        response.raise_for_status()
+        injury_data_soup = bs(response.text, "html.parser")
         # extract all teams from the injury report
         all_teams = injury_data_soup.findAll("div", {"class": "teamsectlabel"})
         all_teams = [
@@ -174,5 +177,7 @@ if __name__ == "__main__":
         weekly_injury_report_df["week"] = week
         weekly_injury_report_df["season_year"] = args.season_year
         injury_raw_df = pd.concat([injury_raw_df, weekly_injury_report_df])
-        time.sleep(5)
+        # only pause between requests that reached the site
+        if not response.from_cache:
+            time.sleep(5)
     injury_raw_df.write_ff_csv(root_dir, args.season_year, dir_type, data_type)
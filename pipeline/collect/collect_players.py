@@ -1,26 +1,33 @@
 import sys
+from io import StringIO
 from pathlib import Path
 
 import pandas as pd
 
 sys.path.append(str(Path.cwd()))
+from pipeline.http_cache import HttpCache  # noqa: E402
 from pipeline.pipeline_config import root_dir, stats_url  # noqa: E402
 from pipeline.utils import get_module_purpose, read_args, write_ff_csv  # noqa: E402
 
 
-def collect_players(url: str, season_year: int) -> pd.DataFrame:
+def collect_players(
+    url: str, season_year: int, http_cache: HttpCache = None
+) -> pd.DataFrame:
     """Collects player data, including first name, last name, team,
        and position for a given season.
 
     Args:
         url (str): The url prefix for all active players in a given season.
         season_year (int): The year of the season.
+        http_cache (HttpCache, optional): Cache of responses. Defaults to None.
 
     Returns:
         pd.DataFrame: The player data for a given season.
     """
     season_year_url = f"{url}/years/{season_year}/fantasy.htm"
-    players = pd.read_html(season_year_url)[0]
+    http_cache = http_cache or HttpCache()
+    players_page = http_cache.get(season_year_url, source="players")
+    players = pd.read_html(StringIO(players_page))[0]
     players.columns = ["_".join(x) for x in players.columns.to_flat_index()]
     players = players[
         [
@@ -37,7 +44,11 @@ def collect_players(url: str, season_year: int) -> pd.DataFrame:
 if __name__ == "__main__":
     args = read_args()
     dir_type, data_type = get_module_purpose(module_path=__file__)
-    players_raw = collect_players(url=stats_url, season_year=args.season_year)
+    players_raw = collect_players(
+        url=stats_url,
+        season_year=args.season_year,
+        http_cache=HttpCache(offline=args.offline),
+    )
     players_raw.write_ff_csv(
         root_dir=root_dir,
         season_year=args.season_year,
@@ -1,12 +1,14 @@
 import sys
+from io import StringIO
 from pathlib import Path
-import requests
 
 import pandas as pd
 
 sys.path.append(str(Path.cwd()))
-from pipeline.pipeline_config import root_dir, header  # noqa: E402
+from pipeline.http_cache import HttpCache  # noqa: E402
+from pipeline.pipeline_config import root_dir  # noqa: E402
 from pipeline.utils import (  # noqa: E402
+    create_calendar,
     get_module_purpose,
     fetch_current_week,
     read_args,
@@ -27,10 +29,11 @@ url: https://dailyroto.com/nfl-historical-production\
 """
 
 
-def collect_salary():
+def collect_salary(http_cache: HttpCache = None):
     fanduel_url = "https://www.footballdiehards.com/fantasyfootball/dailygames/FanDuel-Salary-data.cfm"  # noqa: E501
-    request = requests.get(fanduel_url, headers=header)
-    fanduel_salary_df = pd.read_html(request.text)[0]
+    http_cache = http_cache or HttpCache()
+    salary_page = http_cache.get(fanduel_url, source="salary")
+    fanduel_salary_df = pd.read_html(StringIO(salary_page))[0]
     fanduel_salary_df = fanduel_salary_df.droplevel(0, axis=1)
     return fanduel_salary_df
 
@@ -41,10 +44,10 @@ if __name__ == "__main__":
     data_dir = (
         root_dir / "staging_datasets" / "season" / str(args.season_year) / "processed"
     )
-    calendar_df = read_ff_csv(data_dir / "calendar")
-    salary_raw = collect_salary()
+    calendar = create_calendar(read_ff_csv(data_dir / "calendar"))
+    salary_raw = collect_salary(http_cache=HttpCache(offline=args.offline))
     season_week = str(salary_raw["week"].unique()[0])
-    current_season_week = fetch_current_week(calendar_df)
+    current_season_week = fetch_current_week(calendar)
     # ensure salary website has the correct, current week
     assert_msg = (
         f"Salary website has week: {season_week}"
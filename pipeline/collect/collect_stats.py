@@ -1,19 +1,25 @@
+from __future__ import annotations  # noqa: F404
+
+import asyncio
 import sys
+from collections import Counter, defaultdict
+from io import StringIO
 from pathlib import Path
 import re
 
-import time
 from itertools import chain, product
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 from datetime import datetime, timezone
 
 import pandas as pd
-from urllib.error import HTTPError
 import boto3
 
 sys.path.append(str(Path.cwd()))
-from pipeline.pipeline_config import root_dir, stats_url  # noqa: E402
+from pipeline.http_cache import HttpCache  # noqa: E402
+from pipeline.pipeline_config import root_dir, stats_url, rate_limits  # noqa: E402
 from pipeline.pipeline_logger import logger  # noqa: E402
+from pipeline.pid_registry import PidRegistry, load_pid_registry  # noqa: E402
+from pipeline.scraper import AsyncScraper  # noqa: E402
 from pipeline.utils import get_module_purpose, read_args, write_ff_csv  # noqa: E402
 
 
@@ -185,6 +191,152 @@ def pad_last_name(last_name: str) -> str:
     return last_name
 
 
+def split_player_name(player_name: str) -> Tuple[str, str]:
+    """Splits a player's name into the first name and the cleaned last name
+    used to create player ids."""
+    first_name, *last_name = player_name.split(" ")
+    last_name = last_name[0]
+    if len(last_name) < 4:
+        last_name = pad_last_name(last_name)
+    last_name = clean_player_name(name=last_name, name_part="last")
+    return first_name, last_name
+
+
+def get_player_id_variant(player_id: str) -> str:
+    """Returns the naming convention of a player id: 'apostrophe' (O'ShJa00),
+    'period' (MetcD.00), 'letter' (MetcD00) or 'default' (MetcDK00)."""
+    if "'" in player_id:
+        return "apostrophe"
+    if "." in player_id[4:]:
+        return "period"
+    if len(player_id) == 7:
+        return "letter"
+    return "default"
+
+
+def get_player_name_type(first_name: str, last_name: str) -> str:
+    """Returns the type of a player's name, which determines the naming
+    conventions of the player's candidate ids."""
+    if first_name_is_abbr(first_name):
+        return "abbreviation"
+    if "'" in last_name:
+        return "apostrophe"
+    return "default"
+
+
+class PlayerIdRanker:
+    """Ranks a player's candidate ids by their empirical likelihood, learned
+    from known player ids:
+
+    * The suffix of a new player id tends to be the next unused suffix for the
+      4+2 letter prefix (e.g., 'HarrDe07' after 'HarrDe06'), so the likelihood
+      of a suffix depends on its distance from the next unused suffix, learned
+      from the distances between consecutive known suffixes.
+    * For abbreviated first names (e.g., 'D.J.') and last names with an
+      apostrophe, some naming conventions are used more often than others.
+    * Ids that belong to another player are tried last.
+
+    Args:
+        player_ids (Dict[str, str]): Names of known players by player id.
+    """
+
+    def __init__(self, player_ids: Dict[str, str]):
+        self.player_ids = dict(player_ids)
+        suffixes = defaultdict(list)
+        self.variant_counts = defaultdict(Counter)
+        for player_id, player_name in self.player_ids.items():
+            if not player_id[-2:].isdigit() or " " not in player_name:
+                continue
+            suffixes[player_id[:-2]].append(int(player_id[-2:]))
+            name_type = get_player_name_type(*split_player_name(player_name))
+            self.variant_counts[name_type][get_player_id_variant(player_id)] += 1
+        # distance of each suffix from the suffix following the previous one
+        self.gap_counts = Counter()
+        self.next_suffix = dict()
+        for prefix, prefix_suffixes in suffixes.items():
+            prefix_suffixes = sorted(prefix_suffixes)
+            previous_suffixes = [-1] + prefix_suffixes[:-1]
+            for suffix, previous_suffix in zip(prefix_suffixes, previous_suffixes):
+                self.gap_counts[suffix - previous_suffix - 1] += 1
+            self.next_suffix[prefix] = prefix_suffixes[-1] + 1
+
+    @classmethod
+    def from_registry(cls, pid_registry: PidRegistry) -> PlayerIdRanker:
+        return cls(
+            {entry["pid"]: entry["name"] for entry in pid_registry.list_entries()}
+        )
+
+    def rank(self, player_name: str, player_ids: List[str]) -> List[Tuple[str, float]]:
+        """Orders candidate ids from most to least likely.
+
+        Args:
+            player_name (str): The name of the player.
+            player_ids (List[str]): Candidate ids, e.g. from `create_player_id`.
+
+        Returns:
+            List[Tuple[str, float]]: Candidate ids and their probability.
+        """
+        name_type = get_player_name_type(*split_player_name(player_name))
+        variants = [get_player_id_variant(player_id) for player_id in player_ids]
+        variant_counts = self.variant_counts[name_type]
+        n_variants = sum(variant_counts[variant] for variant in set(variants))
+        n_gaps = sum(self.gap_counts.values())
+        likelihoods = list()
+        for player_id, variant in zip(player_ids, variants):
+            if self.player_ids.get(player_id, player_name) != player_name:
+                likelihoods.append(0.0)
+                continue
+            # suffixes below the next unused suffix belong to players missing
+            # from the known ids, so are treated like suffixes above it
+            gap = abs(int(player_id[-2:]) - self.next_suffix.get(player_id[:-2], 0))
+            # add-one smoothing over the ten suffixes and the variants
+            gap_likelihood = (self.gap_counts[gap] + 1) / (n_gaps + 10)
+            variant_likelihood = (variant_counts[variant] + 1) / (
+                n_variants + len(set(variants))
+            )
+            likelihoods.append(gap_likelihood * variant_likelihood)
+        total = sum(likelihoods) or 1
+        ranked_ids = sorted(
+            zip(player_ids, [x / total for x in likelihoods]),
+            key=lambda x: x[1],
+            reverse=True,
+        )
+        return ranked_ids
+
+
+def create_probe_batches(
+    ranked_ids: List[Tuple[str, float]], batch_size: int, probe_mass: float = 0.5
+) -> List[List[str]]:
+    """Groups ranked candidate ids into batches that are probed concurrently.
+    Each batch takes the most likely remaining ids until they cover
+    `probe_mass` of the remaining probability, up to `batch_size` ids, so
+    likely ids are probed alone and unlikely ids together.
+
+    Args:
+        ranked_ids (List[Tuple[str, float]]): Output of `PlayerIdRanker.rank`.
+        batch_size (int): Maximum number of ids in a batch.
+        probe_mass (float, optional): Share of the remaining probability that
+            a batch covers. Defaults to 0.5.
+
+    Returns:
+        List[List[str]]: Batches of candidate ids, in probe order.
+    """
+    batches = list()
+    start = 0
+    while start < len(ranked_ids):
+        remaining_mass = sum(likelihood for _, likelihood in ranked_ids[start:])
+        batch, batch_mass = list(), 0.0
+        while start < len(ranked_ids) and len(batch) < batch_size:
+            if batch and batch_mass >= probe_mass * remaining_mass:
+                break
+            player_id, likelihood = ranked_ids[start]
+            batch.append(player_id)
+            batch_mass += likelihood
+            start += 1
+        batches.append(batch)
+    return batches
+
+
 # TO DO: Add a function to check which players already exist in S3
 def get_recent_raw_stats(
     season_year: int, bucket_name: str = "fantasy-football-pipeline"
@@ -226,20 +378,105 @@ def get_recent_raw_stats(
     return bucket_contents
 
 
-def collect_stats(
+def parse_gamelog(
+    gamelog_html: str, player_team: str, player_id: str, season_year: int
+) -> pd.DataFrame:
+    """Parses the season stats of a player from a gamelog page.
+
+    Args:
+        gamelog_html (str): The gamelog page.
+        player_team (str): The 3 letter abbreviation of the player's team.
+        player_id (str): The player's id.
+        season_year (int): The year of the season.
+
+    Returns:
+        pd.DataFrame: The season stats, or an empty dataframe if the page
+        has no stats for the player's team or the player already exists in
+        the staging data.
+    """
+    try:
+        stats = pd.read_html(StringIO(gamelog_html))[0]
+        stats.columns = ["_".join(x) for x in stats.columns.to_flat_index()]
+        # Ensures player is on correct team
+        correct_team = player_team in stats["Unnamed: 5_level_0_Tm"].dropna().unique()
+    except (ValueError, KeyError, TypeError):
+        return pd.DataFrame(None)
+    # Ensure player doesn't already exist in staging data
+    # (e.g., Derek Carrier & Derek Carr)
+    raw_stats_csvs = (
+        root_dir / "staging_datasets" / "season" / str(season_year) / "raw" / "stats"
+    ).glob("*.csv")
+    stats_do_not_exist = player_id not in [
+        x.stem.replace("_stats", "") for x in raw_stats_csvs
+    ]
+    if correct_team and stats_do_not_exist:
+        return stats
+    return pd.DataFrame(None)
+
+
+class PidClaims:
+    """Player ids claimed during a run. Players are collected concurrently,
+    so two players with overlapping candidate ids (e.g., Derek Carrier &
+    Derek Carr) can both find the same gamelog before either is written to
+    the staging data. Each pid is claimed under a lock, so only the first
+    player to find it keeps it.
+
+    Args:
+        pids (set, optional): Ids that are already claimed. Defaults to None.
+    """
+
+    def __init__(self, pids: set = None):
+        self.pids = set(pids or ())
+        self._lock = None
+
+    async def claim(self, pid: str) -> bool:
+        """Claims a pid, returning False if it is already claimed."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if pid in self.pids:
+                return False
+            self.pids.add(pid)
+            return True
+
+
+async def collect_stats_async(
+    scraper: AsyncScraper,
     player_name: str,
     player_team: str,
     season_year: int,
     stats_url: str,
     existing_player_data: set,
+    player_position: str = None,
+    pid_registry: PidRegistry = None,
+    player_id_ranker: PlayerIdRanker = None,
+    probe_batch_size: int = 3,
+    pid_claims: PidClaims = None,
 ) -> pd.DataFrame:
-    """Collects the season stats for a given player.
+    """Collects the season stats for a given player. The player's id from the
+    pid registry is tried first, so the player's candidate ids are only probed
+    for players that are not registered. Candidate ids are probed from most to
+    least likely, a batch at a time.
 
     Args:
+        scraper (AsyncScraper): Scraper used to fetch the gamelog pages.
         player_name (str): The name of the player.
         player_team (str): The 3 letter abbreviation of the player's team.
         season_year (int): The year of the season.
         stats_url (str): The url prefix for the player's stats.
+        existing_player_data (set): Ids of players already collected.
+        player_position (str, optional): The player's position, used to tell
+            apart registered players with the same name. Defaults to None.
+        pid_registry (PidRegistry, optional): Registry of known player ids.
+            Ids found by probing are recorded in it. Defaults to None.
+        player_id_ranker (PlayerIdRanker, optional): Ranks the candidate ids.
+            Defaults to None, which probes the candidates one at a time in the
+            order of `create_player_id`.
+        probe_batch_size (int, optional): Maximum number of ranked candidate
+            ids probed concurrently. Defaults to 3.
+        pid_claims (PidClaims, optional): Ids claimed by the other players of
+            the run. A gamelog whose id is already claimed is skipped.
+            Defaults to None.
 
     Returns:
         pd.DataFrame: The season stats for a given player.
@@ -250,57 +487,169 @@ def collect_stats(
         "Equanimeous St. Brown": "St.BEq00",
         "Deonte Harty": "HarrDe07",
     }
-    first_name, *last_name = player_name.split(" ")
-    last_name = last_name[0]
-    if len(last_name) < 4:
-        last_name = pad_last_name(last_name)
-    last_name = clean_player_name(name=last_name, name_part="last")
+    first_name, last_name = split_player_name(player_name)
     player_ids = create_player_id(first_name=first_name, last_name=last_name)
+    if player_name in player_id_edge_cases.keys():
+        player_ids = [player_id_edge_cases.get(player_name)]
+    registered_id = None
+    if pid_registry is not None:
+        registered_id = pid_registry.lookup(player_name, player_team, player_position)
+    if registered_id is not None:
+        player_ids = [registered_id] + [x for x in player_ids if x != registered_id]
     for player_id in player_ids:
         if player_id in existing_player_data:
             logger.info(f"Player {player_id} already exists in S3. Skipping...")
             return pd.DataFrame()
-    for player_id in player_ids:
-        if player_name in player_id_edge_cases.keys():
-            player_id = player_id_edge_cases.get(player_name)
-        player_url = create_url_by_season(stats_url, last_name, player_id, season_year)
-        try:
-            stats = pd.read_html(player_url)[0]
-            stats.columns = ["_".join(x) for x in stats.columns.to_flat_index()]
-            # Ensures player is on correct team
-            correct_team = (
-                player_team in stats["Unnamed: 5_level_0_Tm"].dropna().unique()
-            )
-            # Ensure player doesn't already exist in staging data
-            # (e.g., Derek Carrier & Derek Carr)
-            raw_stats_csvs = (
-                root_dir
-                / "staging_datasets"
-                / "season"
-                / str(season_year)
-                / "raw"
-                / "stats"
-            ).glob("*.csv")
-            stats_do_not_exist = player_id not in [
-                x.stem.replace("_stats", "") for x in raw_stats_csvs
+    probe_batches = [[registered_id]] if registered_id is not None else []
+    candidate_ids = [x for x in player_ids if x != registered_id]
+    if player_id_ranker is not None:
+        ranked_ids = player_id_ranker.rank(player_name, candidate_ids)
+        probe_batches += create_probe_batches(ranked_ids, probe_batch_size)
+    else:
+        probe_batches += [[player_id] for player_id in candidate_ids]
+    probe_index = 0
+    for probe_batch in probe_batches:
+        gamelog_pages = await scraper.fetch_all(
+            [
+                create_url_by_season(stats_url, last_name, player_id, season_year)
+                for player_id in probe_batch
             ]
-            # If both conditions are met, add player to staging data
-            if correct_team and stats_do_not_exist:
+        )
+        for player_id, gamelog_html in zip(probe_batch, gamelog_pages):
+            if gamelog_html is None:
+                probe_index += 1
+                continue
+            stats = parse_gamelog(gamelog_html, player_team, player_id, season_year)
+            if (
+                not stats.empty
+                and pid_claims is not None
+                and not await pid_claims.claim(player_id)
+            ):
+                logger.info(f"{player_id} is already claimed. Skipping...")
+                stats = pd.DataFrame(None)
+            if not stats.empty:
                 stats["pid"] = player_id
                 stats["name"] = player_name
+                if pid_registry is not None and player_id != registered_id:
+                    pid_registry.record(
+                        player_name,
+                        player_team,
+                        player_position,
+                        player_id,
+                        probe_index=probe_index,
+                    )
                 return stats
-        except Exception as e:
-            # if exception type is HTTP Error 429: Too Many Requests, shut down
-            # the script
-            if isinstance(e, HTTPError) and e.code == 429:
-                logger.error(
-                    "HTTP Error 429: Too Many Requests. Shutting down script..."
-                )
-                sys.exit(1)
-            continue
+            probe_index += 1
     return pd.DataFrame(None)
 
 
+def collect_stats(
+    player_name: str,
+    player_team: str,
+    season_year: int,
+    stats_url: str,
+    existing_player_data: set,
+) -> pd.DataFrame:
+    """Collects the season stats for a given player.
+
+    Args:
+        player_name (str): The name of the player.
+        player_team (str): The 3 letter abbreviation of the player's team.
+        season_year (int): The year of the season.
+        stats_url (str): The url prefix for the player's stats.
+
+    Returns:
+        pd.DataFrame: The season stats for a given player.
+    """
+    scraper = AsyncScraper(rate_limits=rate_limits)
+    try:
+        return asyncio.run(
+            collect_stats_async(
+                scraper,
+                player_name,
+                player_team,
+                season_year,
+                stats_url,
+                existing_player_data,
+            )
+        )
+    finally:
+        scraper.close()
+
+
+async def collect_all_stats(
+    scraper: AsyncScraper,
+    players: pd.DataFrame,
+    season_year: int,
+    stats_url: str,
+    existing_player_data: set,
+    pid_registry: PidRegistry = None,
+    dir_type: str = "raw",
+    data_type: str = "stats",
+) -> int:
+    """Collects the season stats of all players concurrently, writing each
+    player's stats to the staging data as soon as they are collected. A
+    player whose stats cannot be collected is logged and skipped, so the
+    other players are still collected.
+
+    Args:
+        scraper (AsyncScraper): Scraper used to fetch the gamelog pages.
+        players (pd.DataFrame): Players with name, team and position columns.
+        season_year (int): The year of the season.
+        stats_url (str): The url prefix for the player's stats.
+        existing_player_data (set): Ids of players already collected.
+        pid_registry (PidRegistry, optional): Registry of known player ids,
+            also used to rank the candidate ids of unknown players.
+            Defaults to None.
+        dir_type (str, optional): Defaults to "raw".
+        data_type (str, optional): Defaults to "stats".
+
+    Returns:
+        int: The number of players collected.
+    """
+    player_id_ranker = None
+    if pid_registry is not None:
+        player_id_ranker = PlayerIdRanker.from_registry(pid_registry)
+    pid_claims = PidClaims()
+
+    async def _collect(
+        player_name: str, player_team: str, player_position: str
+    ) -> bool:
+        logger.info(f"collecting data for {player_name}")
+        try:
+            stats_raw = await collect_stats_async(
+                scraper,
+                player_name,
+                player_team,
+                season_year,
+                stats_url,
+                existing_player_data,
+                player_position,
+                pid_registry,
+                player_id_ranker,
+                pid_claims=pid_claims,
+            )
+        except Exception as error:
+            logger.error(f"Could not collect stats for {player_name}: {error}")
+            return False
+        if stats_raw.empty:
+            logger.error(f"Could not collect stats for {player_name}")
+            return False
+        pid = stats_raw["pid"].iloc[0]
+        stats_raw.write_ff_csv(root_dir, season_year, dir_type, data_type, pid)
+        return True
+
+    is_collected = await asyncio.gather(
+        *[
+            _collect(player_name, player_team, player_position)
+            for player_name, player_team, player_position in zip(
+                players["name"], players["team"], players["position"]
+            )
+        ]
+    )
+    return sum(is_collected)
+
+
 if __name__ == "__main__":
     args = read_args()
     dir_type, data_type = get_module_purpose(module_path=__file__)
@@ -316,19 +665,24 @@ if __name__ == "__main__":
         data_dir.parent.parent / "processed" / "players" / "players.csv"
     )
     existing_player_data = get_recent_raw_stats(season_year=args.season_year)
-    for row in players.itertuples():
-        _, player_name, player_team, player_position, _ = row
-        logger.info(f"collecting data for {player_name}")
-        stats_raw = collect_stats(
-            player_name=player_name,
-            player_team=player_team,
-            season_year=args.season_year,
-            stats_url=stats_url,
-            existing_player_data=existing_player_data,
+    pid_registry = load_pid_registry()
+    scraper = AsyncScraper(
+        rate_limits=rate_limits,
+        http_cache=HttpCache(offline=args.offline),
+        source=data_type,
+    )
+    n_collected = asyncio.run(
+        collect_all_stats(
+            scraper,
+            players,
+            args.season_year,
+            stats_url,
+            existing_player_data,
+            pid_registry,
+            dir_type,
+            data_type,
         )
-        if stats_raw.empty:
-            logger.error(f"Could not collect stats for {player_name}")
-            continue
-        pid = stats_raw["pid"].iloc[0]
-        stats_raw.write_ff_csv(root_dir, args.season_year, dir_type, data_type, pid)
-        time.sleep(5)
+    )
+    scraper.close()
+    pid_registry.save()
+    logger.info(f"Collected stats for {n_collected} of {players.shape[0]} players")
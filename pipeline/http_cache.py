@@ -0,0 +1,244 @@
+import gzip
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path, PosixPath
+from typing import NamedTuple, Union
+
+import requests
+
+sys.path.append(str(Path.cwd()))
+from pipeline.pipeline_config import cache_dir, cache_ttls, header  # noqa: E402
+from pipeline.pipeline_logger import logger  # noqa: E402
+
+"""On-disk HTTP response cache shared by the collect modules. Entries are
+keyed by the url and request headers and point to gzip compressed bodies,
+which are stored once per unique content. Fresh entries, within the time to
+live (ttl) of their source, are served from disk. Stale entries are
+revalidated with the ETag and Last-Modified headers of the cached response,
+so an unchanged page is not downloaded again. In offline mode, every request
+is replayed from the cache, so the collectors can be re-run without network.
+"""
+
+
+class CacheMissError(Exception):
+    """Raised in offline mode when a request is not in the cache."""
+
+
+class CachedResponse(NamedTuple):
+    """A response served from the network or the cache."""
+
+    url: str
+    status_code: int
+    text: str
+    headers: dict
+    from_cache: bool
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 400
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise requests.HTTPError(f"HTTP Error {self.status_code} for {self.url}")
+
+
+class HttpCache:
+    """Content-addressed, on-disk cache of HTTP GET responses.
+
+    Args:
+        cache_dir (PosixPath, optional): Directory of the cache. Defaults to
+            staging_datasets/http_cache.
+        ttls (dict, optional): Seconds a response stays fresh, by source (e.g.,
+            'stats', 'betting'). Defaults to `cache_ttls` in pipeline_config.
+        offline (bool, optional): Serve every request from the cache, without
+            network. Defaults to False.
+        timeout (float, optional): Request timeout in seconds. Defaults to 30.
+    """
+
+    # responses that are cached; other statuses (e.g., 429) are retried
+    cached_status_codes = (200, 404)
+
+    def __init__(
+        self,
+        cache_dir: PosixPath = cache_dir,
+        ttls: dict = cache_ttls,
+        offline: bool = False,
+        timeout: float = 30,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.ttls = ttls
+        self.offline = offline
+        self.timeout = timeout
+        (self.cache_dir / "entries").mkdir(parents=True, exist_ok=True)
+        (self.cache_dir / "bodies").mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def create_key(url: str, headers: dict = None) -> str:
+        """Creates the key of a request from its url and headers."""
+        signature = json.dumps([url, headers or dict()], sort_keys=True)
+        return hashlib.sha256(signature.encode()).hexdigest()
+
+    def _ttl(self, source: str) -> float:
+        return self.ttls.get(source, self.ttls.get("default", 0))
+
+    @staticmethod
+    def _write(path: PosixPath, data: bytes) -> None:
+        """Writes a file atomically, so concurrent readers never see a partial
+        file."""
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as f:
+            f.write(data)
+        os.replace(f.name, path)
+
+    def _read_entry(self, key: str) -> dict:
+        entry_path = self.cache_dir / "entries" / f"{key}.json"
+        if not entry_path.exists():
+            return None
+        with open(entry_path) as f:
+            return json.load(f)
+
+    def _write_entry(self, key: str, entry: dict) -> None:
+        entry_path = self.cache_dir / "entries" / f"{key}.json"
+        self._write(entry_path, json.dumps(entry).encode())
+
+    def _body_path(self, content_hash: str) -> PosixPath:
+        return self.cache_dir / "bodies" / f"{content_hash}.gz"
+
+    def _read_body(self, entry: dict) -> str:
+        with gzip.open(self._body_path(entry["content_hash"])) as f:
+            return f.read().decode(entry["encoding"], errors="replace")
+
+    def _write_body(self, content: bytes) -> str:
+        content_hash = hashlib.sha256(content).hexdigest()
+        body_path = self._body_path(content_hash)
+        if not body_path.exists():
+            self._write(body_path, gzip.compress(content))
+        return content_hash
+
+    def _cached_response(self, entry: dict) -> CachedResponse:
+        return CachedResponse(
+            url=entry["url"],
+            status_code=entry["status_code"],
+            text=self._read_body(entry),
+            headers=entry["headers"],
+            from_cache=True,
+        )
+
+    def lookup(
+        self, url: str, source: str = None, headers: dict = header
+    ) -> Union[CachedResponse, None]:
+        """Finds a response that can be served without a request: a fresh
+        response or, in offline mode, any cached response.
+
+        Args:
+            url (str): The url to request.
+            source (str, optional): The data source (e.g., 'stats'), which sets
+                the ttl of the response. Defaults to None.
+            headers (dict, optional): Request headers. Defaults to the pipeline
+                header.
+
+        Raises:
+            CacheMissError: If the request is not in the cache in offline mode.
+
+        Returns:
+            Union[CachedResponse, None]: The cached response, or None if the
+            request must be sent.
+        """
+        entry = self._read_entry(self.create_key(url, headers))
+        if self.offline:
+            if entry is None:
+                raise CacheMissError(f"{url} is not in the cache")
+            return self._cached_response(entry)
+        if entry is not None and time.time() - entry["validated_at"] < self._ttl(
+            source
+        ):
+            return self._cached_response(entry)
+        return None
+
+    def fetch(
+        self,
+        url: str,
+        source: str = None,
+        headers: dict = header,
+        session: requests.Session = None,
+    ) -> CachedResponse:
+        """Sends a GET request through the cache.
+
+        Args:
+            url (str): The url to request.
+            source (str, optional): The data source (e.g., 'stats'), which sets
+                the ttl of the response. Defaults to None.
+            headers (dict, optional): Request headers. Defaults to the pipeline
+                header.
+            session (requests.Session, optional): Session used to send the
+                request. Defaults to None.
+
+        Raises:
+            CacheMissError: If the request is not in the cache in offline mode.
+
+        Returns:
+            CachedResponse: The response.
+        """
+        cached_response = self.lookup(url, source=source, headers=headers)
+        if cached_response is not None:
+            return cached_response
+        key = self.create_key(url, headers)
+        entry = self._read_entry(key)
+        request_headers = dict(headers or dict())
+        if entry is not None and entry["headers"].get("ETag"):
+            request_headers["If-None-Match"] = entry["headers"]["ETag"]
+        if entry is not None and entry["headers"].get("Last-Modified"):
+            request_headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        response = (session or requests).get(
+            url, headers=request_headers, timeout=self.timeout
+        )
+        if response.status_code == 304 and entry is not None:
+            logger.debug(f"{url} is unchanged")
+            entry["validated_at"] = time.time()
+            self._write_entry(key, entry)
+            return self._cached_response(entry)
+        if response.status_code in self.cached_status_codes:
+            entry = {
+                "url": url,
+                "status_code": response.status_code,
+                "headers": {
+                    name: response.headers[name]
+                    for name in ["ETag", "Last-Modified", "Content-Type"]
+                    if name in response.headers
+                },
+                "encoding": response.encoding or "utf-8",
+                "content_hash": self._write_body(response.content),
+                "validated_at": time.time(),
+            }
+            self._write_entry(key, entry)
+        return CachedResponse(
+            url=url,
+            status_code=response.status_code,
+            text=response.text,
+            headers=dict(response.headers),
+            from_cache=False,
+        )
+
+    def get(self, url: str, source: str = None, headers: dict = header) -> str:
+        """Fetches a page through the cache.
+
+        Args:
+            url (str): The url of the page.
+            source (str, optional): The data source (e.g., 'stats'), which sets
+                the ttl of the page. Defaults to None.
+            headers (dict, optional): Request headers. Defaults to the pipeline
+                header.
+
+        Raises:
+            requests.HTTPError: If the response is an error.
+            CacheMissError: If the page is not in the cache in offline mode.
+
+        Returns:
+            str: The page.
+        """
+        response = self.fetch(url, source=source, headers=headers)
+        response.raise_for_status()
+        return response.text
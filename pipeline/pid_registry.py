@@ -0,0 +1,190 @@
+import json
+import sys
+from pathlib import Path, PosixPath
+from typing import List, Union
+
+import pandas as pd
+
+sys.path.append(str(Path.cwd()))
+from pipeline.pipeline_config import root_dir  # noqa: E402
+from pipeline.pipeline_logger import logger  # noqa: E402
+
+"""Persistent registry of player ids (pids). A player's pid never changes,
+so once it is known, a player's stats are collected with a single request
+rather than by probing each candidate pid. The registry is seeded from the
+pids in the bundled stats data and records each pid resolved by probing,
+along with the position of the successful candidate.
+"""
+
+default_registry_path = root_dir / "staging_datasets" / "pid_registry.json"
+default_datasets_dir = root_dir / "src" / "fantasyfootball" / "datasets" / "season"
+
+
+class PidRegistry:
+    """Name, team and position to pid registry, stored as a json file.
+
+    Args:
+        registry_path (PosixPath, optional): Path of the registry. Defaults to
+            staging_datasets/pid_registry.json.
+    """
+
+    def __init__(self, registry_path: PosixPath = default_registry_path):
+        self.registry_path = Path(registry_path)
+        self.entries = dict()
+        if self.registry_path.exists():
+            with open(self.registry_path) as f:
+                for entry in json.load(f):
+                    self._add(entry)
+
+    def _add(self, entry: dict) -> None:
+        key = (entry["name"], entry["team"], entry["position"], entry["pid"])
+        self.entries.setdefault(entry["name"], dict())[key] = entry
+
+    def __len__(self) -> int:
+        return sum(len(name_entries) for name_entries in self.entries.values())
+
+    @staticmethod
+    def read_bundled_pids(
+        datasets_dir: PosixPath = default_datasets_dir,
+    ) -> pd.DataFrame:
+        """Reads the name, team, position and pid of each player in the bundled
+        stats data, taking the position from the players data of the season.
+
+        Args:
+            datasets_dir (PosixPath, optional): Directory of the seasonal data.
+                Defaults to the fantasyfootball package datasets.
+
+        Returns:
+            pd.DataFrame: Unique name, team, position and pid rows.
+        """
+        pids_df = pd.DataFrame(columns=["name", "team", "position", "pid"])
+        for season_dir in sorted(Path(datasets_dir).glob("*")):
+            if not (season_dir / "stats.gz").exists():
+                continue
+            stats_df = pd.read_csv(
+                season_dir / "stats.gz", usecols=["pid", "name", "team"]
+            ).drop_duplicates()
+            players_df = pd.read_csv(
+                season_dir / "players.gz", usecols=["name", "team", "position"]
+            ).drop_duplicates(subset=["name", "team"])
+            season_pids_df = stats_df.merge(players_df, on=["name", "team"], how="left")
+            pids_df = pd.concat([pids_df, season_pids_df])
+        return (
+            pids_df.fillna({"position": ""})
+            .drop_duplicates(subset=["name", "team", "position", "pid"])
+            .reset_index(drop=True)
+        )
+
+    def seed(self, datasets_dir: PosixPath = default_datasets_dir) -> int:
+        """Adds the pids in the bundled stats data to the registry.
+
+        Args:
+            datasets_dir (PosixPath, optional): Directory of the seasonal data.
+                Defaults to the fantasyfootball package datasets.
+
+        Returns:
+            int: The number of entries added.
+        """
+        n_entries = len(self)
+        for row in self.read_bundled_pids(datasets_dir).itertuples(index=False):
+            self.record(row.name, row.team, row.position, row.pid, source="stats")
+        n_added = len(self) - n_entries
+        logger.info(f"Seeded pid registry with {n_added} players")
+        return n_added
+
+    def lookup(
+        self, name: str, team: str = None, position: str = None
+    ) -> Union[str, None]:
+        """Finds the pid of a player. When the name matches several pids,
+        the player's team and then position are used to tell them apart.
+
+        Args:
+            name (str): The name of the player.
+            team (str, optional): The 3 letter abbreviation of the player's team.
+            position (str, optional): The player's position.
+
+        Returns:
+            Union[str, None]: The pid, or None if the player is unknown or
+            cannot be told apart from another player with the same name.
+        """
+        name_entries = list(self.entries.get(name, dict()).values())
+        player = {"team": team, "position": position}
+        for match_fields in [("team", "position"), ("team",), ("position",), ()]:
+            pids = {
+                entry["pid"]
+                for entry in name_entries
+                if all(entry[field] == player[field] for field in match_fields)
+            }
+            if len(pids) == 1:
+                return pids.pop()
+        return None
+
+    def record(
+        self,
+        name: str,
+        team: str,
+        position: str,
+        pid: str,
+        source: str = "probe",
+        probe_index: int = None,
+    ) -> None:
+        """Adds a player to the registry.
+
+        Args:
+            name (str): The name of the player.
+            team (str): The 3 letter abbreviation of the player's team.
+            position (str): The player's position.
+            pid (str): The player's id.
+            source (str, optional): How the pid was found ('stats' or 'probe').
+                Defaults to "probe".
+            probe_index (int, optional): Position of the pid in the order the
+                candidates were probed, which is the ranked order of the
+                `PlayerIdRanker` when one is used, and otherwise the order of
+                `create_player_id`. Defaults to None.
+        """
+        self._add(
+            {
+                "name": name,
+                "team": team,
+                "position": position or "",
+                "pid": pid,
+                "source": source,
+                "probe_index": probe_index,
+            }
+        )
+
+    def list_entries(self) -> List[dict]:
+        return [
+            entry
+            for name_entries in self.entries.values()
+            for entry in name_entries.values()
+        ]
+
+    def save(self) -> None:
+        """Writes the registry to disk."""
+        self.registry_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.registry_path.with_suffix(".tmp")
+        with open(temp_path, "w") as f:
+            json.dump(self.list_entries(), f, indent=1)
+        temp_path.replace(self.registry_path)
+
+
+def load_pid_registry(
+    registry_path: PosixPath = default_registry_path,
+    datasets_dir: PosixPath = default_datasets_dir,
+) -> PidRegistry:
+    """Loads the pid registry, seeding it from the bundled stats data the
+    first time.
+
+    Args:
+        registry_path (PosixPath, optional): Path of the registry.
+        datasets_dir (PosixPath, optional): Directory of the seasonal data.
+
+    Returns:
+        PidRegistry: The pid registry.
+    """
+    pid_registry = PidRegistry(registry_path)
+    if not len(pid_registry):
+        pid_registry.seed(datasets_dir)
+        pid_registry.save()
+    return pid_registry
@@ -13,6 +13,22 @@ stats_url = "https://www.pro-football-reference.com"
 betting_url = "https://sportsdata.usatoday.com/football/nfl/odds"
 injury_url = "https://www.footballdb.com/transactions/injuries.html"
 draft_url = "https://fantasyfootballcalculator.com/adp/standard/12-team/all/"
+# (requests per second, burst) by host, used by pipeline.scraper.AsyncScraper
+rate_limits = {"www.pro-football-reference.com": (1 / 3, 1)}
+# on-disk response cache used by pipeline.http_cache.HttpCache
+cache_dir = root_dir / "staging_datasets" / "http_cache"
+# seconds a cached response stays fresh, by data source
+cache_ttls = {
+    "stats": 12 * 60 * 60,
+    "calendar": 7 * 24 * 60 * 60,
+    "players": 24 * 60 * 60,
+    "betting": 15 * 60,
+    "salary": 60 * 60,
+    "injury": 60 * 60,
+    "draft": 24 * 60 * 60,
+    "historical_draft": 30 * 24 * 60 * 60,
+    "default": 60 * 60,
+}
 data_sources = {
     "calendar": {
         "keys": ["team", "season_year"],
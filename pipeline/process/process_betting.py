@@ -13,6 +13,7 @@ sys.path.append(str(Path.cwd()))
 from pipeline.pipeline_logger import logger  # noqa: E402
 from pipeline.pipeline_config import root_dir  # noqa E402
 from pipeline.utils import (  # noqa: E402
+    create_calendar,
     get_module_purpose,
     fetch_current_week,
     read_args,
@@ -111,7 +112,8 @@ if __name__ == "__main__":
         / "calendar"
         / "calendar.csv"
     )
-    current_week = fetch_current_week(calendar_df)
+    calendar = create_calendar(calendar_df)
+    current_week = fetch_current_week(calendar)
     raw_data_dir = Path(
         root_dir
         / "staging_datasets"
@@ -0,0 +1,205 @@
+import asyncio
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+from urllib.parse import urlparse
+
+import requests
+
+sys.path.append(str(Path.cwd()))
+from pipeline.http_cache import HttpCache  # noqa: E402
+from pipeline.pipeline_config import header  # noqa: E402
+from pipeline.pipeline_logger import logger  # noqa: E402
+
+"""Asynchronous scraping engine shared by the collect modules. Requests
+are rate limited per host with a token bucket, the number of requests in
+flight is bounded, and responses that indicate the server is overloaded
+(e.g., HTTP 429: Too Many Requests) are retried with exponential backoff
+and jitter.
+"""
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class TooManyRequestsError(Exception):
+    """Raised when a request is still rejected after all retries."""
+
+
+class TokenBucket:
+    """Token bucket rate limiter. Tokens are added at `rate` per second, up to
+    `capacity`, and each request takes one token.
+
+    Args:
+        rate (float): Requests per second.
+        capacity (int, optional): Maximum burst of requests. Defaults to 1.
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = None
+
+    async def acquire(self) -> None:
+        """Waits until a token is available and takes it."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncScraper:
+    """Fetches pages concurrently, with a token bucket rate limit per host.
+
+    Requests are sent with `requests` from a thread pool, so at most
+    `max_concurrency` requests are in flight at a time.
+
+    Args:
+        rate_limits (Dict[str, Tuple[float, int]], optional): (requests per
+            second, burst) by host, e.g. {"www.pro-football-reference.com":
+            (1 / 3, 1)}. Defaults to None.
+        default_rate_limit (Tuple[float, int], optional): (requests per second,
+            burst) for hosts not in `rate_limits`. Defaults to (5, 5).
+        max_concurrency (int, optional): Maximum number of requests in flight.
+            Defaults to 8.
+        max_retries (int, optional): Number of retries of a rejected request.
+            Defaults to 5.
+        backoff_base (float, optional): Delay, in seconds, before the first
+            retry. The delay doubles with each retry. Defaults to 1.
+        backoff_max (float, optional): Maximum delay, in seconds, between
+            retries. Defaults to 60.
+        timeout (float, optional): Request timeout in seconds. Defaults to 30.
+        headers (dict, optional): Request headers. Defaults to the pipeline header.
+        http_cache (HttpCache, optional): Cache of responses. Pages served from
+            the cache are not rate limited. Defaults to None.
+        source (str, optional): The data source (e.g., 'stats'), which sets the
+            ttl of cached pages. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        rate_limits: Dict[str, Tuple[float, int]] = None,
+        default_rate_limit: Tuple[float, int] = (5, 5),
+        max_concurrency: int = 8,
+        max_retries: int = 5,
+        backoff_base: float = 1,
+        backoff_max: float = 60,
+        timeout: float = 30,
+        headers: dict = header,
+        http_cache: HttpCache = None,
+        source: str = None,
+    ):
+        self.rate_limits = rate_limits or dict()
+        self.default_rate_limit = default_rate_limit
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.headers = headers
+        self.http_cache = http_cache
+        self.source = source
+        self._buckets = dict()
+        self._semaphore = None
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self._local = threading.local()
+
+    def _bucket(self, host: str) -> TokenBucket:
+        if host not in self._buckets:
+            rate, capacity = self.rate_limits.get(host, self.default_rate_limit)
+            self._buckets[host] = TokenBucket(rate, capacity)
+        return self._buckets[host]
+
+    def _get(self, url: str) -> requests.Response:
+        # one session per thread, so connections are reused across requests
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        if self.http_cache is not None:
+            return self.http_cache.fetch(
+                url, source=self.source, headers=self.headers, session=session
+            )
+        return session.get(url, headers=self.headers, timeout=self.timeout)
+
+    def _backoff_delay(self, attempt: int, response: requests.Response) -> float:
+        """Exponential backoff with full jitter, waiting at least as long as
+        the server's Retry-After header when one is sent."""
+        delay = random.uniform(
+            0, min(self.backoff_max, self.backoff_base * 2**attempt)
+        )
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            delay = max(delay, min(self.backoff_max, float(retry_after)))
+        return delay
+
+    async def fetch(self, url: str) -> Union[str, None]:
+        """Fetches a page.
+
+        Args:
+            url (str): The url of the page.
+
+        Raises:
+            TooManyRequestsError: If the request is still rejected after
+                `max_retries` retries.
+            CacheMissError: If the page is not in the cache in offline mode,
+                so a missing page is not mistaken for one that does not exist.
+
+        Returns:
+            Union[str, None]: The page, or None if it does not exist or the
+            request failed.
+        """
+        if self.http_cache is not None:
+            cached_response = self.http_cache.lookup(
+                url, source=self.source, headers=self.headers
+            )
+            if cached_response is not None:
+                return cached_response.text if cached_response.ok else None
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        loop = asyncio.get_running_loop()
+        bucket = self._bucket(urlparse(url).netloc)
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            async with self._semaphore:
+                try:
+                    response = await loop.run_in_executor(
+                        self._executor, self._get, url
+                    )
+                except requests.RequestException as error:
+                    logger.warning(f"Request to {url} failed: {error}")
+                    return None
+            if response.status_code not in RETRY_STATUS_CODES:
+                return response.text if response.ok else None
+            if attempt == self.max_retries:
+                break
+            delay = self._backoff_delay(attempt, response)
+            logger.warning(
+                f"HTTP Error {response.status_code} for {url}. "
+                f"Retrying in {delay:.1f} seconds"
+            )
+            await asyncio.sleep(delay)
+        raise TooManyRequestsError(
+            f"HTTP Error {response.status_code} for {url} "
+            f"after {self.max_retries} retries"
+        )
+
+    async def fetch_all(self, urls: List[str]) -> List[Union[str, None]]:
+        """Fetches pages concurrently, in the order of `urls`."""
+        return await asyncio.gather(*[self.fetch(url) for url in urls])
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
@@ -1,12 +1,15 @@
 import argparse
 from pathlib import Path, PosixPath
 from datetime import datetime, timedelta
-from typing import List, Tuple, Union
+from typing import TYPE_CHECKING, List, Tuple, Union
 
 import pandas as pd
 import pandas_flavor as pf
 from fuzzywuzzy import fuzz
 
+if TYPE_CHECKING:
+    from fantasyfootball.data import Calendar
+
 TEAM_ABBREVIATION_MAPPING = {
     ("Arizona", "Arizona Cardinals", "Cardinals"): "ARI",
     ("Atlanta", "Atlanta Falcons", "Falcons"): "ATL",
@@ -69,6 +72,11 @@ def read_args() -> argparse.Namespace:
     parser.add_argument(
         "--is_historical", type=bool, help="If the data is historical or future looking"
     )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Replay responses from the HTTP cache, without network requests",
+    )
     args = parser.parse_args()
     return args
 
@@ -330,9 +338,20 @@ def read_ff_csv(dir_path: PosixPath) -> pd.DataFrame:
         return df
 
 
+def create_calendar(calendar_df: pd.DataFrame) -> "Calendar":
+    """Builds the calendar index of a season from the calendar dataframe. Build
+    it once per run and pass it to each calendar lookup (e.g.,
+    `fetch_current_week`). fantasyfootball is imported here rather than at the
+    top of the module, so the pipeline modules import without it."""
+    from fantasyfootball.data import Calendar
+
+    return Calendar(calendar_df)
+
+
 # TO DO: create logic to handle if function is called outside of the season
-def fetch_current_week(calendar_df: pd.DataFrame) -> str:
-    """Fetches the current week from the calendar dataframe."""
+def fetch_current_week(calendar: "Calendar") -> str:
+    """Fetches the current week from the calendar index built by
+    `create_calendar`."""
     # first determine which day of the week it is
     todays_date = datetime.today()
     todays_day_of_week = todays_date.strftime("%A")
@@ -348,8 +367,8 @@ def fetch_current_week(calendar_df: pd.DataFrame) -> str:
         sunday_date = todays_date + timedelta(days=1)
     # convert to datetime string
     sunday_date = sunday_date.strftime("%Y-%m-%d")
-    # filter calendar to get the week
-    week = str(calendar_df.query("date == @sunday_date")["week"].values[0])
+    # look up the week in the calendar index
+    week = str(calendar.week_of(sunday_date))
     return week
 
 
@@ -1,11 +1,29 @@
+import hashlib
+import importlib.util
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from itertools import product
+from pathlib import Path, PosixPath
+from typing import List, Union
+
+import numpy as np
 import pandas as pd
 import pandas_flavor as pf
 
-from fantasyfootball.data import FantasyData
+from fantasyfootball.data import Calendar, FantasyData
 from fantasyfootball.config import root_dir, scoring
 from urllib.error import URLError
 
+logger = logging.getLogger("fantasybenchmarking")
+logger.setLevel(logging.INFO)
+
+default_benchmark_dir = (
+    root_dir.parents[1] / "examples" / "benchmarking_data" / "season"
+)
+default_benchmark_cache_dir = Path.home() / ".fantasyfootball" / "benchmarking"
+
 
 @pf.register_dataframe_method
 def filter_to_prior_week(
@@ -23,90 +41,367 @@ def filter_to_prior_week(
     Returns:
         pd.DataFrame: Historical data and features.
     """
-    calendar_df = pd.read_csv(
-        root_dir / "datasets" / "season" / str(season_year) / "calendar.gz"
-    )
-    prior_week_df = calendar_df[calendar_df["week"] == week_number]
-    max_date_week = max(prior_week_df["date"])
+    max_date_week = Calendar.from_season(season_year).max_date(week_number)
     prior_week_df = df[df["date"] <= max_date_week]
     return prior_week_df
 
 
 @pf.register_dataframe_method
 def score_benchmark_data(
-    benchmark_df: pd.DataFrame, scoring_source: str
+    benchmark_df: pd.DataFrame, scoring_source: Union[str, List[str]]
 ) -> pd.DataFrame:
     """Add point projection based on predictions from:
     https://fantasydata.com/nfl/fantasy-football-weekly-projections
     for use in benchmarking.
 
+    All players are scored in one vectorized pass per scoring source.
+
     Args:
         benchmark_df (pd.DataFrame): Weekly player predictions from fantasydata.com.
-        scoring_source (str): Name of the scoring system to apply (e.g., 'yahoo').
+        scoring_source (Union[str, List[str]]): Name of the scoring system(s) to
+            apply (e.g., 'yahoo' or ['yahoo', 'draft kings']).
+
+    Raises:
+        KeyError: If a scoring source is not found.
 
     Returns:
         pd.DataFrame: Weekly player predictions from
-            fantasydata converted to scoring system.
+            fantasydata converted to scoring system, with one
+            'ff_pts_<scoring_source>_fantasydata_pred' column per scoring source.
 
     """
+    if isinstance(scoring_source, str):
+        scoring_source = [scoring_source]
     score_player = FantasyData.score_player
-    # map different name spellings between
-    scoring_source_rules = scoring.get(scoring_source)
-    # score all players for that week
-    scoring_columns = set(scoring_source_rules["scoring_columns"].keys()) & set(
-        benchmark_df.columns
-    )
-    weekly_benchmark_preds = pd.DataFrame()
-    for row in (
-        benchmark_df[["name", "team", "position", "season_year"]]
-        .drop_duplicates()
-        .itertuples(index=False)
-    ):
-        player_df = benchmark_df[
-            (benchmark_df["name"] == row.name)
-            & (benchmark_df["team"] == row.team)
-            & (benchmark_df["position"] == row.position)
-            & (benchmark_df["season_year"] == row.season_year)
-        ]
-        player_weekly_points = score_player(
-            player_df, scoring_columns, scoring_source_rules
+    benchmark_preds = dict()
+    for source in scoring_source:
+        if source not in scoring:
+            raise KeyError(f"Scoring source '{source}' not found")
+        scoring_source_rules = scoring[source]
+        scoring_columns = set(scoring_source_rules["scoring_columns"].keys()) & set(
+            benchmark_df.columns
         )
-        player_df = player_df.assign(
-            **{f"ff_pts_{scoring_source}_fantasydata_pred": player_weekly_points}
+        benchmark_preds[f"ff_pts_{source}_fantasydata_pred"] = score_player(
+            benchmark_df, scoring_columns, scoring_source_rules
         )
-        player_df = player_df[
-            [
-                "name",
-                "team",
-                "position",
-                "season_year",
-                "week",
-                player_df.columns.tolist()[-1],
-            ]
-        ]
-        weekly_benchmark_preds = pd.concat([weekly_benchmark_preds, player_df])
-    return weekly_benchmark_preds
+    key_columns = ["name", "team", "position", "season_year", "week"]
+    return benchmark_df[key_columns].assign(**benchmark_preds)
 
 
-def get_benchmarking_data(
-    season_year_start: int,
-    season_year_end: int,
-    base_url: str = "https://raw.githubusercontent.com/thecodeforest/fantasyfootball/main/examples/benchmarking_data/season/",  # noqa: E501
+def _read_benchmark_week(
+    year: int, week: int, data_dir: Path, base_url: str, allow_download: bool
 ) -> pd.DataFrame:
-    if season_year_start < 2018 or season_year_end > 2021:
-        raise ValueError("Season year must be between 2018 and 2021.")
-    all_benchmark_df = pd.DataFrame()
-    for week, year in product(
-        range(1, 18), range(season_year_start, season_year_end + 1)
-    ):
+    """Reads a single week of benchmark data, locally if present."""
+    benchmark_path = data_dir / str(year) / f"wk{week}.csv"
+    if benchmark_path.exists():
+        benchmark_df = pd.read_csv(benchmark_path)
+    elif allow_download:
         benchmark_url = f"{base_url}/{year}/wk{week}.csv"
         try:
             benchmark_df = pd.read_csv(benchmark_url)
-            benchmark_df["season_year"] = year
-            all_benchmark_df = pd.concat([all_benchmark_df, benchmark_df])
-            return all_benchmark_df
         except URLError:
             raise URLError(
                 f"Could not find {benchmark_url}"
                 "Check if internet connection is working."
             )
+    else:
+        raise FileNotFoundError(
+            f"{benchmark_path} not found. Pass a `data_dir` holding the "
+            "examples/benchmarking_data/season directory of the fantasyfootball "
+            f"repository, or set `allow_download=True` to download it from {base_url}"
+        )
+    return benchmark_df.assign(season_year=year)
+
+
+def _benchmark_cache_path(
+    cache_dir: Path,
+    season_year_start: int,
+    season_year_end: int,
+    data_dir: Path,
+    local_paths: List[Path],
+) -> Path:
+    """Path of the consolidated cache of a season range. The name includes a
+    hash of the resolved data directory and one of the size and modification
+    time of each file, so a different directory or a changed file is never
+    served from the cache."""
+    dir_key = hashlib.sha256(str(data_dir.resolve()).encode()).hexdigest()[:12]
+    file_signatures = [
+        [path.name, path.stat().st_size, path.stat().st_mtime_ns]
+        for path in local_paths
+    ]
+    files_key = hashlib.sha256(json.dumps(file_signatures).encode()).hexdigest()
+    return Path(cache_dir) / (
+        f"benchmark_{season_year_start}_{season_year_end}_{dir_key}_"
+        f"{files_key[:12]}.parquet"
+    )
+
+
+def get_benchmarking_data(
+    season_year_start: int,
+    season_year_end: int,
+    data_dir: PosixPath = default_benchmark_dir,
+    cache_dir: PosixPath = default_benchmark_cache_dir,
+    allow_download: bool = False,
+    max_workers: int = 8,
+    base_url: str = "https://raw.githubusercontent.com/thecodeforest/fantasyfootball/main/examples/benchmarking_data/season/",  # noqa: E501
+) -> pd.DataFrame:
+    """Loads weekly player projections from fantasydata.com for benchmarking.
+
+    Each season and week is read from `data_dir`, with the files read
+    concurrently and concatenated once. The consolidated data is cached as a
+    parquet file (when pyarrow is installed) in `cache_dir` and reused until
+    a file in `data_dir` changes. The cache is keyed by `data_dir`, so
+    directories with the same seasons do not share a cache.
+
+    Args:
+        season_year_start (int): The first year of the season.
+        season_year_end (int): The last year of the season.
+        data_dir (PosixPath, optional): Directory holding <year>/wk<week>.csv
+            files. Defaults to the examples/benchmarking_data/season directory
+            of the repository, which is not part of an installed package.
+        cache_dir (PosixPath, optional): Directory of the consolidated cache,
+            or None to disable caching. Defaults to
+            ~/.fantasyfootball/benchmarking.
+        allow_download (bool, optional): Download files missing from
+            `data_dir` from `base_url`, e.g. when the package is installed
+            rather than run from the repository. Defaults to False.
+        max_workers (int, optional): Number of threads reading files.
+            Defaults to 8.
+        base_url (str, optional): URL of the season directories used when
+            downloading.
+
+    Raises:
+        ValueError: If the season years are outside of 2018 to 2021.
+        FileNotFoundError: If `data_dir` or a file is missing and
+            `allow_download` is False.
+        URLError: If a file cannot be downloaded.
+
+    Returns:
+        pd.DataFrame: Weekly player projections for the season year range.
+    """
+    if season_year_start < 2018 or season_year_end > 2021:
+        raise ValueError("Season year must be between 2018 and 2021.")
+    data_dir = Path(data_dir)
+    if not data_dir.exists() and not allow_download:
+        raise FileNotFoundError(
+            f"{data_dir} not found. Pass a `data_dir` holding the "
+            "examples/benchmarking_data/season directory of the fantasyfootball "
+            f"repository, or set `allow_download=True` to download it from {base_url}"
+        )
+    season_weeks = list(
+        product(range(season_year_start, season_year_end + 1), range(1, 18))
+    )
+    local_paths = [
+        data_dir / str(year) / f"wk{week}.csv" for year, week in season_weeks
+    ]
+    cache_path = None
+    is_complete = all(path.exists() for path in local_paths)
+    has_pyarrow = importlib.util.find_spec("pyarrow") is not None
+    # only local files are cached, as downloaded files have no modification time
+    if cache_dir is not None and has_pyarrow and is_complete:
+        cache_path = _benchmark_cache_path(
+            cache_dir, season_year_start, season_year_end, data_dir, local_paths
+        )
+        if cache_path.exists():
+            logger.info(f"Loading benchmarking data from {cache_path}")
+            return pd.read_parquet(cache_path)
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        benchmark_dfs = list(
+            pool.map(
+                lambda season_week: _read_benchmark_week(
+                    *season_week, data_dir, base_url, allow_download
+                ),
+                season_weeks,
+            )
+        )
+    all_benchmark_df = pd.concat(benchmark_dfs, ignore_index=True)
+    logger.info(
+        f"Read {len(benchmark_dfs)} weeks of benchmarking data in "
+        f"{time.perf_counter() - start_time:.2f} seconds"
+    )
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # remove caches of earlier versions of the files in data_dir
+        stale_prefix = cache_path.name.rsplit("_", 1)[0]
+        for stale_path in cache_path.parent.glob(f"{stale_prefix}_*.parquet"):
+            stale_path.unlink()
+        all_benchmark_df.to_parquet(cache_path, index=False)
+    return all_benchmark_df
+
+
+def _grouped_error_metrics(
+    codes: np.ndarray, n_groups: int, y: np.ndarray, y_pred: np.ndarray
+) -> dict:
+    """MAE, RMSE and bias of each group code, from one bincount per metric."""
+    n_obs = np.bincount(codes, minlength=n_groups)
+    error = y_pred - y
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "mae": np.bincount(codes, np.abs(error), n_groups) / n_obs,
+            "rmse": np.sqrt(np.bincount(codes, error**2, n_groups) / n_obs),
+            "bias": np.bincount(codes, error, n_groups) / n_obs,
+        }
+
+
+def _grouped_rank_metrics(
+    codes: np.ndarray, n_groups: int, y: np.ndarray, y_pred: np.ndarray, k: int
+) -> dict:
+    """Spearman rank correlation and top-k hit rate of each group code."""
+    groups = pd.Series(codes)
+    y_rank = pd.Series(y).groupby(groups).rank().to_numpy()
+    pred_rank = pd.Series(y_pred).groupby(groups).rank().to_numpy()
+    n_obs = np.bincount(codes, minlength=n_groups)
+
+    def group_sum(values: np.ndarray) -> np.ndarray:
+        return np.bincount(codes, values, n_groups)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = group_sum(y_rank * pred_rank) - (
+            group_sum(y_rank) * group_sum(pred_rank) / n_obs
+        )
+        y_variance = group_sum(y_rank**2) - group_sum(y_rank) ** 2 / n_obs
+        pred_variance = group_sum(pred_rank**2) - group_sum(pred_rank) ** 2 / n_obs
+        rank_corr = covariance / np.sqrt(y_variance * pred_variance)
+        # ties are broken by order of appearance for the top k
+        is_y_top = pd.Series(-y).groupby(groups).rank(method="first").to_numpy() <= k
+        is_pred_top = (
+            pd.Series(-y_pred).groupby(groups).rank(method="first").to_numpy() <= k
+        )
+        top_k_hit_rate = group_sum(is_y_top & is_pred_top) / np.minimum(n_obs, k)
+    return {"rank_corr": rank_corr, "top_k_hit_rate": top_k_hit_rate}
+
+
+def _bootstrap_error_metrics(
+    codes: np.ndarray,
+    n_groups: int,
+    y: np.ndarray,
+    y_pred: np.ndarray,
+    n_bootstrap: int,
+    confidence: float,
+    rng: np.random.Generator,
+) -> dict:
+    """Bootstrap confidence intervals of the error metrics of each group code.
+
+    Every replicate resamples rows with replacement within each group. The
+    resampling indices for all replicates are drawn as a single
+    (n_bootstrap, n_rows) array and scored with one bincount per metric.
+    """
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    n_obs = np.bincount(codes, minlength=n_groups)
+    group_start = np.concatenate([[0], np.cumsum(n_obs)[:-1]])
+    n_rows = len(codes)
+    draws = rng.random((n_bootstrap, n_rows))
+    sample = order[
+        group_start[sorted_codes] + (draws * n_obs[sorted_codes]).astype(int)
+    ]
+    replicate_codes = (
+        np.arange(n_bootstrap)[:, None] * n_groups + sorted_codes[None, :]
+    ).ravel()
+    replicate_metrics = _grouped_error_metrics(
+        replicate_codes,
+        n_bootstrap * n_groups,
+        y[sample].ravel(),
+        y_pred[sample].ravel(),
+    )
+    alpha = (1 - confidence) / 2
+    intervals = dict()
+    for metric, values in replicate_metrics.items():
+        values = values.reshape(n_bootstrap, n_groups)
+        intervals[f"{metric}_lower"] = np.quantile(values, alpha, axis=0)
+        intervals[f"{metric}_upper"] = np.quantile(values, 1 - alpha, axis=0)
+    return intervals
+
+
+def evaluate(
+    predictions_df: pd.DataFrame,
+    benchmark_df: pd.DataFrame,
+    y: str,
+    y_pred: str,
+    benchmark_pred: str = None,
+    by: List[str] = ["season_year", "week", "position"],
+    keys: List[str] = ["name", "team", "season_year", "week"],
+    k: int = 12,
+    n_bootstrap: int = 0,
+    confidence: float = 0.95,
+    random_state: int = None,
+) -> pd.DataFrame:
+    """Compares model predictions and fantasydata.com benchmark predictions
+    with actual points for each group of players.
+
+    The predictions and benchmark are joined once on `keys`, keeping players
+    with both predictions, and every metric is computed for all groups at once.
+
+    Args:
+        predictions_df (pd.DataFrame): Actual points and model predictions.
+        benchmark_df (pd.DataFrame): Output of `score_benchmark_data`.
+        y (str): Name of the actual points column in predictions_df.
+        y_pred (str): Name of the model predictions column in predictions_df.
+        benchmark_pred (str, optional): Name of the benchmark predictions
+            column. Defaults to the only '_fantasydata_pred' column.
+        by (List[str], optional): Columns defining each group. Defaults to
+            ["season_year", "week", "position"].
+        keys (List[str], optional): Columns to join on. Defaults to
+            ["name", "team", "season_year", "week"].
+        k (int, optional): Number of top players used for the top-k hit rate,
+            the share of the k highest scoring players that are also among
+            the k highest predictions. Defaults to 12.
+        n_bootstrap (int, optional): Number of bootstrap replicates for the
+            confidence intervals of MAE, RMSE and bias. Defaults to 0 (none).
+        confidence (float, optional): Confidence level of the intervals.
+            Defaults to 0.95.
+        random_state (int, optional): Seed of the bootstrap. Defaults to None.
+
+    Raises:
+        ValueError: If the benchmark predictions column is ambiguous or missing.
+
+    Returns:
+        pd.DataFrame: One row per group and source ('model' or 'benchmark')
+        with n_obs, mae, rmse, bias, rank_corr and top_k_hit_rate, plus
+        <metric>_lower and <metric>_upper when n_bootstrap > 0.
+    """
+    if benchmark_pred is None:
+        benchmark_preds = [
+            col for col in benchmark_df.columns if col.endswith("_fantasydata_pred")
+        ]
+        if len(benchmark_preds) != 1:
+            raise ValueError(
+                f"Specify `benchmark_pred`, one of {benchmark_preds}"
+                if benchmark_preds
+                else "No '_fantasydata_pred' column found in benchmark_df"
+            )
+        benchmark_pred = benchmark_preds[0]
+    benchmark_columns = [
+        col
+        for col in dict.fromkeys(keys + by + [benchmark_pred])
+        if col in keys or col not in predictions_df.columns
+    ]
+    eval_df = pd.merge(
+        predictions_df, benchmark_df[benchmark_columns], on=keys, how="inner"
+    ).dropna(subset=[y, y_pred, benchmark_pred])
+    codes, groups = pd.factorize(pd.MultiIndex.from_frame(eval_df[by]), sort=True)
+    n_groups = len(groups)
+    actual = pd.to_numeric(eval_df[y]).to_numpy(dtype=float)
+    rng = np.random.default_rng(random_state)
+    metrics_dfs = list()
+    for source, pred_column in [("model", y_pred), ("benchmark", benchmark_pred)]:
+        pred = pd.to_numeric(eval_df[pred_column]).to_numpy(dtype=float)
+        metrics = {
+            "n_obs": np.bincount(codes, minlength=n_groups),
+            **_grouped_error_metrics(codes, n_groups, actual, pred),
+            **_grouped_rank_metrics(codes, n_groups, actual, pred, k),
+        }
+        if n_bootstrap:
+            metrics.update(
+                _bootstrap_error_metrics(
+                    codes, n_groups, actual, pred, n_bootstrap, confidence, rng
+                )
+            )
+        metrics_df = pd.DataFrame(metrics, index=groups).rename_axis(by)
+        metrics_dfs.append(metrics_df.reset_index().assign(source=source))
+    metrics_df = pd.concat(metrics_dfs, ignore_index=True)
+    first_columns = by + ["source"]
+    return metrics_df[
+        first_columns + [col for col in metrics_df if col not in first_columns]
+    ]
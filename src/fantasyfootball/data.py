@@ -1,8 +1,10 @@
 from __future__ import annotations  # noqa: F404
 
 import logging
+import time
+from functools import lru_cache
 from pathlib import PosixPath
-from typing import List
+from typing import List, Tuple
 from urllib.error import HTTPError
 
 import numpy as np
@@ -15,6 +17,342 @@ logger = logging.getLogger("fantasydata")
 logger.setLevel(logging.INFO)
 
 
+# the caches hold at most one entry per season, or per data source and season
+_n_seasons = max(
+    sum(1 for x in (root_dir / "datasets" / "season").glob("*") if x.name.isdigit()),
+    1,
+)
+
+
+@lru_cache(maxsize=len(data_sources) * _n_seasons)
+def _cached_season_csv(data_path: str, modified_time: float) -> pd.DataFrame:
+    """Reads a compressed season dataset. Results are cached by path and
+    modification time, so a dataset refreshed on disk is read again. The
+    cached frame is shared, so read it with `_read_season_csv` instead."""
+    start_time = time.perf_counter()
+    dataset_df = pd.read_csv(data_path, compression="gzip")
+    logger.debug(f"Read {data_path} in {time.perf_counter() - start_time:.3f} seconds")
+    return dataset_df
+
+
+def _read_season_csv(data_path: str, modified_time: float) -> pd.DataFrame:
+    """Reads a compressed season dataset through the cache, returning a copy
+    so that changes made by the caller do not reach the cached frame."""
+    return _cached_season_csv(data_path, modified_time).copy()
+
+
+@lru_cache(maxsize=_n_seasons)
+def _read_calendar(data_path: str, modified_time: float) -> Calendar:
+    """Builds the calendar index of a season. Cached like `_cached_season_csv`."""
+    return Calendar(_cached_season_csv(data_path, modified_time))
+
+
+class Calendar:
+    """Index of a season calendar, built once per season.
+
+    Answers the common calendar questions (which date ends a week, which week
+    contains a date, who a team plays in a week) with dict and array lookups
+    instead of filtering the calendar frame each time.
+
+    Args:
+        calendar_df (pd.DataFrame): Calendar with date, week, team, opp,
+            is_away and season_year columns.
+    """
+
+    def __init__(self, calendar_df: pd.DataFrame):
+        dates = calendar_df["date"].astype(str).to_numpy()
+        weeks = calendar_df["week"].to_numpy(dtype=np.int64)
+        self.season_year = int(calendar_df["season_year"].max())
+        self.dates, date_codes = np.unique(dates, return_inverse=True)
+        # dates are unique to a week, so each date maps to a single week
+        self.date_weeks = np.zeros(len(self.dates), dtype=np.int64)
+        self.date_weeks[date_codes] = weeks
+        self.weeks = np.unique(weeks)
+        self.date_to_week = dict(zip(self.dates.tolist(), self.date_weeks.tolist()))
+        self.week_to_dates = {
+            week: self.dates[self.date_weeks == week].tolist()
+            for week in self.weeks.tolist()
+        }
+        self.week_to_max_date = {
+            week: week_dates[-1] for week, week_dates in self.week_to_dates.items()
+        }
+        self.matchups = {
+            (team, week): (opp, int(is_away))
+            for team, week, opp, is_away in zip(
+                calendar_df["team"],
+                weeks.tolist(),
+                calendar_df["opp"],
+                calendar_df["is_away"],
+            )
+        }
+
+    @classmethod
+    def from_season(
+        cls,
+        season_year: int,
+        ff_data_dir: PosixPath = root_dir / "datasets" / "season",
+    ) -> Calendar:
+        """Returns the calendar index of a season. The index is built once and
+        shared until calendar.gz changes on disk.
+
+        Args:
+            season_year (int): Year of the season.
+            ff_data_dir (PosixPath, optional): Directory containing the seasonal
+                data. Defaults to the package datasets.
+
+        Returns:
+            Calendar: The season calendar index.
+        """
+        data_path = ff_data_dir / str(season_year) / "calendar.gz"
+        return _read_calendar(str(data_path), data_path.stat().st_mtime)
+
+    def max_date(self, week: int) -> str:
+        """Returns the last date of a week.
+
+        Raises:
+            KeyError: If the week is not in the calendar.
+        """
+        try:
+            return self.week_to_max_date[int(week)]
+        except KeyError:
+            raise KeyError(f"Week {week} is not in the {self.season_year} calendar")
+
+    def week_dates(self, week: int) -> List[str]:
+        """Returns the dates of a week, or an empty list if the week is not in the
+        calendar."""
+        return self.week_to_dates.get(int(week), [])
+
+    def week_of(self, date: str) -> int:
+        """Returns the week containing a date.
+
+        Raises:
+            KeyError: If the date is not in the calendar.
+        """
+        try:
+            return self.date_to_week[str(date)[:10]]
+        except KeyError:
+            raise KeyError(f"{date} is not in the {self.season_year} calendar")
+
+    def weeks_of(self, dates: pd.Series) -> np.ndarray:
+        """Returns the week of each date, or -1 for dates not in the calendar."""
+        dates = np.asarray(dates, dtype=str)
+        index = np.searchsorted(self.dates, dates).clip(max=len(self.dates) - 1)
+        return np.where(self.dates[index] == dates, self.date_weeks[index], -1)
+
+    def opponent(self, team: str, week: int) -> Tuple[str, int]:
+        """Returns a team's opponent in a week and whether the team is away.
+
+        Raises:
+            KeyError: If the team does not play in the week.
+        """
+        try:
+            return self.matchups[(team, int(week))]
+        except KeyError:
+            raise KeyError(f"{team} does not play in week {week} of {self.season_year}")
+
+
+class TeamWeekCube:
+    """Team x week x position x stat totals built once from player-level data.
+
+    Values are held in a dense NumPy array with index maps for each axis, so
+    team context and opponent-allowed features are looked up by position in
+    the array rather than recomputed with a groupby and merge on the player
+    frame. Teams that did not play in a week have missing values.
+
+    Args:
+        values (np.ndarray): Totals with shape (team, period, position, stat).
+        opponent (np.ndarray): Index of each team's opponent by period, or -1
+            when the team did not play, with shape (team, period).
+        teams (list): Team abbreviations, in team axis order.
+        periods (list): (season_year, week) pairs, in period axis order.
+        positions (list): Positions, in position axis order.
+        stats (list): Stat columns, in stat axis order.
+    """
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        opponent: np.ndarray,
+        teams: list,
+        periods: list,
+        positions: list,
+        stats: list,
+    ):
+        self.values = values
+        self.opponent = opponent
+        self.teams = list(teams)
+        self.periods = [tuple(period) for period in periods]
+        self.positions = list(positions)
+        self.stats = list(stats)
+        self.team_index = {team: i for i, team in enumerate(self.teams)}
+        self.period_index = {period: i for i, period in enumerate(self.periods)}
+        self.position_index = {position: i for i, position in enumerate(positions)}
+        self.stat_index = {stat: i for i, stat in enumerate(self.stats)}
+
+    @classmethod
+    def from_frame(
+        cls, df: pd.DataFrame, stat_columns: List[str], game_week_column: str = "week"
+    ) -> TeamWeekCube:
+        """Builds the cube from a player-level frame with team, opp, position,
+        season_year and week columns.
+
+        Args:
+            df (pd.DataFrame): Player-level data.
+            stat_columns (List[str]): Numeric columns to total.
+            game_week_column (str, optional): Indicates week of season.
+                Defaults to "week".
+
+        Returns:
+            TeamWeekCube: Totals for each team, week, position and stat.
+        """
+        team_codes, teams = pd.factorize(pd.concat([df["team"], df["opp"]]), sort=True)
+        n_rows = df.shape[0]
+        team_codes, opp_codes = team_codes[:n_rows], team_codes[n_rows:]
+        period_codes, periods = pd.factorize(
+            pd.MultiIndex.from_arrays([df["season_year"], df[game_week_column]]),
+            sort=True,
+        )
+        position_codes, positions = pd.factorize(df["position"], sort=True)
+        shape = (len(teams), len(periods), len(positions))
+        flat_index = np.ravel_multi_index(
+            (team_codes, period_codes, position_codes), shape
+        )
+        stat_values = df[stat_columns].to_numpy(dtype=float)
+        values = np.zeros((np.prod(shape), len(stat_columns)))
+        np.add.at(values, flat_index, np.nan_to_num(stat_values))
+        n_present = np.zeros_like(values)
+        np.add.at(n_present, flat_index, ~np.isnan(stat_values))
+        # totals without any recorded values (e.g., a bye or an unplayed week)
+        # are missing rather than zero
+        values[n_present == 0] = np.nan
+        values = values.reshape(shape + (len(stat_columns),))
+        opponent = np.full(shape[:2], -1)
+        opponent[team_codes, period_codes] = opp_codes
+        opponent[opp_codes, period_codes] = team_codes
+        return cls(values, opponent, teams, periods, positions, stat_columns)
+
+    def _stat_values(self, stat: str, position: str = None) -> np.ndarray:
+        """(team, period) totals of a stat for a position, or all positions."""
+        values = self.values[:, :, :, self.stat_index[stat]]
+        if position is None:
+            is_missing = np.isnan(values).all(axis=2)
+            return np.where(is_missing, np.nan, np.nansum(values, axis=2))
+        return values[:, :, self.position_index[position]]
+
+    def _allowed_values(self, stat: str, position: str = None) -> np.ndarray:
+        """(team, period) totals of a stat recorded by each team's opponent."""
+        values = self._stat_values(stat, position)
+        period = np.broadcast_to(np.arange(len(self.periods)), values.shape)
+        allowed = values[np.clip(self.opponent, 0, None), period]
+        allowed[self.opponent < 0] = np.nan
+        return allowed
+
+    def trailing_mean(
+        self, stat: str, window: int, position: str = None, allowed: bool = False
+    ) -> np.ndarray:
+        """Mean of a stat over each team's previous `window` games of the same
+        season, excluding the current week.
+
+        Args:
+            stat (str): Stat column.
+            window (int): Number of prior games.
+            position (str, optional): Position to total. Defaults to None,
+                which totals all positions.
+            allowed (bool, optional): Use the totals recorded against each team
+                (i.e., by its opponents) rather than by the team.
+                Defaults to False.
+
+        Returns:
+            np.ndarray: Trailing means with shape (team, period).
+        """
+        values = (
+            self._allowed_values(stat, position)
+            if allowed
+            else self._stat_values(stat, position)
+        )
+        is_played = ~np.isnan(values)
+        total = np.zeros((values.shape[0], values.shape[1] + 1))
+        total[:, 1:] = np.cumsum(np.where(is_played, values, 0), axis=1)
+        count = np.zeros_like(total)
+        count[:, 1:] = np.cumsum(is_played, axis=1)
+        season_years = np.array([season_year for season_year, _ in self.periods])
+        period = np.arange(len(self.periods))
+        is_season_start = np.ones(len(period), dtype=bool)
+        is_season_start[1:] = season_years[1:] != season_years[:-1]
+        season_start = np.maximum.accumulate(np.where(is_season_start, period, 0))
+        # period of each team's game `window` games back, skipping bye weeks
+        game_periods = np.argsort(~is_played, axis=1, kind="stable")
+        first_game = count[:, :-1].astype(int) - window
+        start = np.take_along_axis(game_periods, np.clip(first_game, 0, None), axis=1)
+        start = np.maximum(np.where(first_game > 0, start, 0), season_start)
+        n_obs = count[:, :-1] - np.take_along_axis(count, start, axis=1)
+        window_total = total[:, :-1] - np.take_along_axis(total, start, axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = window_total / n_obs
+        mean[n_obs == 0] = np.nan
+        return mean
+
+    def _locate(self, teams, season_years, weeks) -> tuple:
+        """Cube indices of (team, season_year, week) rows, or -1 if absent."""
+        team_index = pd.Series(self.team_index)
+        team_idx = team_index.reindex(np.asarray(teams)).fillna(-1).to_numpy(int)
+        periods = pd.Series(range(len(self.periods)), index=self.periods)
+        period_idx = (
+            periods.reindex(list(zip(season_years, weeks))).fillna(-1).to_numpy(int)
+        )
+        return team_idx, period_idx
+
+    def lookup(
+        self,
+        teams,
+        season_years,
+        weeks,
+        stat: str,
+        position: str = None,
+        allowed: bool = False,
+        window: int = None,
+    ) -> np.ndarray:
+        """Looks up a stat for each (team, season_year, week) row.
+
+        Args:
+            teams: Team abbreviations.
+            season_years: Season years.
+            weeks: Weeks.
+            stat (str): Stat column.
+            position (str, optional): Position to total. Defaults to None,
+                which totals all positions.
+            allowed (bool, optional): Use the totals recorded against each team.
+                Defaults to False.
+            window (int, optional): When provided, the trailing mean over the
+                previous `window` games is returned rather than the week's total.
+                Defaults to None.
+
+        Raises:
+            KeyError: If the stat or position is not in the cube.
+
+        Returns:
+            np.ndarray: One value per row, missing when the team or week is
+            not in the cube.
+        """
+        if stat not in self.stat_index:
+            raise KeyError(f"{stat} not in cube")
+        if position is not None and position not in self.position_index:
+            raise KeyError(f"{position} not in cube")
+        if window is None:
+            values = (
+                self._allowed_values(stat, position)
+                if allowed
+                else self._stat_values(stat, position)
+            )
+        else:
+            values = self.trailing_mean(stat, window, position, allowed)
+        team_idx, period_idx = self._locate(teams, season_years, weeks)
+        is_found = (team_idx >= 0) & (period_idx >= 0)
+        result = np.full(len(team_idx), np.nan)
+        result[is_found] = values[team_idx[is_found], period_idx[is_found]]
+        return result
+
+
 class FantasyData:
     """Loads historical fantasy football data.
 
@@ -29,6 +367,7 @@ class FantasyData:
         self._validate_season_year_range()
         # Set when FantasyData object is created.
         self.ff_data = None
+        self._team_week_cube = None
         self.load_data()
         self.scoring = scoring
 
@@ -107,9 +446,24 @@ class FantasyData:
                     raise
         return True
 
+    @staticmethod
+    def _read_season_source(ff_data_dir: PosixPath, data: str) -> pd.DataFrame:
+        """Reads a single data source for a season through a shared cache,
+        such that each source is read from disk at most once.
+
+        Args:
+            ff_data_dir (PosixPath): The directory containing the season data.
+            data (str): The name of the data source (e.g., 'calendar').
+
+        Returns:
+            pd.DataFrame: A copy of the cached data source.
+        """
+        data_path = ff_data_dir / f"{data}.gz"
+        return _read_season_csv(str(data_path), data_path.stat().st_mtime)
+
     @staticmethod
     def _load_data(
-        ff_data_dir: PosixPath, data_sources: dict, *exclude: str
+        ff_data_dir: PosixPath, data_sources: dict, *exclude: str, week: int = None
     ) -> pd.DataFrame:
         """Helper method to load all other data, excluding the
         season calendar and roster of active players for a season.
@@ -119,6 +473,8 @@ class FantasyData:
             data_sources (dict): A dictionary indicating the names of
                 the data sources used in the fantasyfootball package.
             exclude (str): The names of the files to exclude from the data load.
+            week (int, optional): When provided, only rows for this week are
+                loaded and merged. Defaults to None, which loads the full season.
 
         Raises:
             ValueError: If the exclude file name is a required file.
@@ -137,8 +493,11 @@ class FantasyData:
                 f"Cannot exclude required data: {required_data}. "
                 f"Please do not exclude required data and try again."
             )
-        calendar_df = pd.read_csv(ff_data_dir / "calendar.gz", compression="gzip")
-        players_df = pd.read_csv(ff_data_dir / "players.gz", compression="gzip")
+        read_season_source = FantasyData._read_season_source
+        calendar_df = read_season_source(ff_data_dir, "calendar")
+        if week is not None:
+            calendar_df = calendar_df[calendar_df["week"] == week]
+        players_df = read_season_source(ff_data_dir, "players")
         season_ff_df = pd.merge(
             calendar_df, players_df, how="inner", on=["team", "season_year"]
         )
@@ -147,7 +506,9 @@ class FantasyData:
             if data in exclude:
                 continue
             if data in supplementary_data:
-                dataset_df = pd.read_csv(ff_data_dir / f"{data}.gz", compression="gzip")
+                dataset_df = read_season_source(ff_data_dir, data)
+                if week is not None and "week" in dataset_df.columns:
+                    dataset_df = dataset_df[dataset_df["week"] == week]
                 keys = data_sources[data]["keys"]
                 if not set(keys).issubset(set(dataset_df.columns)):
                     raise ValueError(
@@ -172,33 +533,17 @@ class FantasyData:
             pd.DataFrame: If the most recent week is in season,
             the dataframe is filtered to the most recent week.
         """
-        data_path = root_dir / "datasets" / "season" / str(self.season_year_end)
-        calendar_df = pd.read_csv(data_path / "calendar.gz", compression="gzip")
-        stats_df = pd.read_csv(data_path / "stats.gz", compression="gzip")
-        # find most recent season in calendar
-        max_season_year_calendar = calendar_df["season_year"].max()
-        if self.season_year_end == max_season_year_calendar:
-            calendar_df = calendar_df[
-                calendar_df["season_year"] == self.season_year_end
-            ]
+        calendar = Calendar.from_season(self.season_year_end)
+        if self.season_year_end == calendar.season_year:
+            data_path = root_dir / "datasets" / "season" / str(self.season_year_end)
+            stats_df = self._read_season_source(data_path, "stats")
             # filter only to complete games this season
-            stats_df = stats_df.merge(
-                calendar_df, on=["date", "team", "opp", "is_away"]
-            )
+            stats_weeks = calendar.weeks_of(stats_df["date"])
+            stats_weeks = stats_weeks[stats_weeks >= 0]
             # take a count of number of observations for the most recent week
-            obs_most_recent_wk = (
-                stats_df["week"]
-                .value_counts()
-                .reset_index()
-                .sort_values("index")
-                .rename(columns={"index": "week", "week": "count"})
-                .tail(1)
-            )
-            if obs_most_recent_wk["count"].values[0] > 100:
-                most_recent_wk = obs_most_recent_wk["week"].values[0]
-                most_recent_wk_date = calendar_df[
-                    calendar_df["week"] == most_recent_wk
-                ]["date"].max()
+            most_recent_wk = stats_weeks.max()
+            if (stats_weeks == most_recent_wk).sum() > 100:
+                most_recent_wk_date = calendar.max_date(most_recent_wk)
                 # filter ff_df to be less than or equal to the most recent week date
                 df = df[df["date"] <= most_recent_wk_date]
                 return df
@@ -251,6 +596,7 @@ class FantasyData:
         # if most recent season is incomplete, filter to the most recent complete week
         ff_df = self._filter_to_most_recent_complete_week(ff_df)
         self.ff_data = ff_df
+        self._team_week_cube = None
 
     @staticmethod
     def _validate_scoring_source_rules(source_rules: dict, ff_df_columns: list) -> None:
@@ -360,34 +706,32 @@ class FantasyData:
     def score_player(
         player_df: pd.DataFrame, scoring_columns: set, scoring_source_rules: dict
     ) -> np.array:
-        """Calculates the total number of points scored for a single week
+        """Calculates the total number of points scored for each row.
+
+        Scoring is vectorized over the rows, so the frame can hold a single
+        player's weeks or every player at once.
 
         Args:
-            player_df (pd.DataFrame): Weekly stats for a single player for the season.
+            player_df (pd.DataFrame): Weekly stats for one or more players.
             scoring_columns (set): Columns to use for scoring
             scoring_source_rules (dict): Rules for scoring
 
         Returns:
-            np.array: The total number of points scored for a single week.
+            np.array: The total number of points scored for each row.
         """
-        player_weekly_points = [0] * player_df.shape[0]
+        player_weekly_points = np.zeros(player_df.shape[0])
+        multiplier = scoring_source_rules.get("multiplier") or dict()
         for column in scoring_columns:
             point_amount = scoring_source_rules["scoring_columns"][column]
-            scoring_amount = player_df[column]
-            weekly_points_scored = [x * point_amount for x in scoring_amount]
-            player_weekly_points = np.add(player_weekly_points, weekly_points_scored)
-            if scoring_source_rules.get("multiplier"):
-                column_multiplier = scoring_source_rules["multiplier"].get(column)
-                if column_multiplier:
-                    weekly_mult_points_scored = [
-                        column_multiplier["points"]
-                        if x > column_multiplier["threshold"]
-                        else 0
-                        for x in scoring_amount
-                    ]
-                    player_weekly_points = np.add(
-                        player_weekly_points, weekly_mult_points_scored
-                    )
+            scoring_amount = player_df[column].to_numpy(dtype=float)
+            player_weekly_points = player_weekly_points + scoring_amount * point_amount
+            column_multiplier = multiplier.get(column)
+            if column_multiplier:
+                player_weekly_points = player_weekly_points + np.where(
+                    scoring_amount > column_multiplier["threshold"],
+                    column_multiplier["points"],
+                    0,
+                )
         return player_weekly_points
 
     def create_fantasy_points_column(self, scoring_source: str) -> FantasyData:
@@ -432,9 +776,42 @@ class FantasyData:
         self.ff_data = pd.merge(
             self.ff_data, all_pts_df, on=["name", "pid", "date"], how="inner"
         )
+        self._team_week_cube = None
         logger.info(f"Fantasy points column '{self.ff_data.columns[-1]}' added")
         # return FantasyData
 
+    @property
+    def team_week_cube(self) -> TeamWeekCube:
+        """Team x week x position x stat totals of the player stats and any
+        fantasy points columns. Built on first access after each load.
+
+        Returns:
+            TeamWeekCube: Totals of the loaded data.
+
+        Example:
+            >>> cube = fantasy_data.team_week_cube
+            >>> cube.lookup(["TAM"], [2021], [8], "passing_att")
+            >>> cube.trailing_mean("ff_pts_yahoo", 4, position="WR", allowed=True)
+        """
+        if self._team_week_cube is None:
+            stat_categories = ["receiving", "rushing", "passing", "fumbles"]
+            stat_categories += ["scoring", "punt"]
+            stat_columns = [
+                col
+                for col in data_sources["stats"]["cols"]
+                if col.split("_")[0] in stat_categories and col in self.ff_data
+            ]
+            stat_columns += [
+                col for col in self.ff_data.columns if col.startswith("ff_pts_")
+            ]
+            start_time = time.perf_counter()
+            self._team_week_cube = TeamWeekCube.from_frame(self.ff_data, stat_columns)
+            logger.info(
+                f"Built team week cube of {len(stat_columns)} stats in "
+                f"{time.perf_counter() - start_time:.2f} seconds"
+            )
+        return self._team_week_cube
+
     def show_scoring_sources(self) -> List[str]:
         return list(self.scoring.keys())
 
@@ -1,21 +1,375 @@
 from __future__ import annotations  # noqa: F404
 
 import logging
+import multiprocessing
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
 from itertools import product
 from pathlib import PosixPath
 from typing import List, Union
 
 import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.pipeline import Pipeline
 
 from fantasyfootball.config import data_sources, root_dir
-from fantasyfootball.data import FantasyData
+from fantasyfootball.data import Calendar, FantasyData, TeamWeekCube
+from fantasyfootball.store import FeatureStore
 
 logger = logging.getLogger("fantasyfeatures")
 logger.setLevel(logging.INFO)
 
+# Position partitions shared read-only with forked worker processes.
+_SHARED_POSITION_FRAMES = dict()
+
+
+class _GroupedWindowPlan:
+    """Shared intermediates for grouped lag and window features.
+
+    The sort order, group codes and prefix sums are computed once per frame and
+    reused by every lag, moving average and coefficient of variation feature,
+    so adding another window to a column that already has a lag is nearly free.
+    All arrays are held in sorted order (group, then `order_column`) and mapped
+    back to the row order of the original frame with `unsort`.
+
+    Args:
+        X (pd.DataFrame): Dataframe the features are computed from.
+        player_group_columns (list): Names of columns to group by.
+        order_column (str, optional): Column used to order rows within each group.
+            When None, the existing row order within each group is kept.
+    """
+
+    def __init__(self, X: pd.DataFrame, player_group_columns: list, order_column=None):
+        self.X = X
+        codes = X.groupby(player_group_columns, sort=True).ngroup().to_numpy()
+        if order_column is None:
+            self.order = np.argsort(codes, kind="stable")
+        else:
+            order_codes = pd.factorize(X[order_column], sort=True)[0]
+            self.order = np.lexsort((order_codes, codes))
+        self.n = len(codes)
+        sorted_codes = codes[self.order]
+        # rows with a missing group key are not part of any group
+        self.in_group = sorted_codes >= 0
+        is_start = np.ones(self.n, dtype=bool)
+        is_start[1:] = sorted_codes[1:] != sorted_codes[:-1]
+        self.group_start = np.maximum.accumulate(
+            np.where(is_start, np.arange(self.n), 0)
+        )
+        self.position = np.arange(self.n) - self.group_start
+        self._cache = dict()
+
+    def _cached(self, key: tuple, func):
+        if key not in self._cache:
+            self._cache[key] = func()
+        return self._cache[key]
+
+    def values(self, column: str) -> np.ndarray:
+        """Values of a column in sorted order, as float when numeric."""
+
+        def _values():
+            values = self.X[column].to_numpy()[self.order]
+            if values.dtype.kind in "biuf":
+                return values.astype(float)
+            return values.astype(object)
+
+        return self._cached(("values", column), _values)
+
+    def prefix_sums(self, column: str, power: int = 1) -> tuple:
+        """Exclusive prefix sums of a column (raised to `power`) and of its
+        non-missing count, each of length n + 1."""
+
+        def _prefix_sums():
+            values = self.values(column).astype(float)
+            is_present = ~np.isnan(values)
+            total = np.zeros(self.n + 1)
+            total[1:] = np.cumsum(np.where(is_present, values, 0.0) ** power)
+            count = np.zeros(self.n + 1)
+            count[1:] = np.cumsum(is_present)
+            return total, count
+
+        return self._cached(("prefix", column, power), _prefix_sums)
+
+    def shift(self, column: str, n_week_lag: int) -> np.ndarray:
+        """Value of a column `n_week_lag` rows earlier within each group."""
+
+        def _shift():
+            values = self.values(column)
+            source = np.arange(self.n) - n_week_lag
+            is_valid = (self.position >= n_week_lag) & self.in_group
+            shifted = values.take(np.clip(source, 0, None))
+            shifted[~is_valid] = np.nan
+            return shifted
+
+        return self._cached(("shift", column, n_week_lag), _shift)
+
+    def _window_bounds(self, window: int, lag: int) -> tuple:
+        """Prefix-sum bounds of the trailing window ending `lag` rows back."""
+        end = np.arange(self.n) + 1 - lag
+        start = np.maximum(end - window, self.group_start)
+        end = np.maximum(end, start)
+        return start, end
+
+    def window_mean(
+        self, column: str, window: int, lag: int = 1, min_periods: int = 1
+    ) -> np.ndarray:
+        """Trailing mean over `window` rows, ending `lag` rows back."""
+
+        def _window_mean():
+            total, count = self.prefix_sums(column)
+            start, end = self._window_bounds(window, lag)
+            n_obs = count[end] - count[start]
+            window_total = total[end] - total[start]
+            is_valid = (n_obs >= max(min_periods, 1)) & self.in_group
+            mean = np.full(self.n, np.nan)
+            mean[is_valid] = window_total[is_valid] / n_obs[is_valid]
+            return mean
+
+        return self._cached(("mean", column, window, lag, min_periods), _window_mean)
+
+    def window_std(
+        self, column: str, window: int, lag: int = 0, min_periods: int = None
+    ) -> np.ndarray:
+        """Trailing sample standard deviation over `window` rows."""
+        min_periods = window if min_periods is None else min_periods
+
+        def _window_std():
+            total, count = self.prefix_sums(column)
+            total_sq, _ = self.prefix_sums(column, power=2)
+            start, end = self._window_bounds(window, lag)
+            n_obs = count[end] - count[start]
+            window_total = total[end] - total[start]
+            window_total_sq = total_sq[end] - total_sq[start]
+            is_valid = (n_obs >= max(min_periods, 2)) & self.in_group
+            std = np.full(self.n, np.nan)
+            n_valid = n_obs[is_valid]
+            variance = (
+                window_total_sq[is_valid] - window_total[is_valid] ** 2 / n_valid
+            ) / (n_valid - 1)
+            # treat prefix sum cancellation error in constant windows as zero
+            tolerance = 64 * np.finfo(float).eps * total_sq[end][is_valid]
+            variance[variance * (n_valid - 1) <= tolerance] = 0
+            std[is_valid] = np.sqrt(np.clip(variance, 0, None))
+            return std
+
+        return self._cached(("std", column, window, lag, min_periods), _window_std)
+
+    def trend_prefix_sums(self, column: str) -> tuple:
+        """Exclusive prefix sums of t, t^2 and x*t over non-missing values,
+        where t is the position of the row within its group."""
+
+        def _trend_prefix_sums():
+            values = self.values(column).astype(float)
+            is_present = ~np.isnan(values)
+            t = np.where(is_present, self.position, 0).astype(float)
+            sums = np.zeros((3, self.n + 1))
+            sums[0, 1:] = np.cumsum(t)
+            sums[1, 1:] = np.cumsum(t**2)
+            sums[2, 1:] = np.cumsum(np.where(is_present, values, 0.0) * t)
+            return tuple(sums)
+
+        return self._cached(("trend_prefix", column), _trend_prefix_sums)
+
+    def window_trend(
+        self, column: str, window: int, lag: int = 1, min_periods: int = 2
+    ) -> tuple:
+        """Least squares slope and intercept of a column against game number
+        over a trailing window, ending `lag` rows back. The intercept is the
+        fitted value at the most recent game in the window."""
+
+        def _window_trend():
+            total, count = self.prefix_sums(column)
+            total_t, total_tt, total_xt = self.trend_prefix_sums(column)
+            start, end = self._window_bounds(window, lag)
+            n_obs = count[end] - count[start]
+            sum_x = total[end] - total[start]
+            sum_t = total_t[end] - total_t[start]
+            sum_tt = total_tt[end] - total_tt[start]
+            sum_xt = total_xt[end] - total_xt[start]
+            denominator = n_obs * sum_tt - sum_t**2
+            is_valid = (n_obs >= max(min_periods, 2)) & (denominator > 0)
+            is_valid &= self.in_group
+            slope = np.full(self.n, np.nan)
+            intercept = np.full(self.n, np.nan)
+            slope[is_valid] = (
+                n_obs[is_valid] * sum_xt[is_valid] - sum_t[is_valid] * sum_x[is_valid]
+            ) / denominator[is_valid]
+            last_t = self.position[np.maximum(end - 1, 0)]
+            intercept[is_valid] = sum_x[is_valid] / n_obs[is_valid] + slope[
+                is_valid
+            ] * (last_t[is_valid] - sum_t[is_valid] / n_obs[is_valid])
+            return slope, intercept
+
+        return self._cached(("trend", column, window, lag, min_periods), _window_trend)
+
+    def sorted_window(self, column: str, window: int, lag: int = 1) -> tuple:
+        """Trailing `window` values ending `lag` rows back, sorted within each
+        row with missing values last, and the number of non-missing values."""
+
+        def _sorted_window():
+            values = self.values(column).astype(float)
+            padded = np.concatenate([np.full(window + lag - 1, np.nan), values])
+            windows = np.lib.stride_tricks.sliding_window_view(padded, window)
+            windows = windows[: self.n].copy()
+            # exclude values from earlier groups
+            source = np.arange(self.n)[:, None] - lag - window + 1 + np.arange(window)
+            windows[source < self.group_start[:, None]] = np.nan
+            windows.sort(axis=1)
+            return windows, (~np.isnan(windows)).sum(axis=1)
+
+        return self._cached(("sorted_window", column, window, lag), _sorted_window)
+
+    def window_quantile(
+        self, column: str, window: int, q: float, lag: int = 1, min_periods: int = 1
+    ) -> np.ndarray:
+        """Trailing quantile over `window` rows, ending `lag` rows back, with
+        linear interpolation as in `rolling(window).quantile(q)`."""
+
+        def _window_quantile():
+            windows, n_obs = self.sorted_window(column, window, lag)
+            rank = q * np.clip(n_obs - 1, 0, None)
+            lower = np.floor(rank).astype(int)
+            upper = np.ceil(rank).astype(int)
+            lower_value = np.take_along_axis(windows, lower[:, None], axis=1)[:, 0]
+            upper_value = np.take_along_axis(windows, upper[:, None], axis=1)[:, 0]
+            quantile = lower_value + (upper_value - lower_value) * (rank - lower)
+            quantile[(n_obs < max(min_periods, 1)) | ~self.in_group] = np.nan
+            return quantile
+
+        return self._cached(
+            ("quantile", column, window, q, lag, min_periods), _window_quantile
+        )
+
+    def ewm_mean(self, column: str, alpha: float, lag: int = 1) -> np.ndarray:
+        """Exponentially weighted mean ending `lag` rows back, matching
+        `ewm(alpha=alpha, adjust=True).mean()` within each group.
+
+        The weighted sum and weight total are carried forward one group
+        position at a time, updating every group at once, so the number of
+        vectorized steps is the length of the longest group.
+        """
+
+        def _ewm_mean():
+            values = self.values(column).astype(float)
+            is_present = ~np.isnan(values)
+            values = np.where(is_present, values, 0.0)
+            total = np.zeros(self.n)
+            weight = np.zeros(self.n)
+            by_position = np.argsort(self.position, kind="stable")
+            bounds = np.searchsorted(
+                self.position[by_position], np.arange(self.position.max() + 2)
+            )
+            for position in range(len(bounds) - 1):
+                rows = by_position[bounds[position] : bounds[position + 1]]
+                total[rows] = values[rows]
+                weight[rows] = is_present[rows]
+                if position > 0:
+                    total[rows] += (1 - alpha) * total[rows - 1]
+                    weight[rows] += (1 - alpha) * weight[rows - 1]
+            mean = np.full(self.n, np.nan)
+            np.divide(total, weight, out=mean, where=weight > 0)
+            source = np.arange(self.n) - lag
+            is_valid = (self.position >= lag) & self.in_group
+            shifted = mean.take(np.clip(source, 0, None))
+            shifted[~is_valid] = np.nan
+            return shifted
+
+        return self._cached(("ewm", column, alpha, lag), _ewm_mean)
+
+    def group_ends(self) -> np.ndarray:
+        """Sorted positions of the most recent row in each group."""
+        is_end = np.ones(self.n, dtype=bool)
+        is_end[:-1] = self.group_start[1:] != self.group_start[:-1]
+        return np.flatnonzero(is_end & self.in_group)
+
+    def unsort(self, values: np.ndarray) -> np.ndarray:
+        """Maps an array in sorted order back to the row order of the frame."""
+        unsorted = np.empty_like(values)
+        unsorted[self.order] = values
+        return unsorted
+
+
+def _group_rank(values: np.ndarray, codes: np.ndarray, ascending: bool) -> np.ndarray:
+    """Ranks values within each group code, where tied values share the
+    lowest rank. Missing values and rows without a group are not ranked."""
+    values = values.astype(float)
+    is_ranked = ~np.isnan(values) & (codes >= 0)
+    sort_values = values if ascending else -values
+    order = np.lexsort((sort_values, codes))
+    order = order[is_ranked[order]]
+    sorted_codes, sorted_values = codes[order], values[order]
+    is_new_value = np.ones(len(order), dtype=bool)
+    is_new_value[1:] = (sorted_codes[1:] != sorted_codes[:-1]) | (
+        sorted_values[1:] != sorted_values[:-1]
+    )
+    is_new_group = np.ones(len(order), dtype=bool)
+    is_new_group[1:] = sorted_codes[1:] != sorted_codes[:-1]
+    index = np.arange(len(order))
+    group_start = np.maximum.accumulate(np.where(is_new_group, index, 0))
+    tie_start = np.maximum.accumulate(np.where(is_new_value, index, 0))
+    ranks = np.full(len(values), np.nan)
+    ranks[order] = tie_start - group_start + 1
+    return ranks
+
+
+def _group_share(values: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Share of each value in the total of its group code."""
+    values = values.astype(float)
+    is_grouped = codes >= 0
+    totals = np.bincount(codes[is_grouped], weights=np.nan_to_num(values[is_grouped]))
+    shares = np.full(len(values), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shares[is_grouped] = values[is_grouped] / totals[codes[is_grouped]]
+    shares[~np.isfinite(shares)] = np.nan
+    return shares
+
+
+def _add_team_total_columns(
+    df: pd.DataFrame,
+    roster_df: pd.DataFrame,
+    columns: List[str],
+    game_week_column: str = "week",
+) -> pd.DataFrame:
+    """Adds a '<column>_team_total' column with the total of each column over
+    every player on the team in the week, at all positions, taken from a team
+    x week cube of `roster_df`. Columns that already have a total are kept."""
+    missing_columns = [col for col in columns if f"{col}_team_total" not in df]
+    if not missing_columns:
+        return df
+    cube = TeamWeekCube.from_frame(roster_df, missing_columns, game_week_column)
+    return df.assign(
+        **{
+            f"{col}_team_total": cube.lookup(
+                df["team"], df["season_year"], df[game_week_column], stat=col
+            )
+            for col in missing_columns
+        }
+    )
+
+
+def _rolling_cv(df: pd.DataFrame, y: str, n_week_window: int) -> np.ndarray:
+    """Coefficient of variation (cv) of y over each player's trailing
+    `n_week_window` games, up to and including the game in each row. Negative
+    values of y are replaced with zero."""
+    cv_df = pd.DataFrame(
+        {
+            "pid": df["pid"].to_numpy(),
+            "date": df["date"].to_numpy(),
+            y: pd.to_numeric(df[y]).clip(lower=0).to_numpy(),
+        }
+    )
+    plan = _GroupedWindowPlan(cv_df, ["pid"], order_column="date")
+    sd = plan.window_std(y, n_week_window, lag=0)
+    mu = plan.window_mean(y, n_week_window, lag=0, min_periods=n_week_window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cv = (sd / mu) * 100
+    # replace any inf values with nan
+    cv[np.isinf(cv)] = np.nan
+    return plan.unsort(np.round(cv))
+
 
 class LagFeatureTransformer(BaseEstimator, TransformerMixin):
     """Create lag features for each column in the dataframe by group.
@@ -40,13 +394,13 @@ class LagFeatureTransformer(BaseEstimator, TransformerMixin):
         return self
 
     def transform(self, X, y=None):
+        plan = _GroupedWindowPlan(X, self.player_group_columns)
+        lag_features = dict()
         for col in self.lag_columns:
             for lag in self.n_week_lag:
                 col_name = f"{col}_lag_{lag}"
-                X = X.assign(
-                    **{col_name: X.groupby(self.player_group_columns)[col].shift(lag)}
-                )
-        return X
+                lag_features[col_name] = plan.unsort(plan.shift(col, lag))
+        return X.assign(**lag_features)
 
 
 class MAFeatureTransformer(BaseEstimator, TransformerMixin):
@@ -58,43 +412,728 @@ class MAFeatureTransformer(BaseEstimator, TransformerMixin):
         player_group_columns (list): Names of columns to group by. For example,
             if you want to lag the data by player and season,
             you would pass in the list ["name", "season_year"]
+        game_week_column (str, optional): Indicates week of season.
+            Defaults to "week".
 
     Returns:
         X (pd.DataFrame): Dataframe with moving average features
     """
 
     def __init__(
-        self, n_week_window: list, window_columns: list, player_group_columns: list
+        self,
+        n_week_window: list,
+        window_columns: list,
+        player_group_columns: list,
+        game_week_column: str = "week",
     ):
         self.n_week_window = n_week_window
         self.window_columns = window_columns
         self.player_group_columns = player_group_columns
+        self.game_week_column = game_week_column
 
     def fit(self, X, y=None):
         return self
 
     def transform(self, X, y=None):
+        # sort by player_group_columns and week
+        X = X.sort_values(self.player_group_columns + [self.game_week_column])
+        plan = _GroupedWindowPlan(X, self.player_group_columns, self.game_week_column)
+        ma_features = dict()
         for col in self.window_columns:
             for window in self.n_week_window:
                 col_name = f"{col}_ma_{window}"
-                # sort by player_group_columns and week
-                X = X.sort_values(self.player_group_columns + ["week"])
-                # shift the column by 1 to get the previous value
-                X = X.assign(
-                    **{col_name: X.groupby(self.player_group_columns)[col].shift(1)}
-                )
-                X = X.assign(
-                    **{
-                        col_name: X.groupby(self.player_group_columns)[
-                            col_name
-                        ].transform(
-                            lambda x: x.rolling(
-                                window, min_periods=1, center=False
-                            ).mean()
-                        )
-                    }
+                # average of the previous `window` values, excluding the current week
+                ma_features[col_name] = plan.unsort(plan.window_mean(col, window))
+        return X.assign(**ma_features)
+
+
+class WindowFeatureTransformer(BaseEstimator, TransformerMixin):
+    """Create lag and moving average features in a single pass by group.
+
+    Used by `FantasyFeatures.create_ff_signature` to execute every lag and
+    moving average step as one plan, such that the sort order, group codes,
+    shifted columns and prefix sums are computed once and shared.
+
+    Args:
+        window_specs (list): Ordered (feature_type, column, value) tuples, where
+            feature_type is 'lag' or 'ma' and value is the number of weeks to
+            lag or average over.
+        player_group_columns (list): Names of columns to group by.
+        game_week_column (str, optional): Indicates week of season.
+            Defaults to "week".
+
+    Returns:
+        X (pd.DataFrame): Dataframe with lag and moving average features
+    """
+
+    def __init__(
+        self,
+        window_specs: list,
+        player_group_columns: list,
+        game_week_column: str = "week",
+    ):
+        self.window_specs = window_specs
+        self.player_group_columns = player_group_columns
+        self.game_week_column = game_week_column
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X, y=None):
+        X = X.sort_values(self.player_group_columns + [self.game_week_column])
+        plan = _GroupedWindowPlan(X, self.player_group_columns, self.game_week_column)
+        window_features = dict()
+        for feature_type, col, value in self.window_specs:
+            col_name = f"{col}_{feature_type}_{value}"
+            if feature_type == "lag":
+                window_features[col_name] = plan.unsort(plan.shift(col, value))
+            elif feature_type == "ma":
+                window_features[col_name] = plan.unsort(plan.window_mean(col, value))
+            else:
+                raise ValueError(f"Unknown window feature type: {feature_type}")
+        return X.assign(**window_features)
+
+
+class EWMFeatureTransformer(BaseEstimator, TransformerMixin):
+    """Create exponentially weighted moving average features by group.
+
+    The average for each week only includes prior weeks, so the feature is
+    available for the future week in the same way as a lag. All columns are
+    computed from one sorted plan.
+
+    Args:
+        ewm_columns (list): Names of columns to average over
+        player_group_columns (list): Names of columns to group by.
+        halflife (list, optional): Half-lives, in weeks, of the weights.
+        alpha (list, optional): Smoothing factors, used when halflife is None.
+        game_week_column (str, optional): Indicates week of season.
+            Defaults to "week".
+
+    Returns:
+        X (pd.DataFrame): Dataframe with exponentially weighted moving averages
+    """
+
+    def __init__(
+        self,
+        ewm_columns: list,
+        player_group_columns: list,
+        halflife: list = None,
+        alpha: list = None,
+        game_week_column: str = "week",
+    ):
+        self.ewm_columns = ewm_columns
+        self.player_group_columns = player_group_columns
+        self.halflife = halflife
+        self.alpha = alpha
+        self.game_week_column = game_week_column
+
+    def _decays(self) -> List[tuple]:
+        """(feature suffix, alpha) pairs for each requested decay."""
+        if self.halflife is not None:
+            return [
+                (f"ewm_hl_{halflife}", 1 - np.exp(-np.log(2) / halflife))
+                for halflife in self.halflife
+            ]
+        return [(f"ewm_alpha_{alpha}", alpha) for alpha in self.alpha]
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X, y=None):
+        X = X.sort_values(self.player_group_columns + [self.game_week_column])
+        plan = _GroupedWindowPlan(X, self.player_group_columns, self.game_week_column)
+        ewm_features = dict()
+        for col in self.ewm_columns:
+            for suffix, alpha in self._decays():
+                ewm_features[f"{col}_{suffix}"] = plan.unsort(plan.ewm_mean(col, alpha))
+        return X.assign(**ewm_features)
+
+
+class RollingQuantileFeatureTransformer(BaseEstimator, TransformerMixin):
+    """Create rolling quantile, minimum and maximum features by group.
+
+    Each window covers the previous `n_week_window` weeks, excluding the
+    current week, as with the moving average features. The window of each row
+    is sorted once and shared by every quantile of that column and window.
+
+    Args:
+        n_week_window (list): Number of weeks in each window
+        window_columns (list): Names of columns to summarize
+        quantiles (list): Quantiles between 0 and 1. 0 and 1 create the
+            rolling minimum and maximum.
+        player_group_columns (list): Names of columns to group by.
+        game_week_column (str, optional): Indicates week of season.
+            Defaults to "week".
+
+    Returns:
+        X (pd.DataFrame): Dataframe with rolling quantile features
+    """
+
+    def __init__(
+        self,
+        n_week_window: list,
+        window_columns: list,
+        quantiles: list,
+        player_group_columns: list,
+        game_week_column: str = "week",
+    ):
+        self.n_week_window = n_week_window
+        self.window_columns = window_columns
+        self.quantiles = quantiles
+        self.player_group_columns = player_group_columns
+        self.game_week_column = game_week_column
+
+    @staticmethod
+    def quantile_name(quantile: float) -> str:
+        """Name of a quantile in feature names (e.g., 0.25 -> 'p25')."""
+        names = {0: "min", 0.5: "median", 1: "max"}
+        return names.get(quantile, f"p{quantile * 100:g}")
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X, y=None):
+        X = X.sort_values(self.player_group_columns + [self.game_week_column])
+        plan = _GroupedWindowPlan(X, self.player_group_columns, self.game_week_column)
+        quantile_features = dict()
+        for col in self.window_columns:
+            for quantile in self.quantiles:
+                for window in self.n_week_window:
+                    col_name = f"{col}_{self.quantile_name(quantile)}_{window}"
+                    quantile_features[col_name] = plan.unsort(
+                        plan.window_quantile(col, window, quantile)
+                    )
+        return X.assign(**quantile_features)
+
+
+class TrendFeatureTransformer(BaseEstimator, TransformerMixin):
+    """Create rolling trend features for each column in the dataframe by group.
+
+    For each window of the previous `n_week_window` weeks, excluding the
+    current week, the following are created from cumulative sums:
+
+        * slope - least squares slope against game number
+        * intercept - fitted value at the most recent game in the window
+        * zscore - z-score of the most recent game relative to the
+          `n_week_window` games before it
+
+    Args:
+        n_week_window (list): Number of weeks in each window
+        window_columns (list): Names of columns to create trends for
+        player_group_columns (list): Names of columns to group by.
+        game_week_column (str, optional): Indicates week of season.
+            Defaults to "week".
+
+    Returns:
+        X (pd.DataFrame): Dataframe with trend features
+    """
+
+    def __init__(
+        self,
+        n_week_window: list,
+        window_columns: list,
+        player_group_columns: list,
+        game_week_column: str = "week",
+    ):
+        self.n_week_window = n_week_window
+        self.window_columns = window_columns
+        self.player_group_columns = player_group_columns
+        self.game_week_column = game_week_column
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X, y=None):
+        X = X.sort_values(self.player_group_columns + [self.game_week_column])
+        plan = _GroupedWindowPlan(X, self.player_group_columns, self.game_week_column)
+        trend_features = dict()
+        for col in self.window_columns:
+            for window in self.n_week_window:
+                slope, intercept = plan.window_trend(col, window)
+                mu = plan.window_mean(col, window, lag=2, min_periods=2)
+                sd = plan.window_std(col, window, lag=2, min_periods=2)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    zscore = (plan.shift(col, 1) - mu) / sd
+                zscore[~np.isfinite(zscore)] = np.nan
+                trend_features[f"{col}_slope_{window}"] = plan.unsort(slope)
+                trend_features[f"{col}_intercept_{window}"] = plan.unsort(intercept)
+                trend_features[f"{col}_zscore_{window}"] = plan.unsort(zscore)
+        return X.assign(**trend_features)
+
+
+class GroupFeatureTransformer(BaseEstimator, TransformerMixin):
+    """Create cross-sectional rank or share features within groups of rows,
+    such as all players in a week, or all players on a team in a week.
+
+    The groups are factorized once and shared by every column. Features can be
+    lagged by player, so statistics that are not known before a game (e.g.,
+    targets) are available for the future week.
+
+    Args:
+        feature_type (str): 'rank' or 'share'.
+        group_feature_columns (list): Names of columns to rank or share.
+        group_columns (list): Names of columns defining each group.
+        n_week_lag (int): Number of weeks to lag each feature by player.
+        player_group_columns (list): Names of columns to group players by.
+        ascending (bool, optional): Rank the smallest value first.
+            Defaults to False.
+        game_week_column (str, optional): Indicates week of season.
+            Defaults to "week".
+        total_columns (dict, optional): Column holding the denominator of each
+            share, such as a team total over all positions. The total columns
+            are inputs of the step, so they must be present in X. Defaults to
+            None, which shares each value in the total of its group's rows.
+
+    Returns:
+        X (pd.DataFrame): Dataframe with rank or share features
+    """
+
+    def __init__(
+        self,
+        feature_type: str,
+        group_feature_columns: list,
+        group_columns: list,
+        n_week_lag: int,
+        player_group_columns: list,
+        ascending: bool = False,
+        game_week_column: str = "week",
+        total_columns: dict = None,
+    ):
+        self.feature_type = feature_type
+        self.group_feature_columns = group_feature_columns
+        self.group_columns = group_columns
+        self.n_week_lag = n_week_lag
+        self.player_group_columns = player_group_columns
+        self.ascending = ascending
+        self.game_week_column = game_week_column
+        self.total_columns = total_columns
+
+    @staticmethod
+    def feature_name(col: str, feature_type: str, n_week_lag: int) -> str:
+        if n_week_lag:
+            return f"{col}_{feature_type}_lag_{n_week_lag}"
+        return f"{col}_{feature_type}"
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X, y=None):
+        if self.feature_type not in ["rank", "share"]:
+            raise ValueError(f"Unknown group feature type: {self.feature_type}")
+        missing_totals = [
+            total_col
+            for total_col in (self.total_columns or dict()).values()
+            if total_col not in X
+        ]
+        if missing_totals:
+            raise ValueError(f"Share total columns {missing_totals} are not present")
+        X = X.sort_values(self.player_group_columns + [self.game_week_column])
+        codes = X.groupby(self.group_columns, sort=False).ngroup().to_numpy()
+        group_features = dict()
+        for col in self.group_feature_columns:
+            values = X[col].to_numpy()
+            if self.feature_type == "rank":
+                group_features[col] = _group_rank(values, codes, self.ascending)
+            elif self.total_columns and col in self.total_columns:
+                totals = X[self.total_columns[col]].to_numpy(dtype=float)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    shares = values.astype(float) / totals
+                shares[~np.isfinite(shares)] = np.nan
+                group_features[col] = shares
+            else:
+                group_features[col] = _group_share(values, codes)
+        group_df = pd.DataFrame(group_features, index=X.index)
+        if self.n_week_lag:
+            plan = _GroupedWindowPlan(
+                X[self.player_group_columns + [self.game_week_column]].join(group_df),
+                self.player_group_columns,
+                self.game_week_column,
+            )
+            group_features = {
+                col: plan.unsort(plan.shift(col, self.n_week_lag))
+                for col in self.group_feature_columns
+            }
+        return X.assign(
+            **{
+                self.feature_name(col, self.feature_type, self.n_week_lag): values
+                for col, values in group_features.items()
+            }
+        )
+
+
+class OpponentAllowedFeatureTransformer(BaseEstimator, TransformerMixin):
+    """Create the average of each column allowed by a player's opponent
+    to players at the same position over the opponent's previous games.
+
+    Totals are taken from a team x week cube built once from the frame, so
+    the future week is looked up from the opponent's completed games.
+
+    Args:
+        n_week_window (list): Number of prior games to average over
+        allowed_columns (list): Names of columns to total, e.g. fantasy points
+        opponent_column (str, optional): Indicates the opposing team.
+            Defaults to "opp".
+        game_week_column (str, optional): Indicates week of season.
+            Defaults to "week".
+
+    Returns:
+        X (pd.DataFrame): Dataframe with opponent allowed features
+    """
+
+    def __init__(
+        self,
+        n_week_window: list,
+        allowed_columns: list,
+        opponent_column: str = "opp",
+        game_week_column: str = "week",
+    ):
+        self.n_week_window = n_week_window
+        self.allowed_columns = allowed_columns
+        self.opponent_column = opponent_column
+        self.game_week_column = game_week_column
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X, y=None):
+        cube = TeamWeekCube.from_frame(
+            X.rename(columns={self.opponent_column: "opp"}),
+            self.allowed_columns,
+            self.game_week_column,
+        )
+        allowed_features = dict()
+        for col in self.allowed_columns:
+            for window in self.n_week_window:
+                allowed_features[f"{col}_allowed_{window}"] = cube.lookup(
+                    X[self.opponent_column],
+                    X["season_year"],
+                    X[self.game_week_column],
+                    stat=col,
+                    allowed=True,
+                    window=window,
                 )
-        return X
+        return X.assign(**allowed_features)
+
+
+class PlayerFeatureState:
+    """Compact per-player rolling state for scoring an upcoming week.
+
+    Rather than rebuilding every lag, moving average and cv over the full
+    history to produce one new row per player, the state keeps, for each
+    player, the last N values of every lagged or averaged column, a running
+    sum and non-missing count for every moving average window, and windowed
+    Welford accumulators (count, mean, M2) of the last `cv_window` values of y.
+    Future-week features are then looked up in O(players), and each newly
+    completed week is folded in with `update`.
+
+    The cv of the future week follows `FantasyFeatures.create_ff_signature`:
+    it is the most recent non-missing cv of the player's completed games,
+    skipping the first `min_games` games of each player group, which the
+    signature drops for missing lags. It is missing when the future week's
+    player group has fewer than `min_games` completed games, since the
+    signature drops that row as well.
+
+    Args:
+        window_specs (list): Ordered (feature_type, column, value) tuples, where
+            feature_type is 'lag' or 'ma'. See WindowFeatureTransformer.
+        player_group_columns (list): Names of columns to group by.
+        y (str): Name of the column used to calculate the cv.
+        cv_window (int, optional): Number of trailing weeks used for the cv.
+            Defaults to None, in which case the cv is not tracked.
+        game_week_column (str, optional): Indicates week of season.
+            Defaults to "week".
+        min_games (int, optional): Number of leading games of each player
+            group dropped from the feature frame for missing lag or salary
+            values. Defaults to 0.
+    """
+
+    def __init__(
+        self,
+        window_specs: list,
+        player_group_columns: list,
+        y: str,
+        cv_window: int = None,
+        game_week_column: str = "week",
+        min_games: int = 0,
+    ):
+        self.window_specs = list(window_specs)
+        self.player_group_columns = player_group_columns
+        self.y = y
+        self.cv_window = cv_window
+        self.game_week_column = game_week_column
+        self.min_games = min_games
+        self.depth = dict()
+        for _, column, value in self.window_specs:
+            self.depth[column] = max(self.depth.get(column, 0), value)
+        self.windows = list(
+            dict.fromkeys(
+                (column, value)
+                for feature_type, column, value in self.window_specs
+                if feature_type == "ma"
+            )
+        )
+        self._reset()
+
+    def _reset(self) -> None:
+        self._player_index = dict()
+        self._game_counts = np.empty(0)
+        self._history = {
+            column: np.empty((0, depth)) for column, depth in self.depth.items()
+        }
+        self._window_sums = {window: np.empty(0) for window in self.windows}
+        self._window_counts = {window: np.empty(0) for window in self.windows}
+        self._cv_index = dict()
+        self._cv_history = np.empty((0, self.cv_window or 0))
+        self._cv_count = np.empty(0)
+        self._cv_mean = np.empty(0)
+        self._cv_m2 = np.empty(0)
+        self._cv_last = np.empty(0)
+
+    @staticmethod
+    def _keys(df: pd.DataFrame, columns: list) -> list:
+        return list(zip(*[df[column].tolist() for column in columns]))
+
+    @staticmethod
+    def _lookup(index: dict, keys: list) -> np.ndarray:
+        return np.array([index.get(key, -1) for key in keys], dtype=int)
+
+    @staticmethod
+    def _add_keys(index: dict, keys: list) -> int:
+        """Adds unseen keys to an index and returns the number added."""
+        n_added = 0
+        for key in keys:
+            if key not in index:
+                index[key] = len(index)
+                n_added += 1
+        return n_added
+
+    def _grow(self, n_players: int, n_cv_players: int) -> None:
+        """Appends empty (missing) state for newly seen players."""
+        self._game_counts = np.append(self._game_counts, np.zeros(n_players))
+        for column, history in self._history.items():
+            self._history[column] = np.vstack(
+                [history, np.full((n_players, history.shape[1]), np.nan)]
+            )
+        for window in self.windows:
+            self._window_sums[window] = np.append(
+                self._window_sums[window], np.zeros(n_players)
+            )
+            self._window_counts[window] = np.append(
+                self._window_counts[window], np.zeros(n_players)
+            )
+        if self.cv_window:
+            self._cv_history = np.vstack(
+                [self._cv_history, np.full((n_cv_players, self.cv_window), np.nan)]
+            )
+            self._cv_count = np.append(self._cv_count, np.zeros(n_cv_players))
+            self._cv_mean = np.append(self._cv_mean, np.zeros(n_cv_players))
+            self._cv_m2 = np.append(self._cv_m2, np.zeros(n_cv_players))
+            self._cv_last = np.append(self._cv_last, np.full(n_cv_players, np.nan))
+
+    def fit(self, df: pd.DataFrame) -> PlayerFeatureState:
+        """Builds the state from historical, completed weeks.
+
+        Args:
+            df (pd.DataFrame): Historical data for completed weeks only.
+
+        Returns:
+            PlayerFeatureState: The fitted state.
+        """
+        self._reset()
+        plan = _GroupedWindowPlan(
+            df, self.player_group_columns, order_column=self.game_week_column
+        )
+        ends = plan.group_ends()
+        end_df = df.iloc[plan.order[ends]]
+        self._add_keys(
+            self._player_index, self._keys(end_df, self.player_group_columns)
+        )
+        self._game_counts = (plan.position[ends] + 1).astype(float)
+        for column, depth in self.depth.items():
+            # oldest value first, most recent value last
+            self._history[column] = np.column_stack(
+                [
+                    plan.shift(column, lag)[ends].astype(float)
+                    for lag in range(depth - 1, -1, -1)
+                ]
+            )
+        for column, window in self.windows:
+            recent = self._history[column][:, -window:]
+            self._window_sums[(column, window)] = np.nansum(recent, axis=1)
+            self._window_counts[(column, window)] = np.sum(~np.isnan(recent), axis=1)
+        if self.cv_window:
+            cv_df = pd.DataFrame(
+                {
+                    "pid": df["pid"].to_numpy(),
+                    "date": df["date"].to_numpy(),
+                    self.y: pd.to_numeric(df[self.y]).clip(lower=0).to_numpy(),
+                }
+            )
+            cv_plan = _GroupedWindowPlan(cv_df, ["pid"], order_column="date")
+            cv_ends = cv_plan.group_ends()
+            self._add_keys(
+                self._cv_index, self._keys(cv_df.iloc[cv_plan.order[cv_ends]], ["pid"])
+            )
+            self._cv_history = np.column_stack(
+                [
+                    cv_plan.shift(self.y, lag)[cv_ends]
+                    for lag in range(self.cv_window - 1, -1, -1)
+                ]
+            ).reshape(len(cv_ends), self.cv_window)
+            is_present = ~np.isnan(self._cv_history)
+            self._cv_count = is_present.sum(axis=1).astype(float)
+            with np.errstate(invalid="ignore"):
+                self._cv_mean = np.nan_to_num(np.nanmean(self._cv_history, axis=1))
+            self._cv_m2 = np.nansum(
+                (self._cv_history - self._cv_mean[:, None]) ** 2, axis=1
+            )
+            # most recent cv of the games kept by the signature
+            is_kept = plan.unsort(plan.position) >= self.min_games
+            kept_cv = pd.Series(
+                np.where(is_kept, _rolling_cv(df, self.y, self.cv_window), np.nan)
+            )
+            self._cv_last = (
+                kept_cv.iloc[cv_plan.order]
+                .groupby(cv_df["pid"].to_numpy()[cv_plan.order], sort=False)
+                .last()
+                .reindex([pid for pid, in self._cv_index])
+                .to_numpy(dtype=float)
+            )
+        return self
+
+    def update(self, week_df: pd.DataFrame) -> PlayerFeatureState:
+        """Folds a newly completed week into the state.
+
+        Args:
+            week_df (pd.DataFrame): One row per player for the completed week.
+
+        Raises:
+            ValueError: If a player appears more than once in week_df.
+
+        Returns:
+            PlayerFeatureState: The updated state.
+        """
+        keys = self._keys(week_df, self.player_group_columns)
+        if len(set(keys)) != len(keys):
+            raise ValueError("Each player must appear once in the completed week")
+        cv_keys = self._keys(week_df, ["pid"]) if self.cv_window else list()
+        self._grow(
+            self._add_keys(self._player_index, keys),
+            self._add_keys(self._cv_index, cv_keys),
+        )
+        idx = self._lookup(self._player_index, keys)
+        is_kept = self._game_counts[idx] >= self.min_games
+        self._game_counts[idx] += 1
+        for column, history in self._history.items():
+            values = week_df[column].to_numpy(dtype=float)
+            for window_column, window in self.windows:
+                if window_column != column:
+                    continue
+                leaving = history[idx, -window]
+                self._window_sums[(column, window)][idx] += np.nan_to_num(
+                    values
+                ) - np.nan_to_num(leaving)
+                self._window_counts[(column, window)][idx] += (
+                    ~np.isnan(values)
+                ).astype(float) - (~np.isnan(leaving)).astype(float)
+            history[idx, :-1] = history[idx, 1:]
+            history[idx, -1] = values
+        if self.cv_window:
+            cv_idx = self._lookup(self._cv_index, cv_keys)
+            self._update_cv(
+                cv_idx,
+                pd.to_numeric(week_df[self.y]).clip(lower=0).to_numpy(dtype=float),
+            )
+            cv = self._window_cv(cv_idx)
+            is_kept = is_kept & ~np.isnan(cv)
+            self._cv_last[cv_idx[is_kept]] = cv[is_kept]
+        return self
+
+    def _update_cv(self, idx: np.ndarray, values: np.ndarray) -> None:
+        """Slides the cv window with Welford's remove and add steps."""
+        count, mean, m2 = self._cv_count[idx], self._cv_mean[idx], self._cv_m2[idx]
+        leaving = self._cv_history[idx, 0]
+        is_leaving = ~np.isnan(leaving)
+        remaining = count - is_leaving
+        with np.errstate(divide="ignore", invalid="ignore"):
+            removed_mean = np.where(
+                remaining > 0, (count * mean - np.nan_to_num(leaving)) / remaining, 0.0
+            )
+        m2 = np.where(
+            is_leaving,
+            m2
+            - (np.nan_to_num(leaving) - mean) * (np.nan_to_num(leaving) - removed_mean),
+            m2,
+        )
+        count, mean = remaining, np.where(is_leaving, removed_mean, mean)
+        is_entering = ~np.isnan(values)
+        count = count + is_entering
+        delta = np.nan_to_num(values) - mean
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.where(is_entering, mean + delta / count, mean)
+        m2 = np.where(is_entering, m2 + delta * (np.nan_to_num(values) - mean), m2)
+        self._cv_count[idx] = count
+        self._cv_mean[idx] = np.where(count > 0, mean, 0.0)
+        self._cv_m2[idx] = np.where(count > 1, np.clip(m2, 0, None), 0.0)
+        self._cv_history[idx, :-1] = self._cv_history[idx, 1:]
+        self._cv_history[idx, -1] = values
+
+    def _window_cv(self, idx: np.ndarray) -> np.ndarray:
+        """The cv of the current window of each player."""
+        count, mean = self._cv_count[idx], self._cv_mean[idx]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sd = np.sqrt(self._cv_m2[idx] / (count - 1))
+            return np.where(
+                (count >= self.cv_window) & (count > 1) & (mean > 0),
+                np.round(sd / mean * 100),
+                np.nan,
+            )
+
+    def transform(self, future_week_df: pd.DataFrame) -> pd.DataFrame:
+        """Adds lag, moving average and cv features to rows of an upcoming week.
+
+        Args:
+            future_week_df (pd.DataFrame): One row per player for the upcoming week.
+
+        Returns:
+            pd.DataFrame: The upcoming week with features added. Players without
+            any history have missing feature values.
+        """
+        idx = self._lookup(
+            self._player_index, self._keys(future_week_df, self.player_group_columns)
+        )
+        is_known = idx >= 0
+        features = dict()
+        for feature_type, column, value in self.window_specs:
+            feature = np.full(len(idx), np.nan)
+            if feature_type == "lag":
+                feature[is_known] = self._history[column][idx[is_known], -value]
+            else:
+                total = self._window_sums[(column, value)][idx[is_known]]
+                count = self._window_counts[(column, value)][idx[is_known]]
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    feature[is_known] = np.where(count > 0, total / count, np.nan)
+            features[f"{column}_{feature_type}_{value}"] = feature
+        if self.cv_window:
+            cv_idx = self._lookup(self._cv_index, self._keys(future_week_df, ["pid"]))
+            game_counts = np.zeros(len(idx))
+            game_counts[is_known] = self._game_counts[idx[is_known]]
+            is_kept = (cv_idx >= 0) & (game_counts >= self.min_games)
+            cv = np.full(len(cv_idx), np.nan)
+            cv[is_kept] = self._cv_last[cv_idx[is_kept]]
+            features["cv"] = cv
+        return future_week_df.assign(**features)
+
+    def save(self, path: PosixPath) -> None:
+        """Saves the state to disk so it can be reused in the following week."""
+        with open(path, "wb") as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(path: PosixPath) -> PlayerFeatureState:
+        """Loads a state previously written with `save`."""
+        with open(path, "rb") as f:
+            return pickle.load(f)
 
 
 class CategoryConsolidatorFeatureTransformer(BaseEstimator, TransformerMixin):
@@ -173,17 +1212,107 @@ class TargetEncoderFeatureTransformer(BaseEstimator, TransformerMixin):
             self.category_mappings[column] = column_mappings
         return self
 
-    def transform(self, X, y=None):
-        for column, column_mappings in self.category_mappings.items():
-            col_name = f"{column}_te"
-            values = np.full(X.shape[0], np.nan)
-            for value, mean_target in column_mappings.items():
-                values[X[column] == value] = mean_target
-            X = X.assign(**{col_name: values})
-        return X
+    def transform(self, X, y=None):
+        for column, column_mappings in self.category_mappings.items():
+            col_name = f"{column}_te"
+            values = np.full(X.shape[0], np.nan)
+            for value, mean_target in column_mappings.items():
+                values[X[column] == value] = mean_target
+            X = X.assign(**{col_name: values})
+        return X
+
+    def fit_transform(self, X, y=None):
+        return self.fit(X, y).transform(X, y)
+
+
+class OneHotFeatureTransformer(BaseEstimator, TransformerMixin):
+    """Encode categorical columns as integer codes for a sparse one-hot block.
+
+    The categories of each column are fixed when fit, and each row is given
+    the code of its category (or -1 for missing and unseen categories) in a
+    `<column>_ohe` column. `FantasyFeatures.export_model_matrix` expands the
+    codes into a SciPy CSR block, so the one-hot columns are never densified.
+
+    Args:
+        category_columns (list): Names of columns to one-hot encode.
+
+    Returns:
+        X (pd.DataFrame): Dataframe with one-hot code columns
+    """
+
+    def __init__(self, category_columns: list):
+        self.category_columns = category_columns
+
+    def fit(self, X, y=None):
+        self.categories_ = {
+            column: sorted(X[column].dropna().unique().tolist())
+            for column in self.category_columns
+        }
+        return self
+
+    def transform(self, X, y=None):
+        codes = {
+            f"{column}_ohe": pd.Categorical(X[column], categories=categories).codes
+            for column, categories in self.categories_.items()
+        }
+        return X.assign(**codes)
+
+    @staticmethod
+    def to_sparse(feature_df: pd.DataFrame, one_hot_categories: dict) -> tuple:
+        """Expands the one-hot codes of a feature frame into a CSR matrix.
+
+        Args:
+            feature_df (pd.DataFrame): Feature frame with `<column>_ohe` codes.
+            one_hot_categories (dict): Categories of each one-hot column.
+
+        Returns:
+            tuple: The float32 CSR matrix and the name of each of its columns.
+        """
+        n_rows = feature_df.shape[0]
+        indices, feature_names, offset = list(), list(), 0
+        for column, categories in one_hot_categories.items():
+            codes = feature_df[f"{column}_ohe"].to_numpy()
+            indices.append(np.where(codes >= 0, codes + offset, -1))
+            feature_names += [f"{column}_{category}" for category in categories]
+            offset += len(categories)
+        if not indices:
+            return sparse.csr_matrix((n_rows, 0), dtype=np.float32), feature_names
+        # rows are the inner axis, so entries are ordered by row then column
+        indices = np.stack(indices, axis=1)
+        is_present = indices >= 0
+        indptr = np.concatenate([[0], np.cumsum(is_present.sum(axis=1))])
+        data = np.ones(indptr[-1], dtype=np.float32)
+        X = sparse.csr_matrix(
+            (data, indices[is_present], indptr), shape=(n_rows, offset)
+        )
+        return X, feature_names
+
+
+def _build_position_features(
+    position: str,
+    y: str,
+    recipe: List[tuple],
+    player_group_columns: list,
+    game_week_column: str,
+    position_df: pd.DataFrame = None,
+) -> dict:
+    """Runs a feature recipe for a single position.
 
-    def fit_transform(self, X, y=None):
-        return self.fit(X, y).transform(X, y)
+    When `position_df` is None, the partition is read from the frames shared
+    with forked worker processes, such that it is never pickled.
+    """
+    if position_df is None:
+        position_df = _SHARED_POSITION_FRAMES[position]
+    features = FantasyFeatures(
+        position_df,
+        y=y,
+        position=position,
+        player_group_columns=player_group_columns,
+        game_week_column=game_week_column,
+    )
+    for method_name, kwargs in recipe:
+        getattr(features, method_name)(**kwargs)
+    return features.create_ff_signature()
 
 
 class FantasyFeatures:
@@ -220,12 +1349,16 @@ class FantasyFeatures:
         self.df = df[df["position"] == position].sort_values(
             player_group_columns + [game_week_column]
         )
+        # every position, for team totals such as the targets of a team
+        self._roster_df = df
         self.y = y
         self.position = position
         self.player_group_columns = player_group_columns
         self.game_week_column = game_week_column
         self.new_pipeline_features = list()
         self._pipeline_steps = ""
+        self._pipeline_step_specs = list()
+        self._cv_window = None
 
     @property
     def data(self) -> pd.DataFrame:
@@ -248,7 +1381,7 @@ class FantasyFeatures:
         Returns:
             FantasyFeatures: FantasyFeatures object with inactive games removed.
         """
-        if not all(x in [0, 1] for x in self.df[status_column]):
+        if not self.df[status_column].isin([0, 1]).all():
             raise ValueError(
                 "status_column must be 0 or 1 indicating if player is active"
             )
@@ -403,21 +1536,21 @@ class FantasyFeatures:
             ValueError: If 'week' is not equal to max_week
         """
         future_week = max_week + 1
-        calendar_df = pd.read_csv(ff_data_dir / "calendar.gz", compression="gzip")
+        read_season_source = FantasyData._read_season_source
+        calendar = Calendar.from_season(
+            int(ff_data_dir.name), ff_data_dir=ff_data_dir.parent
+        )
         future_data_sources = [
             k for k in data_sources.keys() if data_sources[k]["is_forward_looking"]
         ]
         for data in future_data_sources:
-            dataset_df = pd.read_csv(ff_data_dir / f"{data}.gz", compression="gzip")
+            dataset_df = read_season_source(ff_data_dir, data)
             if "week" in dataset_df.columns:
                 future_week_df = dataset_df.query(f"week == {future_week}")
             elif "date" in dataset_df.columns:
-                future_week_df = pd.merge(
-                    dataset_df,
-                    calendar_df[calendar_df["week"] == future_week][["date"]],
-                    on="date",
-                    how="inner",
-                )
+                future_week_df = dataset_df[
+                    dataset_df["date"].isin(calendar.week_dates(future_week))
+                ]
             else:
                 raise ValueError(f"{data} is missing a 'week' or 'date' column")
             if future_week_df.empty:
@@ -439,8 +1572,8 @@ class FantasyFeatures:
         """
         logger.info(f"Adding 1 and log transforming {self.y}")
         # convert any negative scores to 0
-        self.df[self.y] = self.df[self.y].transform(lambda x: 0 if x < 0 else x)
-        self.df[self.y] = self.df[self.y].transform(lambda x: np.log1p(x))
+        y = pd.to_numeric(self.df[self.y]).clip(lower=0)
+        self.df = self.df.assign(**{self.y: np.log1p(y)})
 
     def create_future_week(self) -> FantasyFeatures:
         """Creates a dataframe of future features for an upcoming NFL game week.
@@ -451,21 +1584,25 @@ class FantasyFeatures:
             FantasyFeatures: Appends a dataframe of future features to the
             historical data.
         """
+        start_time = time.perf_counter()
         current_season_year = max(self.df["season_year"])
         current_season_df = self.df[self.df["season_year"] == current_season_year]
         max_week = max(current_season_df[self.game_week_column])
         self._validate_max_week(season_year=current_season_year, week_number=max_week)
         ff_data_dir = root_dir / "datasets" / "season" / str(current_season_year)
+        # each source is read at most once through the shared season cache
         self._validate_future_data_is_present(ff_data_dir, max_week, data_sources)
         _load_data = FantasyData._load_data
-        season_ff_data = _load_data(ff_data_dir, data_sources, "stats")
+        season_ff_data = _load_data(
+            ff_data_dir, data_sources, "stats", week=max_week + 1
+        )
         future_week_df = season_ff_data[
             (season_ff_data[self.game_week_column] == max_week + 1)
             & (season_ff_data["season_year"] == current_season_year)
             & (season_ff_data["position"] == self.position)
         ]
         # load in historical stats data to add in player id
-        stats_df = pd.read_csv(ff_data_dir / "stats.gz", compression="gzip")
+        stats_df = FantasyData._read_season_source(ff_data_dir, "stats")
         stats_df = stats_df[["name", "team", "pid"]].drop_duplicates()
         # assume player is active
         if "is_active" in self.df.columns:
@@ -476,7 +1613,7 @@ class FantasyFeatures:
             future_week_df, stats_df, how="left", on=["name", "team"]
         )
         # load in defensive stats data and add in for future week
-        defense_df = pd.read_csv(ff_data_dir / "defense.gz", compression="gzip")
+        defense_df = FantasyData._read_season_source(ff_data_dir, "defense")
         # drop the defensive ranking fields in future week df, becauses they are nan
         future_week_df = future_week_df.drop(
             columns=[col for col in future_week_df.columns if "_def_rank" in col]
@@ -494,6 +1631,10 @@ class FantasyFeatures:
             .reset_index(drop=True)
         )
         self.df["is_future_week"] = self.df["is_future_week"].fillna(0)
+        logger.info(
+            f"Created week {max_week + 1} for {future_week_df.shape[0]} "
+            f"{self.position}s in {time.perf_counter() - start_time:.2f} seconds"
+        )
 
     @staticmethod
     def _create_step_str(step: str, transformer_name: str, **params) -> str:
@@ -513,6 +1654,73 @@ class FantasyFeatures:
         step_str = f"('{step}', {transformer_name}({param_str}))"
         return step_str
 
+    def _add_pipeline_step(self, step: str, transformer_name: str, **params) -> None:
+        """Records a pipeline step, both as its string representation and as a
+        (step, transformer_name, params) spec used when planning the pipeline.
+
+        Args:
+            step (str): Description of what feature transformer is being used.
+            transformer_name (str): Name of the feature transformer class.
+            **params (dict): Parameters for the transformer.
+        """
+        step_str = self._create_step_str(step, transformer_name, **params)
+        self._pipeline_steps += step_str + ","
+        self._pipeline_step_specs.append((step, transformer_name, params))
+
+    def _window_specs(self) -> List[tuple]:
+        """Collects the lag and moving average steps as ordered
+        (feature_type, column, value) tuples.
+
+        Returns:
+            List[tuple]: Unique window specs in the order they were added.
+        """
+        window_specs = list()
+        for _, transformer_name, params in self._pipeline_step_specs:
+            if transformer_name == "LagFeatureTransformer":
+                window_specs += product(
+                    ["lag"], params["lag_columns"], params["n_week_lag"]
+                )
+            elif transformer_name == "MAFeatureTransformer":
+                window_specs += product(
+                    ["ma"], params["window_columns"], params["n_week_window"]
+                )
+        return list(dict.fromkeys(window_specs))
+
+    def _plan_pipeline_steps(self) -> List[tuple]:
+        """Plans the recorded steps as a list of pipeline steps.
+
+        All lag and moving average steps are merged into a single
+        WindowFeatureTransformer, placed where the first of them was added,
+        so the sort order, group codes, shifted columns and prefix sums
+        they share are only computed once.
+
+        Returns:
+            List[tuple]: (name, transformer) steps for a sklearn Pipeline.
+        """
+        window_step_name = "Create Lag and Moving Average Features"
+        window_transformers = ["LagFeatureTransformer", "MAFeatureTransformer"]
+        steps = list()
+        for step, transformer_name, params in self._pipeline_step_specs:
+            if transformer_name not in window_transformers:
+                # pipeline step names must be unique when a step is added twice
+                n_same_name = sum(name.startswith(step) for name, _ in steps)
+                name = f"{step} {n_same_name + 1}" if n_same_name else step
+                steps.append((name, globals()[transformer_name](**params)))
+            elif window_step_name not in [name for name, _ in steps]:
+                steps.append((window_step_name, None))
+        window_specs = self._window_specs()
+        if window_specs:
+            window_transformer = WindowFeatureTransformer(
+                window_specs=window_specs,
+                player_group_columns=self.player_group_columns,
+                game_week_column=self.game_week_column,
+            )
+            steps = [
+                (name, window_transformer if name == window_step_name else step)
+                for name, step in steps
+            ]
+        return steps
+
     def _validate_column_present(self, feature_columns: Union[str, list]) -> None:
         """Validates that a column is present in the dataframe prior to
         adding a new feature.
@@ -552,16 +1760,14 @@ class FantasyFeatures:
             lag_columns, feature_type, *n_week_lag
         )
         self.new_pipeline_features = self.new_pipeline_features + new_lag_features
-        lag_step_str = self._create_step_str(
+        self._add_pipeline_step(
             step="Create Lags of Features",
             transformer_name="LagFeatureTransformer",
             player_group_columns=self.player_group_columns,
             n_week_lag=n_week_lag,
             lag_columns=lag_columns,
         )
-
         logger.info("add lag step")
-        self._pipeline_steps += lag_step_str + ","
 
     def add_moving_avg_feature(
         self,
@@ -587,15 +1793,318 @@ class FantasyFeatures:
             window_columns, feature_type, *n_week_window
         )
         self.new_pipeline_features = self.new_pipeline_features + new_ma_features
-        ma_step_str = self._create_step_str(
+        self._add_pipeline_step(
             step="Create Moving Average of Features",
             transformer_name="MAFeatureTransformer",
             player_group_columns=self.player_group_columns,
             n_week_window=n_week_window,
             window_columns=window_columns,
+            game_week_column=self.game_week_column,
         )
         logger.info("add moving average")
-        self._pipeline_steps += ma_step_str + ","
+
+    def add_trend_feature(
+        self,
+        n_week_window: Union[int, List[int]],
+        window_columns: Union[str, List[str]],
+    ) -> FantasyFeatures:
+        """Adds string representation of a rolling trend step to the pipeline.
+        Creates the slope, intercept and z-score features described in
+        `TrendFeatureTransformer`.
+
+        Args:
+            n_week_window (Union[int, List[int]]): Number of weeks in the window.
+            window_columns (Union[str, List[str]]): Columns to create trends for.
+
+        Returns:
+            FantasyFeatures: Updated string representation of the pipeline steps.
+        """
+        if isinstance(n_week_window, int):
+            n_week_window = [n_week_window]
+        if isinstance(window_columns, str):
+            window_columns = [window_columns]
+        self._validate_column_present(feature_columns=window_columns)
+        for col in window_columns:
+            for window in n_week_window:
+                self.new_pipeline_features += [
+                    f"{col}_{feature_type}_{window}"
+                    for feature_type in ["slope", "intercept", "zscore"]
+                ]
+        self._add_pipeline_step(
+            step="Create Rolling Trends of Features",
+            transformer_name="TrendFeatureTransformer",
+            n_week_window=n_week_window,
+            window_columns=window_columns,
+            player_group_columns=self.player_group_columns,
+            game_week_column=self.game_week_column,
+        )
+        logger.info("add rolling trend")
+
+    def add_rolling_quantile_feature(
+        self,
+        n_week_window: Union[int, List[int]],
+        window_columns: Union[str, List[str]],
+        quantiles: Union[float, List[float]] = [0, 0.25, 0.5, 0.75, 1],
+    ) -> FantasyFeatures:
+        """Adds string representation of a rolling quantile step to the pipeline.
+        Useful for modeling a player's floor and ceiling over recent games.
+
+        Args:
+            n_week_window (Union[int, List[int]]): Number of weeks in the window.
+            window_columns (Union[str, List[str]]): Columns to summarize.
+            quantiles (Union[float, List[float]], optional): Quantiles between
+                0 and 1, where 0 and 1 are the rolling minimum and maximum.
+                Defaults to [0, 0.25, 0.5, 0.75, 1].
+
+        Raises:
+            ValueError: If a quantile is not between 0 and 1.
+
+        Returns:
+            FantasyFeatures: Updated string representation of the pipeline steps.
+        """
+        if isinstance(n_week_window, int):
+            n_week_window = [n_week_window]
+        if isinstance(window_columns, str):
+            window_columns = [window_columns]
+        if not isinstance(quantiles, list):
+            quantiles = [quantiles]
+        if not all(0 <= quantile <= 1 for quantile in quantiles):
+            raise ValueError("`quantiles` must be between 0 and 1")
+        self._validate_column_present(feature_columns=window_columns)
+        for col in window_columns:
+            for quantile in quantiles:
+                self.new_pipeline_features += self._save_pipeline_feature_names(
+                    [col],
+                    RollingQuantileFeatureTransformer.quantile_name(quantile),
+                    *n_week_window,
+                )
+        self._add_pipeline_step(
+            step="Create Rolling Quantiles of Features",
+            transformer_name="RollingQuantileFeatureTransformer",
+            n_week_window=n_week_window,
+            window_columns=window_columns,
+            quantiles=quantiles,
+            player_group_columns=self.player_group_columns,
+            game_week_column=self.game_week_column,
+        )
+        logger.info("add rolling quantiles")
+
+    def add_ewm_feature(
+        self,
+        ewm_columns: Union[str, List[str]],
+        halflife: Union[float, List[float]] = None,
+        alpha: Union[float, List[float]] = None,
+    ) -> FantasyFeatures:
+        """Adds string representation of an exponentially weighted moving
+        average step to the pipeline. Only prior weeks are averaged.
+
+        Args:
+            ewm_columns (Union[str, List[str]]): Columns to average.
+            halflife (Union[float, List[float]], optional): Half-lives, in weeks.
+            alpha (Union[float, List[float]], optional): Smoothing factors
+                between 0 and 1.
+
+        Raises:
+            ValueError: If not exactly one of halflife or alpha is provided.
+            ValueError: If a halflife is not positive or an alpha not in (0, 1].
+
+        Returns:
+            FantasyFeatures: Updated string representation of the pipeline steps.
+        """
+        if (halflife is None) == (alpha is None):
+            raise ValueError("Provide exactly one of `halflife` or `alpha`")
+        if isinstance(ewm_columns, str):
+            ewm_columns = [ewm_columns]
+        if halflife is not None:
+            feature_type, decays = "ewm_hl", halflife
+        else:
+            feature_type, decays = "ewm_alpha", alpha
+        if not isinstance(decays, list):
+            decays = [decays]
+        if halflife is not None and min(decays) <= 0:
+            raise ValueError("`halflife` must be positive")
+        if alpha is not None and not all(0 < decay <= 1 for decay in decays):
+            raise ValueError("`alpha` must be between 0 and 1")
+        self._validate_column_present(feature_columns=ewm_columns)
+        new_ewm_features = self._save_pipeline_feature_names(
+            ewm_columns, feature_type, *decays
+        )
+        self.new_pipeline_features = self.new_pipeline_features + new_ewm_features
+        self._add_pipeline_step(
+            step="Create Exponentially Weighted Moving Average of Features",
+            transformer_name="EWMFeatureTransformer",
+            ewm_columns=ewm_columns,
+            player_group_columns=self.player_group_columns,
+            halflife=decays if halflife is not None else None,
+            alpha=decays if alpha is not None else None,
+            game_week_column=self.game_week_column,
+        )
+        logger.info("add exponentially weighted moving average")
+
+    def _add_group_feature(
+        self,
+        feature_type: str,
+        group_feature_columns: Union[str, List[str]],
+        group_columns: List[str],
+        n_week_lag: int,
+        ascending: bool = False,
+        total_columns: dict = None,
+    ) -> None:
+        """Adds string representation of a rank or share step to the pipeline."""
+        if isinstance(group_feature_columns, str):
+            group_feature_columns = [group_feature_columns]
+        self._validate_column_present(
+            feature_columns=group_feature_columns + group_columns
+        )
+        self.new_pipeline_features = self.new_pipeline_features + [
+            GroupFeatureTransformer.feature_name(col, feature_type, n_week_lag)
+            for col in group_feature_columns
+        ]
+        self._add_pipeline_step(
+            step=f"Create Group {feature_type.title()} of Features",
+            transformer_name="GroupFeatureTransformer",
+            feature_type=feature_type,
+            group_feature_columns=group_feature_columns,
+            group_columns=group_columns,
+            n_week_lag=n_week_lag,
+            player_group_columns=self.player_group_columns,
+            ascending=ascending,
+            game_week_column=self.game_week_column,
+            total_columns=total_columns,
+        )
+
+    def add_group_rank_feature(
+        self,
+        rank_columns: Union[str, List[str]],
+        group_columns: List[str] = None,
+        n_week_lag: int = 0,
+        ascending: bool = False,
+    ) -> FantasyFeatures:
+        """Adds string representation of a rank step to the pipeline. For example,
+        a player's salary rank among all players at the position in a week.
+        Tied values share the lowest rank.
+
+        Args:
+            rank_columns (Union[str, List[str]]): Columns to rank.
+            group_columns (List[str], optional): Columns defining the rows ranked
+                together. Defaults to ["season_year", game_week_column].
+            n_week_lag (int, optional): Number of weeks to lag the rank. Use 0
+                only for columns known before each game, such as salary.
+                Defaults to 0.
+            ascending (bool, optional): Rank the smallest value first.
+                Defaults to False.
+
+        Returns:
+            FantasyFeatures: Updated string representation of the pipeline steps.
+        """
+        group_columns = group_columns or ["season_year", self.game_week_column]
+        self._add_group_feature(
+            "rank", rank_columns, group_columns, n_week_lag, ascending
+        )
+        logger.info("add group rank")
+
+    def add_team_share_feature(
+        self,
+        share_columns: Union[str, List[str]],
+        n_week_lag: int = 1,
+    ) -> FantasyFeatures:
+        """Adds string representation of a team share step to the pipeline. For
+        example, a player's share of receiving targets in the prior week.
+
+        Team totals are taken over every player on the team in the week, at
+        all positions, so a WR's share of targets includes the targets of the
+        team's TEs and RBs. The totals are added as '<column>_team_total'
+        columns.
+
+        Args:
+            share_columns (Union[str, List[str]]): Columns to share.
+            n_week_lag (int, optional): Number of weeks to lag the share, so it
+                is available for the future week. Defaults to 1.
+
+        Returns:
+            FantasyFeatures: Updated string representation of the pipeline steps.
+        """
+        if isinstance(share_columns, str):
+            share_columns = [share_columns]
+        self._validate_column_present(feature_columns=share_columns + ["team", "opp"])
+        self.df = _add_team_total_columns(
+            self.df, self._roster_df, share_columns, self.game_week_column
+        )
+        group_columns = ["season_year", self.game_week_column, "team"]
+        self._add_group_feature(
+            "share",
+            share_columns,
+            group_columns,
+            n_week_lag,
+            total_columns={col: f"{col}_team_total" for col in share_columns},
+        )
+        logger.info("add team share")
+
+    def add_opponent_allowed_feature(
+        self,
+        n_week_window: Union[int, List[int]],
+        allowed_columns: Union[str, List[str]],
+        opponent_column: str = "opp",
+    ) -> FantasyFeatures:
+        """Adds string representation of an opponent allowed step to the pipeline.
+        For example, the average fantasy points the opponent allowed to players
+        at the position over its previous 4 games.
+
+        Args:
+            n_week_window (Union[int, List[int]]): Number of prior games.
+            allowed_columns (Union[str, List[str]]): Columns to total.
+            opponent_column (str, optional): Indicates the opposing team.
+                Defaults to "opp".
+
+        Returns:
+            FantasyFeatures: Updated string representation of the pipeline steps.
+        """
+        feature_type = "allowed"
+        if isinstance(n_week_window, int):
+            n_week_window = [n_week_window]
+        if isinstance(allowed_columns, str):
+            allowed_columns = [allowed_columns]
+        self._validate_column_present(
+            feature_columns=allowed_columns + [opponent_column, "team"]
+        )
+        new_allowed_features = self._save_pipeline_feature_names(
+            allowed_columns, feature_type, *n_week_window
+        )
+        self.new_pipeline_features = self.new_pipeline_features + new_allowed_features
+        self._add_pipeline_step(
+            step="Create Opponent Allowed Features",
+            transformer_name="OpponentAllowedFeatureTransformer",
+            n_week_window=n_week_window,
+            allowed_columns=allowed_columns,
+            opponent_column=opponent_column,
+            game_week_column=self.game_week_column,
+        )
+        logger.info("add opponent allowed")
+
+    def add_one_hot_feature(
+        self, category_columns: Union[str, list]
+    ) -> FantasyFeatures:
+        """Adds string representation of a one-hot encoding step to the pipeline.
+
+        The categories found when the pipeline is fit are returned as
+        'one_hot_categories' by `create_ff_signature`, and the one-hot columns
+        are exported as a sparse block by `export_model_matrix`.
+
+        Args:
+            category_columns (Union[str, list]): Columns to one-hot encode.
+
+        Returns:
+            FantasyFeatures: Updated string representation of the pipeline steps.
+        """
+        if isinstance(category_columns, str):
+            category_columns = [category_columns]
+        self._validate_column_present(feature_columns=category_columns)
+        self._add_pipeline_step(
+            step="One-Hot Encode Categorical Feature",
+            transformer_name="OneHotFeatureTransformer",
+            category_columns=category_columns,
+        )
+        logger.info("add one-hot encoding for categorical variables")
 
     def add_target_encoded_feature(
         self, category_columns: Union[str, list]
@@ -616,13 +2125,12 @@ class FantasyFeatures:
             category_columns, feature_type
         )
         self.new_pipeline_features = self.new_pipeline_features + new_te_feature
-        te_step_str = self._create_step_str(
+        self._add_pipeline_step(
             step="Target Encode Categorical Feature",
             transformer_name="TargetEncoderFeatureTransformer",
             category_columns=category_columns,
         )
         logger.info("add target encoding for categorical variables")
-        self._pipeline_steps += te_step_str + ","
 
     def consolidate_category_feature(
         self, category_columns: Union[str, list], threshold: float
@@ -639,14 +2147,100 @@ class FantasyFeatures:
         if isinstance(category_columns, str):
             category_columns = [category_columns]
         self._validate_column_present(feature_columns=category_columns)
-        cc_step_str = self._create_step_str(
+        self._add_pipeline_step(
             step="Consolidate Categorical Feature",
             transformer_name="CategoryConsolidatorFeatureTransformer",
             category_columns=category_columns,
             threshold=threshold,
         )
         logger.info("Consolidating levels for categorical variables")
-        self._pipeline_steps += cc_step_str + ","
+
+    def _required_columns(self, keep_columns: List[str] = None) -> List[str]:
+        """Collects the columns needed to run the recorded pipeline steps.
+
+        Includes the outcome, player group and game week columns, every column
+        passed to an add_* method (both the keys and values of column
+        mappings, such as the team total of each share column), the team
+        columns read by the share and opponent allowed steps, the columns used
+        to index and split the feature frame and any explicitly kept
+        passthrough columns.
+
+        Args:
+            keep_columns (List[str], optional): Passthrough columns to keep.
+                Defaults to None.
+
+        Returns:
+            List[str]: Required columns, in the order they appear in the data.
+        """
+        required_columns = set(
+            [self.y, self.game_week_column]
+            + self.player_group_columns
+            + ["pid", "date", "season_year", "position", "is_future_week", "cv"]
+            + (keep_columns or list())
+        )
+        for _, transformer_name, params in self._pipeline_step_specs:
+            if (
+                transformer_name == "OpponentAllowedFeatureTransformer"
+                or params.get("feature_type") == "share"
+            ):
+                required_columns.update(["team", "opp"])
+            for param, value in params.items():
+                if param == "player_group_columns" or value is None:
+                    continue
+                if param.endswith("_columns") and isinstance(value, dict):
+                    required_columns.update(value.keys())
+                    required_columns.update(value.values())
+                elif param.endswith("_columns"):
+                    required_columns.update(value)
+                elif param.endswith("_column"):
+                    required_columns.add(value)
+        return [column for column in self.df.columns if column in required_columns]
+
+    def prune_columns(self, keep_columns: Union[str, List[str]] = None) -> None:
+        """Drops the columns the recorded pipeline steps do not use, so they are
+        not copied by each transformer. Call after `create_future_week` and the
+        add_* methods, and before `create_ff_signature`.
+
+        Note that salary columns are only kept if they are used by a step or
+        listed in `keep_columns`, in which case week 1 of each season is removed
+        from the feature frame as before.
+
+        Args:
+            keep_columns (Union[str, List[str]], optional): Passthrough columns
+                to keep, such as raw model inputs. Defaults to None.
+
+        Raises:
+            ValueError: If any of the keep columns are not present.
+        """
+        if isinstance(keep_columns, str):
+            keep_columns = [keep_columns]
+        if keep_columns:
+            self._validate_column_present(feature_columns=keep_columns)
+        required_columns = self._required_columns(keep_columns)
+        start_mb = self.df.memory_usage(deep=True).sum() / 1024**2
+        n_dropped = self.df.shape[1] - len(required_columns)
+        self.df = self.df[required_columns]
+        end_mb = self.df.memory_usage(deep=True).sum() / 1024**2
+        logger.info(
+            f"Pruned {n_dropped} unused columns, reducing memory from "
+            f"{start_mb:.1f} MB to {end_mb:.1f} MB ({start_mb - end_mb:.1f} MB saved)"
+        )
+
+    @staticmethod
+    def _weeks_to_drop(columns: List[str]) -> int:
+        """Number of leading games of each player group with missing lag or
+        salary values, given the columns of the feature frame."""
+        # max weeks to drop conditions.
+        weeks_to_drop_lag = 0
+        weeks_to_drop_salary = 0
+        lag_fields = [x for x in columns if "lag" in x]
+        if lag_fields:
+            weeks_to_drop_lag = max([int(x.split("_")[-1]) for x in lag_fields])
+        salary_fields = [x for x in columns if "salary" in x]
+        # always drop week 1 if salary data is included, since it is not published
+        if salary_fields:
+            weeks_to_drop_salary = 1
+        return max(weeks_to_drop_lag, weeks_to_drop_salary)
 
     def _remove_missing_feature_values(self, feature_df: pd.DataFrame) -> pd.DataFrame:
         """Removes rows that have missing values related to lag or salary columns.
@@ -665,17 +2259,7 @@ class FantasyFeatures:
         Returns:
             pd.DataFrame: Dataframe with missing lag values or salary data removed.
         """
-        # max weeks to drop conditions.
-        weeks_to_drop_lag = 0
-        weeks_to_drop_salary = 0
-        lag_fields = [x for x in feature_df.columns if "lag" in x]
-        if lag_fields:
-            weeks_to_drop_lag = max([int(x.split("_")[-1]) for x in lag_fields])
-        salary_fields = [x for x in feature_df.columns if "salary" in x]
-        # always drop week 1 if salary data is included, since it is not published
-        if salary_fields:
-            weeks_to_drop_salary = 1
-        weeks_to_drop = max(weeks_to_drop_lag, weeks_to_drop_salary)
+        weeks_to_drop = self._weeks_to_drop(feature_df.columns)
         feature_df["player_game_index"] = (
             feature_df.sort_values(self.player_group_columns + [self.game_week_column])
             .groupby(self.player_group_columns)
@@ -704,25 +2288,24 @@ class FantasyFeatures:
             pd.DataFrame: Dataframe with missing salary values replaced with zero.
         """
         salary_columns = [x for x in feature_df.columns if "salary" in x]
-        if salary_columns:
-            for column in salary_columns:
-                feature_df[column] = feature_df[column].fillna(0)
-            return feature_df
-        else:
-            return feature_df
+        return feature_df.fillna({column: 0 for column in salary_columns})
 
     def _forward_fill_future_week_cv(self, feature_df: pd.DataFrame) -> pd.DataFrame:
-        """Forward fills CV values for future weeks."""
+        """Forward fills CV values for future weeks from each player's most
+        recent game with a CV, so players who changed teams are filled in date
+        order rather than in the order of their team names."""
         if "cv" in feature_df.columns and "is_future_week" in feature_df.columns:
-            feature_df["cv_ff"] = feature_df.groupby("pid")["cv"].transform(
-                lambda x: x.ffill()
+            cv_df = feature_df[["pid", "date", "cv"]].reset_index(drop=True)
+            cv_ff = (
+                cv_df.sort_values(["pid", "date"], kind="stable")
+                .groupby("pid")["cv"]
+                .ffill()
+                .sort_index()
+                .to_numpy()
             )
-            feature_df["cv"] = feature_df.apply(
-                lambda row: row["cv"] if row["is_future_week"] == 0 else row["cv_ff"],
-                axis=1,
+            return feature_df.assign(
+                cv=np.where(feature_df["is_future_week"] == 0, feature_df["cv"], cv_ff)
             )
-            feature_df = feature_df.drop(columns="cv_ff")
-            return feature_df
         else:
             return feature_df
 
@@ -740,49 +2323,325 @@ class FantasyFeatures:
             FantasyFeatures: Dataframe with cv added as a column.
 
         """
-        keys = ["pid", "date"]
-        cv_df = self.df[keys + [self.y]]
-        cv_df = cv_df.sort_values(by=keys).reset_index(drop=True)
+        self._cv_window = n_week_window
         # replace any negative point values with zero when calculating cv
-        cv_df[self.y] = cv_df[self.y].apply(lambda x: 0 if x < 0 else x)
-        sd = cv_df.groupby("pid")[self.y].apply(
-            lambda x: x.rolling(n_week_window).std()
-        )
-        mu = cv_df.groupby("pid")[self.y].apply(
-            lambda x: x.rolling(n_week_window).mean()
-        )
-        cv_df["cv"] = (sd / mu) * 100
-        # replace any inf values with nan
-        cv_df["cv"] = cv_df["cv"].apply(lambda x: np.nan if np.isinf(x) else x)
-        cv_df["cv"] = cv_df["cv"].apply(
-            lambda x: round(x) if not np.isnan(x) else np.nan
-        )
-        cv_df = cv_df.drop(columns=self.y)
-        self.df = pd.merge(self.df, cv_df, on=keys, how="inner")
+        self.df = self.df.assign(cv=_rolling_cv(self.df, self.y, n_week_window))
 
-    def create_ff_signature(self) -> dict:
+    def create_ff_signature(self, feature_store: FeatureStore = None) -> dict:
         """Creates a fantasy football 'signature', which includes the following steps:
 
             * Executes the previously created pipeline data transformations
             * Removes missing values stemming from lagged features or salary features
             * Replaces missing salary values with zero
 
+        Args:
+            feature_store (FeatureStore, optional): When provided, the signature
+                is loaded from the store if the same position, outcome, player
+                group columns, pipeline steps and data were used before, and
+                saved to the store otherwise. Defaults to None.
+
         Returns:
             dict: The names of the new features created by the pipeline and the
             transformed dataframe.
         """
-        all_feature_steps = "[" + self._pipeline_steps + "]"
-        if all_feature_steps == "[]":
+        if not self._pipeline_step_specs:
             return {"feature_df": self.df, "pipeline_feature_names": None}
-        pipeline = Pipeline(steps=eval(all_feature_steps))
+        if feature_store is None:
+            return self._create_ff_signature()
+        key = feature_store.create_key(
+            position=self.position,
+            y=self.y,
+            player_group_columns=self.player_group_columns,
+            pipeline_step_specs=self._pipeline_step_specs,
+            data_checksum=feature_store.create_data_checksum(self.df),
+        )
+        signature = feature_store.get(key)
+        if signature is None:
+            signature = self._create_ff_signature()
+            feature_store.put(key, signature, position=self.position, y=self.y)
+        return signature
+
+    def _create_ff_signature(self) -> dict:
+        """Executes the pipeline and post-processing steps of `create_ff_signature`."""
+        pipeline = Pipeline(steps=self._plan_pipeline_steps())
         feature_df = pipeline.fit_transform(self.df, y=self.df[self.y])
+        one_hot_categories = dict()
+        for _, step in pipeline.steps:
+            if isinstance(step, OneHotFeatureTransformer):
+                one_hot_categories.update(step.categories_)
         feature_df = self._remove_missing_feature_values(feature_df)
         if "salary" in feature_df.columns:
             feature_df = self._replace_missing_salary_values_with_zero(feature_df)
         # carry forward cv for each player to future week if cv in columns
         if "cv" in feature_df.columns:
             feature_df = self._forward_fill_future_week_cv(feature_df)
-        return {
+        signature = {
             "pipeline_feature_names": self.new_pipeline_features,
             "feature_df": feature_df,
         }
+        if one_hot_categories:
+            signature["one_hot_categories"] = one_hot_categories
+        return signature
+
+    def create_feature_state(self) -> PlayerFeatureState:
+        """Creates a compact per-player rolling state from the completed weeks,
+        covering the lag, moving average and cv features added so far.
+
+        The state can be saved, updated with each newly completed week and used
+        to score the upcoming week without rebuilding the full feature history.
+
+        Returns:
+            PlayerFeatureState: State fitted on all completed weeks.
+        """
+        history_df = self.df
+        if "is_future_week" in history_df.columns:
+            history_df = history_df[history_df["is_future_week"] == 0]
+        feature_state = PlayerFeatureState(
+            window_specs=self._window_specs(),
+            player_group_columns=self.player_group_columns,
+            y=self.y,
+            cv_window=self._cv_window,
+            game_week_column=self.game_week_column,
+            min_games=self._weeks_to_drop(
+                list(self.df.columns) + self.new_pipeline_features
+            ),
+        )
+        return feature_state.fit(history_df)
+
+    def transform_future_week(self, feature_state: PlayerFeatureState) -> pd.DataFrame:
+        """Adds lag, moving average and cv features to the future week
+        from a per-player rolling state.
+
+        Args:
+            feature_state (PlayerFeatureState): State covering all completed weeks.
+
+        Raises:
+            ValueError: If the future week has not been created.
+
+        Returns:
+            pd.DataFrame: Future week rows with features added.
+        """
+        if "is_future_week" not in self.df.columns:
+            raise ValueError("Future week not found. Call `create_future_week` first")
+        future_week_df = self.df[self.df["is_future_week"] == 1]
+        return feature_state.transform(future_week_df)
+
+    @classmethod
+    def _validate_recipe(cls, recipe: List[tuple]) -> None:
+        """Validates that each recipe step names a FantasyFeatures method.
+
+        Args:
+            recipe (List[tuple]): (method_name, kwargs) steps.
+
+        Raises:
+            ValueError: If a step is not a public FantasyFeatures method.
+        """
+        excluded_methods = {"build_all_positions", "create_ff_signature"}
+        for method_name, _ in recipe:
+            if (
+                method_name.startswith("_")
+                or method_name in excluded_methods
+                or not callable(getattr(cls, method_name, None))
+            ):
+                raise ValueError(f"{method_name} is not a valid recipe step")
+
+    @classmethod
+    def build_all_positions(
+        cls,
+        df: pd.DataFrame,
+        y: str,
+        recipe: List[tuple],
+        positions: List[str] = ["QB", "RB", "WR", "TE"],
+        player_group_columns: list = ["pid", "name", "team", "season_year"],
+        game_week_column: str = "week",
+        n_jobs: int = None,
+    ) -> dict:
+        """Builds the same feature recipe for several positions in parallel
+        from a single load of the data.
+
+        The dataframe is sorted and partitioned by position once. Each position
+        is then built in its own worker process. Where the platform supports
+        forking, the partitions are inherited read-only by the workers rather
+        than pickled and sent to each of them.
+
+        Args:
+            df (pd.DataFrame): Dataframe containing player data by season.
+            y (str): Name of the outcome column.
+            recipe (List[tuple]): Ordered (method_name, kwargs) steps applied to
+                each position, e.g. [("add_lag_feature",
+                {"n_week_lag": 1, "lag_columns": "ff_pts_yahoo"})].
+            positions (List[str], optional): Positions to build.
+                Defaults to ["QB", "RB", "WR", "TE"].
+            player_group_columns (list, optional): Columns used to group players.
+                Defaults to ["pid", "name", "team", "season_year"].
+            game_week_column (str, optional): Indicates week of season.
+                Defaults to "week".
+            n_jobs (int, optional): Number of worker processes. Defaults to one
+                per position. When 1, positions are built in the current process.
+
+        Raises:
+            ValueError: If a requested position is not present in the dataframe.
+
+        Returns:
+            dict: The fantasy football signature of each position, keyed by position.
+        """
+        cls._validate_recipe(recipe)
+        n_jobs = n_jobs or len(positions)
+        sorted_df = df.sort_values(player_group_columns + [game_week_column])
+        # team totals cover every position, so they are added before the
+        # frame is partitioned by position
+        share_columns = list()
+        for method_name, kwargs in recipe:
+            if method_name == "add_team_share_feature":
+                columns = kwargs["share_columns"]
+                share_columns += [columns] if isinstance(columns, str) else columns
+        if share_columns:
+            sorted_df = _add_team_total_columns(
+                sorted_df, sorted_df, share_columns, game_week_column
+            )
+        position_frames = {
+            position: position_df.reset_index(drop=True)
+            for position, position_df in sorted_df.groupby("position", sort=False)
+            if position in positions
+        }
+        missing_positions = set(positions) - set(position_frames)
+        if missing_positions:
+            raise ValueError(f"No data found for positions: {missing_positions}")
+        build_args = (y, recipe, player_group_columns, game_week_column)
+        if n_jobs == 1:
+            return {
+                position: _build_position_features(
+                    position, *build_args, position_frames[position]
+                )
+                for position in positions
+            }
+        is_fork = "fork" in multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if is_fork else None)
+        _SHARED_POSITION_FRAMES.update(position_frames)
+        try:
+            with ProcessPoolExecutor(max_workers=n_jobs, mp_context=context) as pool:
+                futures = {
+                    position: pool.submit(
+                        _build_position_features,
+                        position,
+                        *build_args,
+                        None if is_fork else position_frames[position],
+                    )
+                    for position in positions
+                }
+                return {
+                    position: future.result() for position, future in futures.items()
+                }
+        finally:
+            for position in position_frames:
+                _SHARED_POSITION_FRAMES.pop(position, None)
+
+    @staticmethod
+    def _to_float32(df: pd.DataFrame, column: str) -> np.ndarray:
+        """Converts a feature column to float32.
+
+        Raises:
+            ValueError: If the column is not numeric.
+        """
+        try:
+            return df[column].to_numpy(dtype=np.float32)
+        except (TypeError, ValueError):
+            raise ValueError(f"{column} is not numeric")
+
+    def export_model_matrix(
+        self,
+        signature: dict,
+        feature_names: List[str] = None,
+        output: str = "numpy",
+        path: PosixPath = None,
+    ) -> dict:
+        """Exports a signature as a model-ready feature matrix, target vector
+        and row metadata (pid, season_year, week, position and the player group
+        columns), which can be used to group results by position or player.
+
+        The feature matrix is allocated once as a C-contiguous float32 array and
+        each feature column is written into it directly, avoiding the copies
+        made by selecting columns from the feature frame and converting them.
+        When the signature has one-hot features, their sparse block is stacked
+        after the dense features and X is returned as a float32 CSR matrix.
+
+        Args:
+            signature (dict): Output of `create_ff_signature`.
+            feature_names (List[str], optional): Features to export. Defaults to
+                the 'pipeline_feature_names' of the signature.
+            output (str, optional): One of 'numpy', 'npy' or 'arrow'. 'npy' writes
+                the feature matrix to `path` and returns it memory-mapped
+                read-only. 'arrow' returns a pyarrow RecordBatch with one column
+                per feature, the target and the metadata. Defaults to 'numpy'.
+            path (PosixPath, optional): Destination of the .npy file when
+                output is 'npy'.
+
+        Raises:
+            ValueError: If output is not a supported format.
+            ValueError: If output is 'npy' and no path is provided.
+            ValueError: If output is not 'numpy' and there are one-hot features.
+            ValueError: If a feature column is not numeric.
+
+        Returns:
+            dict: 'X', 'y', 'feature_names' and 'metadata', or 'record_batch'
+            when output is 'arrow'.
+        """
+        if output not in ["numpy", "npy", "arrow"]:
+            raise ValueError("output must be one of 'numpy', 'npy' or 'arrow'")
+        if output == "npy" and path is None:
+            raise ValueError("A path is required when output is 'npy'")
+        one_hot_categories = signature.get("one_hot_categories")
+        if one_hot_categories and output != "numpy":
+            raise ValueError("One-hot features can only be exported as 'numpy'")
+        feature_df = signature["feature_df"]
+        feature_names = feature_names or signature["pipeline_feature_names"] or []
+        missing_columns = set(feature_names) - set(feature_df.columns)
+        if missing_columns:
+            raise ValueError(f"{missing_columns} not in feature dataframe")
+        metadata_columns = [
+            column
+            for column in dict.fromkeys(
+                ["pid", "season_year", self.game_week_column, "position"]
+                + self.player_group_columns
+            )
+            if column in feature_df.columns
+        ]
+        metadata_df = feature_df[metadata_columns].reset_index(drop=True)
+        y = pd.to_numeric(feature_df[self.y]).to_numpy(dtype=np.float32)
+        if output == "arrow":
+            import pyarrow as pa
+
+            arrays = [
+                pa.array(self._to_float32(feature_df, column))
+                for column in feature_names
+            ]
+            arrays += [pa.array(y)]
+            arrays += [pa.array(metadata_df[column]) for column in metadata_columns]
+            record_batch = pa.RecordBatch.from_arrays(
+                arrays, names=feature_names + [self.y] + metadata_columns
+            )
+            return {"record_batch": record_batch, "feature_names": feature_names}
+        shape = (feature_df.shape[0], len(feature_names))
+        if output == "npy":
+            X = np.lib.format.open_memmap(
+                path, mode="w+", dtype=np.float32, shape=shape
+            )
+        else:
+            X = np.empty(shape, dtype=np.float32, order="C")
+        for column_index, column in enumerate(feature_names):
+            X[:, column_index] = self._to_float32(feature_df, column)
+        if output == "npy":
+            X.flush()
+            X = np.load(path, mmap_mode="r")
+        if one_hot_categories:
+            X_one_hot, one_hot_names = OneHotFeatureTransformer.to_sparse(
+                feature_df, one_hot_categories
+            )
+            X = sparse.hstack([sparse.csr_matrix(X), X_one_hot], format="csr")
+            feature_names = feature_names + one_hot_names
+        return {
+            "X": X,
+            "y": y,
+            "feature_names": feature_names,
+            "metadata": metadata_df,
+        }
@@ -0,0 +1,242 @@
+from __future__ import annotations  # noqa: F404
+
+import argparse
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path, PosixPath
+from typing import List, Union
+
+import pandas as pd
+
+logger = logging.getLogger("featurestore")
+logger.setLevel(logging.INFO)
+
+default_store_dir = Path.home() / ".fantasyfootball" / "feature_store"
+
+
+class FeatureStore:
+    """Local store of feature frames created by `FantasyFeatures.create_ff_signature`.
+
+    Each entry holds the `feature_df` as a parquet file, along with the
+    `pipeline_feature_names` and the dtypes of the frame, so a loaded frame
+    matches the stored one, index and dtypes included. Entries are keyed by a
+    hash of the position, outcome, player group columns, ordered pipeline
+    steps and a checksum of the data.
+    When the total size of the store exceeds `max_size_mb`, the least
+    recently used entries are removed. Writing parquet requires pyarrow.
+
+    Args:
+        store_dir (PosixPath, optional): Directory containing the store.
+            Defaults to ~/.fantasyfootball/feature_store.
+        max_size_mb (float, optional): Maximum size of the store in megabytes.
+            Defaults to 500.
+    """
+
+    index_name = "index.json"
+
+    def __init__(
+        self, store_dir: PosixPath = default_store_dir, max_size_mb: float = 500
+    ):
+        self.store_dir = Path(store_dir)
+        self.max_size_mb = max_size_mb
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def create_key(
+        position: str,
+        y: str,
+        player_group_columns: list,
+        pipeline_step_specs: list,
+        data_checksum: str,
+    ) -> str:
+        """Creates the key of a feature frame.
+
+        Args:
+            position (str): Position of players in the feature frame.
+            y (str): Name of the outcome column.
+            player_group_columns (list): Columns used to group players.
+            pipeline_step_specs (list): Ordered (step, transformer_name, params)
+                specs of the pipeline.
+            data_checksum (str): Checksum of the data the features are built from.
+
+        Returns:
+            str: Hex digest identifying the feature frame.
+        """
+        signature = json.dumps(
+            [position, y, player_group_columns, pipeline_step_specs, data_checksum],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(signature.encode()).hexdigest()
+
+    @staticmethod
+    def create_data_checksum(df: pd.DataFrame) -> str:
+        """Creates a checksum of a dataframe's columns and values.
+
+        Args:
+            df (pd.DataFrame): The dataframe to checksum.
+
+        Returns:
+            str: Hex digest of the dataframe.
+        """
+        row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        checksum = hashlib.sha256(row_hashes.tobytes())
+        checksum.update(json.dumps(df.columns.tolist(), default=str).encode())
+        return checksum.hexdigest()
+
+    def _read_index(self) -> dict:
+        index_path = self.store_dir / self.index_name
+        if not index_path.exists():
+            return dict()
+        with open(index_path) as f:
+            return json.load(f)
+
+    def _write_index(self, index: dict) -> None:
+        index_path = self.store_dir / self.index_name
+        temp_path = index_path.with_suffix(".tmp")
+        with open(temp_path, "w") as f:
+            json.dump(index, f, indent=2)
+        temp_path.replace(index_path)
+
+    def get(self, key: str) -> Union[dict, None]:
+        """Loads a feature frame from the store.
+
+        Args:
+            key (str): Key of the feature frame.
+
+        Returns:
+            Union[dict, None]: The signature with 'feature_df',
+            'pipeline_feature_names' and, when present, 'one_hot_categories',
+            or None if the key is not in the store.
+        """
+        index = self._read_index()
+        entry = index.get(key)
+        if entry is None or not (self.store_dir / entry["file_name"]).exists():
+            return None
+        feature_df = pd.read_parquet(self.store_dir / entry["file_name"])
+        # parquet infers the type of object columns (e.g., floats), so the
+        # stored dtypes are restored
+        dtypes = entry.get("dtypes", dict())
+        changed_dtypes = {
+            column: dtype
+            for column, dtype in dtypes.items()
+            if str(feature_df[column].dtype) != dtype
+        }
+        if changed_dtypes:
+            feature_df = feature_df.astype(changed_dtypes)
+        entry["last_accessed"] = time.time()
+        self._write_index(index)
+        logger.info(f"Loaded features {key[:12]} from the feature store")
+        signature = {
+            "pipeline_feature_names": entry["pipeline_feature_names"],
+            "feature_df": feature_df,
+        }
+        if entry.get("one_hot_categories"):
+            signature["one_hot_categories"] = entry["one_hot_categories"]
+        return signature
+
+    def put(self, key: str, signature: dict, **metadata) -> None:
+        """Writes a feature frame to the store.
+
+        Args:
+            key (str): Key of the feature frame.
+            signature (dict): Signature with 'feature_df' and 'pipeline_feature_names'.
+            **metadata: Additional fields saved with the entry (e.g., position).
+        """
+        file_name = f"{key}.parquet"
+        feature_df = signature["feature_df"]
+        feature_df.to_parquet(self.store_dir / file_name, index=True)
+        index = self._read_index()
+        index[key] = {
+            **metadata,
+            "file_name": file_name,
+            "pipeline_feature_names": signature["pipeline_feature_names"],
+            "one_hot_categories": signature.get("one_hot_categories"),
+            "dtypes": feature_df.dtypes.astype(str).to_dict(),
+            "size_bytes": (self.store_dir / file_name).stat().st_size,
+            "created": time.time(),
+            "last_accessed": time.time(),
+        }
+        index = self._evict(index, keep=key)
+        self._write_index(index)
+        logger.info(f"Saved features {key[:12]} to the feature store")
+
+    def _evict(self, index: dict, keep: str = None) -> dict:
+        """Removes the least recently used entries until the store fits the cap."""
+        max_size_bytes = self.max_size_mb * 1024**2
+        total_size_bytes = sum(entry["size_bytes"] for entry in index.values())
+        for key in sorted(index, key=lambda x: index[x]["last_accessed"]):
+            if total_size_bytes <= max_size_bytes:
+                break
+            if key == keep:
+                continue
+            total_size_bytes -= index[key]["size_bytes"]
+            (self.store_dir / index.pop(key)["file_name"]).unlink(missing_ok=True)
+            logger.info(f"Evicted features {key[:12]} from the feature store")
+        return index
+
+    def list_entries(self) -> pd.DataFrame:
+        """Lists the entries in the store, most recently used first.
+
+        Returns:
+            pd.DataFrame: One row per entry.
+        """
+        index = self._read_index()
+        entries_df = pd.DataFrame(
+            [{"key": key, **entry} for key, entry in index.items()],
+            columns=["key", "position", "y", "size_bytes", "last_accessed"],
+        )
+        return entries_df.sort_values("last_accessed", ascending=False).reset_index(
+            drop=True
+        )
+
+    def purge(self, keys: List[str] = None) -> int:
+        """Removes entries from the store.
+
+        Args:
+            keys (List[str], optional): Keys, or key prefixes, to remove.
+                Defaults to None, which removes every entry.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        index = self._read_index()
+        purge_keys = [
+            key
+            for key in index
+            if keys is None or any(key.startswith(prefix) for prefix in keys)
+        ]
+        for key in purge_keys:
+            (self.store_dir / index.pop(key)["file_name"]).unlink(missing_ok=True)
+        self._write_index(index)
+        return len(purge_keys)
+
+
+def main(args: List[str] = None) -> None:
+    """Command line interface to list and purge feature store entries.
+
+    Example:
+        $ python -m fantasyfootball.store list
+        $ python -m fantasyfootball.store purge --key 3f2a9c
+    """
+    parser = argparse.ArgumentParser(description="Manage the local feature store")
+    parser.add_argument("command", choices=["list", "purge"])
+    parser.add_argument(
+        "--store_dir", type=str, default=str(default_store_dir), help="Store directory"
+    )
+    parser.add_argument(
+        "--key", type=str, nargs="*", help="Keys (or key prefixes) to purge"
+    )
+    parsed_args = parser.parse_args(args)
+    feature_store = FeatureStore(store_dir=Path(parsed_args.store_dir))
+    if parsed_args.command == "list":
+        print(feature_store.list_entries().to_string(index=False))
+    else:
+        n_purged = feature_store.purge(keys=parsed_args.key)
+        print(f"Purged {n_purged} feature store entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+from __future__ import annotations  # noqa: F404
+
+import hashlib
+import json
+import logging
+from pathlib import Path, PosixPath
+from typing import Callable, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+
+from fantasyfootball.store import FeatureStore
+
+logger = logging.getLogger("fantasyvalidation")
+logger.setLevel(logging.INFO)
+
+default_checkpoint_dir = Path.home() / ".fantasyfootball" / "backtest"
+
+
+class WalkForwardSplit:
+    """Walk-forward splits over NFL season weeks.
+
+    For every test week, the training rows are all rows from earlier weeks
+    (in season_year, then week order) and the test rows are the rows of that
+    week. Splits are index arrays into a single, precomputed feature matrix,
+    so features do not have to be rebuilt for each fold.
+
+    Args:
+        test_periods (List[Tuple[int, int]], optional): (season_year, week)
+            pairs to test. Defaults to None, which tests every week that has
+            at least `min_train_periods` earlier weeks.
+        min_train_periods (int, optional): Minimum number of earlier weeks
+            required to train. Defaults to 1.
+        season_year_column (str, optional): Defaults to "season_year".
+        game_week_column (str, optional): Defaults to "week".
+    """
+
+    def __init__(
+        self,
+        test_periods: List[Tuple[int, int]] = None,
+        min_train_periods: int = 1,
+        season_year_column: str = "season_year",
+        game_week_column: str = "week",
+    ):
+        self.test_periods = test_periods
+        self.min_train_periods = min_train_periods
+        self.season_year_column = season_year_column
+        self.game_week_column = game_week_column
+
+    def _period_codes(self, X: pd.DataFrame) -> np.ndarray:
+        season_year = X[self.season_year_column].to_numpy(dtype=np.int64)
+        week = X[self.game_week_column].to_numpy(dtype=np.int64)
+        return season_year * 100 + week
+
+    def get_test_periods(self, X: pd.DataFrame) -> List[Tuple[int, int]]:
+        """Returns the (season_year, week) of each split, in split order.
+
+        Args:
+            X (pd.DataFrame): Row metadata with season year and week columns.
+
+        Returns:
+            List[Tuple[int, int]]: The tested (season_year, week) pairs.
+        """
+        all_periods = np.unique(self._period_codes(X))
+        # number of earlier weeks available to train on
+        n_earlier_periods = np.arange(len(all_periods))
+        periods = all_periods[n_earlier_periods >= self.min_train_periods]
+        if self.test_periods is not None:
+            requested = [
+                season_year * 100 + week for season_year, week in self.test_periods
+            ]
+            periods = periods[np.isin(periods, requested)]
+        return [(int(period // 100), int(period % 100)) for period in periods]
+
+    def get_n_splits(self, X: pd.DataFrame, y=None, groups=None) -> int:
+        return len(self.get_test_periods(X))
+
+    def split(
+        self, X: pd.DataFrame, y=None, groups=None
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Generates train and test row indices for each test week.
+
+        Args:
+            X (pd.DataFrame): Row metadata with season year and week columns.
+
+        Yields:
+            Tuple[np.ndarray, np.ndarray]: Train and test row indices.
+        """
+        codes = self._period_codes(X)
+        order = np.argsort(codes, kind="stable")
+        sorted_codes = codes[order]
+        for season_year, week in self.get_test_periods(X):
+            period = season_year * 100 + week
+            start = np.searchsorted(sorted_codes, period, side="left")
+            end = np.searchsorted(sorted_codes, period, side="right")
+            yield np.sort(order[:start]), np.sort(order[start:end])
+
+
+def _fit_predict_fold(
+    estimator, X: np.ndarray, y: np.ndarray, train: np.ndarray, test: np.ndarray
+) -> np.ndarray:
+    train = train[~np.isnan(y[train])]
+    estimator.fit(X[train], y[train])
+    return estimator.predict(X[test])
+
+
+def _score_predictions(predictions_df: pd.DataFrame) -> pd.Series:
+    error = predictions_df["y_pred"] - predictions_df["y"]
+    return pd.Series(
+        {
+            "n_obs": predictions_df.shape[0],
+            "mae": error.abs().mean(),
+            "rmse": np.sqrt((error**2).mean()),
+            "rank_corr": predictions_df["y"].corr(
+                predictions_df["y_pred"], method="spearman"
+            ),
+        }
+    )
+
+
+def walk_forward_validate(
+    estimator,
+    X: np.ndarray,
+    y: np.ndarray,
+    metadata: pd.DataFrame,
+    splitter: WalkForwardSplit = None,
+    n_jobs: int = -1,
+    return_predictions: bool = False,
+):
+    """Trains on all earlier weeks and predicts each test week, fitting the
+    folds in parallel with joblib. Training rows with a missing target, such
+    as the unplayed future week, are skipped.
+
+    Args:
+        estimator: A scikit-learn compatible estimator. A clone is fit per fold.
+        X (np.ndarray): Feature matrix, e.g. from
+            `FantasyFeatures.export_model_matrix`.
+        y (np.ndarray): Target vector.
+        metadata (pd.DataFrame): Row metadata with season_year and week columns,
+            plus an optional position column, e.g. from
+            `FantasyFeatures.export_model_matrix`. Metrics are reported by
+            position when it is present.
+        splitter (WalkForwardSplit, optional): Defaults to WalkForwardSplit().
+        n_jobs (int, optional): Number of parallel jobs. Defaults to -1 (all cores).
+        return_predictions (bool, optional): Also return the out-of-sample
+            predictions for each row. Defaults to False.
+
+    Returns:
+        pd.DataFrame: MAE, RMSE and Spearman rank correlation for each
+        position, season year and week. When return_predictions is True, a
+        tuple of the metrics and the predictions.
+    """
+    splitter = splitter or WalkForwardSplit()
+    metadata = metadata.reset_index(drop=True)
+    folds = list(splitter.split(metadata))
+    logger.info(f"Fitting {len(folds)} walk-forward folds")
+    y = np.asarray(y, dtype=float)
+    fold_predictions = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_predict_fold)(clone(estimator), X, y, train, test)
+        for train, test in folds
+    )
+    test_index = np.concatenate([test for _, test in folds]) if folds else []
+    predictions_df = metadata.iloc[test_index].assign(
+        y=y[test_index],
+        y_pred=np.concatenate(fold_predictions) if folds else [],
+    )
+    by = [splitter.season_year_column, splitter.game_week_column]
+    if "position" in metadata.columns:
+        by = ["position"] + by
+    metrics_df = (
+        predictions_df.groupby(by).apply(_score_predictions).reset_index()
+        if folds
+        else pd.DataFrame(columns=by + ["n_obs", "mae", "rmse", "rank_corr"])
+    )
+    if return_predictions:
+        return metrics_df, predictions_df
+    return metrics_df
+
+
+def _backtest_week(
+    estimator,
+    X: np.ndarray,
+    y: np.ndarray,
+    group_codes: np.ndarray,
+    train: np.ndarray,
+    test: np.ndarray,
+    checkpoint_path: PosixPath,
+) -> pd.DataFrame:
+    """Fits one model per group on the training rows, predicts the test rows
+    and checkpoints the predictions of the week to disk."""
+    train = train[~np.isnan(y[train])]
+    y_pred = np.full(len(test), np.nan)
+    for group_code in np.unique(group_codes[test]):
+        group_train = train[group_codes[train] == group_code]
+        is_group_test = group_codes[test] == group_code
+        if not len(group_train):
+            continue
+        group_estimator = clone(estimator).fit(X[group_train], y[group_train])
+        y_pred[is_group_test] = group_estimator.predict(X[test[is_group_test]])
+    week_df = pd.DataFrame({"row": test, "y_pred": y_pred})
+    # written to a temporary file first, so a crash never leaves a partial week
+    temp_path = checkpoint_path.with_suffix(".tmp")
+    week_df.to_pickle(temp_path)
+    temp_path.replace(checkpoint_path)
+    return week_df
+
+
+def backtest(
+    estimator,
+    feature_df: pd.DataFrame,
+    y: str,
+    feature_names: List[str],
+    test_periods: List[Tuple[int, int]] = None,
+    min_train_periods: int = 1,
+    group_column: str = "position",
+    id_columns: List[str] = ["pid", "name", "team", "position"],
+    inverse_transform: Callable = None,
+    checkpoint_dir: PosixPath = default_checkpoint_dir,
+    n_jobs: int = -1,
+) -> pd.DataFrame:
+    """Retrains a model every week and predicts the following week, as
+    `filter_to_prior_week` followed by a model fit would, over many weeks.
+
+    Features are computed once, e.g. by `FantasyFeatures.create_ff_signature`
+    on the full date range, and each test week is trained on all rows from
+    earlier weeks. Lag, moving average and other window features only use
+    prior weeks, so they match the features built from `filter_to_prior_week`
+    data. Transformers fit on every row (e.g., target encoding) are not refit
+    each week.
+
+    Weeks are fit in parallel with joblib worker processes. The predictions of
+    each completed week are checkpointed to `checkpoint_dir`, keyed by the
+    estimator, features and data, so a rerun of an interrupted backtest only
+    fits the remaining weeks.
+
+    Args:
+        estimator: A scikit-learn compatible estimator. A clone is fit per week
+            and group.
+        feature_df (pd.DataFrame): Features, outcome and id columns, with
+            season_year and week columns.
+        y (str): Name of the outcome column.
+        feature_names (List[str]): Columns used as features.
+        test_periods (List[Tuple[int, int]], optional): (season_year, week)
+            pairs to predict. Defaults to None, which predicts every week with
+            at least `min_train_periods` earlier weeks.
+        min_train_periods (int, optional): Minimum number of earlier weeks
+            required to train. Defaults to 1.
+        group_column (str, optional): A separate model is fit for each value of
+            this column. Defaults to "position". None fits a single model.
+        id_columns (List[str], optional): Columns identifying each player,
+            kept in the results. Defaults to ["pid", "name", "team", "position"].
+        inverse_transform (Callable, optional): Applied to the outcome and the
+            predictions, e.g. np.expm1 after `log_transform_y`. Defaults to None.
+        checkpoint_dir (PosixPath, optional): Directory of the checkpoints.
+            Defaults to ~/.fantasyfootball/backtest.
+        n_jobs (int, optional): Number of parallel jobs. Defaults to -1 (all cores).
+
+    Returns:
+        pd.DataFrame: One row per player and test week with the id columns,
+        season_year, week, the outcome `y` and the prediction `{y}_pred`,
+        ready for `benchmarking.evaluate`.
+    """
+    feature_df = feature_df.reset_index(drop=True)
+    splitter = WalkForwardSplit(
+        test_periods=test_periods, min_train_periods=min_train_periods
+    )
+    X = feature_df[feature_names].to_numpy(dtype=np.float64)
+    y_values = feature_df[y].to_numpy(dtype=np.float64)
+    if group_column is None:
+        group_codes = np.zeros(feature_df.shape[0], dtype=np.int64)
+    else:
+        group_codes = pd.factorize(feature_df[group_column])[0]
+    run_key = hashlib.sha256(
+        json.dumps(
+            [
+                type(estimator).__name__,
+                estimator.get_params(),
+                y,
+                feature_names,
+                group_column,
+                FeatureStore.create_data_checksum(feature_df),
+            ],
+            sort_keys=True,
+            default=str,
+        ).encode()
+    ).hexdigest()
+    run_dir = Path(checkpoint_dir) / run_key[:16]
+    run_dir.mkdir(parents=True, exist_ok=True)
+    week_dfs, jobs = list(), list()
+    for (season_year, week), (train, test) in zip(
+        splitter.get_test_periods(feature_df), splitter.split(feature_df)
+    ):
+        checkpoint_path = run_dir / f"{season_year}_{week:02d}.pkl"
+        if checkpoint_path.exists():
+            week_dfs.append(pd.read_pickle(checkpoint_path))
+        else:
+            jobs.append((train, test, checkpoint_path))
+    logger.info(
+        f"Backtesting {len(jobs)} weeks; {len(week_dfs)} weeks loaded from "
+        f"checkpoints in {run_dir}"
+    )
+    week_dfs += Parallel(n_jobs=n_jobs)(
+        delayed(_backtest_week)(
+            estimator, X, y_values, group_codes, train, test, checkpoint_path
+        )
+        for train, test, checkpoint_path in jobs
+    )
+    predictions_df = (
+        pd.concat(week_dfs).sort_values("row")
+        if week_dfs
+        else pd.DataFrame({"row": [], "y_pred": []})
+    )
+    rows = predictions_df["row"].to_numpy(dtype=np.int64)
+    id_columns = [col for col in id_columns if col in feature_df.columns]
+    results_df = feature_df.loc[
+        rows,
+        list(
+            dict.fromkeys(
+                id_columns + [splitter.season_year_column, splitter.game_week_column, y]
+            )
+        ),
+    ]
+    results_df[f"{y}_pred"] = predictions_df["y_pred"].to_numpy()
+    if inverse_transform is not None:
+        results_df[[y, f"{y}_pred"]] = inverse_transform(results_df[[y, f"{y}_pred"]])
+    return results_df.reset_index(drop=True)
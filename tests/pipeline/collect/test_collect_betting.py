@@ -0,0 +1,120 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path.cwd()))
+
+from pipeline.collect.collect_betting import (  # noqa: E402
+    is_matchup_table,
+    parse_betting_page,
+    parse_historical_betting_page,
+)
+
+
+def create_table(rows: list) -> str:
+    "Renders rows as an html table, with the first row as the header."
+    header, *body = rows
+    return (
+        "<table><thead><tr>"
+        + "".join(f"<th>{value}</th>" for value in header)
+        + "</tr></thead><tbody>"
+        + "".join(
+            "<tr>" + "".join(f"<td>{value}</td>" for value in row) + "</tr>"
+            for row in body
+        )
+        + "</tbody></table>"
+    )
+
+
+def test_parse_betting_page():
+    matchup_tables = [
+        create_table(
+            [
+                ["Team", "Spread", "Moneyline", "Total", "Picks"],
+                [f"Team{i}A", "-3.5", "-180", "O 44.5", "Pick"],
+                [f"Team{i}B", "+3.5", "+150", "U 44.5", "Pick"],
+            ]
+        )
+        for i in range(17)
+    ]
+    navigation_table = create_table([["Odds", "Picks"], ["NFL", "NCAAF"]])
+    # same width as a matchup table, but not a matchup
+    standings_table = create_table(
+        [["Team", "W", "L", "T", "Pct"], ["Bills", "13", "3", "0", ".813"]]
+    )
+    betting_page = (
+        "<html>"
+        + navigation_table
+        + "".join(matchup_tables)
+        + standings_table
+        + "</html>"
+    )
+    betting_df = parse_betting_page(betting_page)
+    # every matchup is parsed, rather than the first 16
+    assert betting_df.shape == (34, 4)
+    assert betting_df.columns.tolist() == [
+        "team",
+        "spread",
+        "moneyline",
+        "total_points",
+    ]
+    assert betting_df["team"].iloc[-1] == "Team16B"
+
+
+def test_parse_historical_betting_page():
+    header_tables = "".join(create_table([["Season"], [2022]]) for _ in range(5))
+    games_table = create_table(
+        [
+            [f"column_{i}" for i in range(11)],
+            [
+                "Thu",
+                "Sep 8, 2022",
+                "8:20 PM",
+                "@",
+                "Los Angeles Rams",
+                "L 10-31",
+                "L -5",
+                "@",
+                "Buffalo Bills",
+                "O 104",
+                "",
+            ],
+            [
+                "Sun",
+                "Sep 11, 2022",
+                "1:00 PM",
+                "",
+                "Baltimore Ravens",
+                "W 24-9",
+                "W -14",
+                "@",
+                "New York Jets",
+                "U 88",
+                "",
+            ],
+            ["Total"] * 11,
+        ]
+    )
+    betting_df = parse_historical_betting_page(
+        "<html>" + header_tables + games_table + "</html>", season_year=2022
+    )
+    expected = pd.DataFrame(
+        {
+            "team": ["LAR", "BUF", "BAL", "NYJ"],
+            "opp": ["BUF", "LAR", "NYJ", "BAL"],
+            "projected_off_pts": [54.0, 50.0, 51.0, 37.0],
+            "date": pd.to_datetime(
+                ["2022-09-08", "2022-09-08", "2022-09-11", "2022-09-11"]
+            ),
+            "season_year": [2022] * 4,
+        }
+    )
+    pd.testing.assert_frame_equal(betting_df, expected)
+
+
+def test_is_matchup_table():
+    columns = ["Team", "Spread", "Moneyline", "Total", "Picks"]
+    assert is_matchup_table(pd.DataFrame(columns=columns))
+    assert not is_matchup_table(pd.DataFrame(columns=columns[:4]))
+    assert not is_matchup_table(pd.DataFrame(columns=["Team", "W", "L", "T", "Pct"]))
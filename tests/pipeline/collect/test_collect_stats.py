@@ -6,8 +6,10 @@ import pytest
 sys.path.append(str(Path.cwd()))
 
 from pipeline.collect.collect_stats import (  # noqa: E402
+    PlayerIdRanker,
     clean_player_name,
     create_abbr_name_combo,
+    create_probe_batches,
     create_player_id,
     first_name_is_abbr,
 )
@@ -136,3 +138,36 @@ def test_create_player_id_apostrophe():
         "OShaJa09",
     ]
     assert create_player_id(first_name, last_name) == expected
+
+
+def test_PlayerIdRanker():
+    ranker = PlayerIdRanker(
+        {
+            "HarrDe00": "Desmond Harris",
+            "HarrDe06": "Demone Harris",
+            "MoorD.00": "D.J. Moore",
+        }
+    )
+    ranked_ids = ranker.rank("Deonte Harris", create_player_id("Deonte", "Harris"))
+    # the next unused suffix is most likely, and ids of other players are last
+    assert ranked_ids[0][0] == "HarrDe07"
+    assert [player_id for player_id, _ in ranked_ids[-2:]] == ["HarrDe00", "HarrDe06"]
+    assert ranked_ids[-1][1] == 0
+    assert sum(likelihood for _, likelihood in ranked_ids) == pytest.approx(1)
+    # abbreviated first names most often use the single period convention
+    ranked_ids = ranker.rank("D.K. Metcalf", create_player_id("D.K.", "Metcalf"))
+    assert ranked_ids[0][0] == "MetcD.00"
+
+
+def test_create_probe_batches():
+    ranked_ids = [("a", 0.6), ("b", 0.3), ("c", 0.05), ("d", 0.05)]
+    assert create_probe_batches(ranked_ids, batch_size=3, probe_mass=0.85) == [
+        ["a", "b"],
+        ["c", "d"],
+    ]
+    assert create_probe_batches(ranked_ids, batch_size=1) == [
+        ["a"],
+        ["b"],
+        ["c"],
+        ["d"],
+    ]
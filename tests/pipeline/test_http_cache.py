@@ -0,0 +1,120 @@
+import asyncio
+import sys
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path.cwd()))
+from pipeline.http_cache import CacheMissError, HttpCache  # noqa: E402
+from pipeline.scraper import AsyncScraper  # noqa: E402
+
+PAGE = "<table><tr><td>2021-09-09</td><td>TAM</td></tr></table>"
+
+
+class ETagPageHandler(BaseHTTPRequestHandler):
+    """Serves the same page at every path, with an ETag, answering requests
+    that send the current ETag with HTTP 304: Not Modified."""
+
+    etag = '"v1"'
+    requests = Counter()
+    not_modified = Counter()
+
+    def do_GET(self):
+        self.requests[self.path] += 1
+        if self.path == "/missing/":
+            self.send_response(404)
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == self.etag:
+            self.not_modified[self.path] += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", self.etag)
+        self.end_headers()
+        self.wfile.write(PAGE.encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ETagPageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_http_cache_serves_fresh_response(server_url, tmp_path):
+    http_cache = HttpCache(tmp_path, ttls={"stats": 60})
+    url = f"{server_url}/fresh/"
+    assert http_cache.get(url, source="stats") == PAGE
+    response = http_cache.fetch(url, source="stats")
+    assert response.text == PAGE
+    assert response.from_cache
+    assert ETagPageHandler.requests["/fresh/"] == 1
+
+
+def test_http_cache_revalidates_stale_response(server_url, tmp_path):
+    http_cache = HttpCache(tmp_path, ttls={"default": 0})
+    url = f"{server_url}/stale/"
+    assert not http_cache.fetch(url).from_cache
+    response = http_cache.fetch(url)
+    assert response.text == PAGE
+    assert response.from_cache
+    assert ETagPageHandler.requests["/stale/"] == 2
+    assert ETagPageHandler.not_modified["/stale/"] == 1
+
+
+def test_http_cache_keys_by_headers(server_url, tmp_path):
+    http_cache = HttpCache(tmp_path, ttls={"default": 60})
+    url = f"{server_url}/headers/"
+    http_cache.get(url, headers={"User-Agent": "a"})
+    http_cache.get(url, headers={"User-Agent": "b"})
+    assert ETagPageHandler.requests["/headers/"] == 2
+    # both responses have the same body, which is stored once
+    assert len(list((tmp_path / "entries").glob("*.json"))) == 2
+    assert len(list((tmp_path / "bodies").glob("*.gz"))) == 1
+
+
+def test_http_cache_offline_replay(server_url, tmp_path):
+    url = f"{server_url}/offline/"
+    HttpCache(tmp_path).get(url)
+    offline_cache = HttpCache(tmp_path, ttls={"default": 0}, offline=True)
+    assert offline_cache.get(url) == PAGE
+    assert ETagPageHandler.requests["/offline/"] == 1
+    with pytest.raises(CacheMissError):
+        offline_cache.get(f"{server_url}/never_requested/")
+
+
+def test_http_cache_missing_page(server_url, tmp_path):
+    http_cache = HttpCache(tmp_path, ttls={"default": 60})
+    url = f"{server_url}/missing/"
+    assert http_cache.fetch(url).status_code == 404
+    assert not http_cache.fetch(url).ok
+    assert ETagPageHandler.requests["/missing/"] == 1
+
+
+def test_scraper_with_http_cache(server_url, tmp_path):
+    http_cache = HttpCache(tmp_path, ttls={"stats": 60})
+    scraper = AsyncScraper(
+        default_rate_limit=(100, 10), http_cache=http_cache, source="stats"
+    )
+    urls = [f"{server_url}/scraper/", f"{server_url}/scraper_other/"]
+    assert asyncio.run(scraper.fetch_all(urls)) == [PAGE, PAGE]
+    assert asyncio.run(scraper.fetch(urls[0])) == PAGE
+    scraper.close()
+    assert ETagPageHandler.requests["/scraper/"] == 1
+    offline_scraper = AsyncScraper(http_cache=HttpCache(tmp_path, offline=True))
+    assert asyncio.run(offline_scraper.fetch(urls[0])) == PAGE
+    # a cache miss is raised, rather than returned as a missing page
+    with pytest.raises(CacheMissError):
+        asyncio.run(offline_scraper.fetch(f"{server_url}/uncached/"))
+    offline_scraper.close()
+    assert ETagPageHandler.requests["/uncached/"] == 0
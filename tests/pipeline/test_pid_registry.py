@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path.cwd()))
+from pipeline.pid_registry import PidRegistry, load_pid_registry  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def datasets_dir(tmp_path_factory):
+    datasets_dir = tmp_path_factory.mktemp("season")
+    seasons = {
+        2020: [
+            ("Mike Williams", "LAC", "WR", "WillMi06"),
+            ("Tom Brady", "TAM", "QB", "BradTo00"),
+        ],
+        2021: [
+            ("Mike Williams", "NYJ", "WR", "WillMi07"),
+            ("Tom Brady", "TAM", "QB", "BradTo00"),
+        ],
+    }
+    for season_year, players in seasons.items():
+        season_dir = datasets_dir / str(season_year)
+        season_dir.mkdir()
+        players_df = pd.DataFrame(players, columns=["name", "team", "position", "pid"])
+        players_df[["pid", "name", "team"]].to_csv(
+            season_dir / "stats.gz", index=False, compression="gzip"
+        )
+        players_df[["name", "team", "position"]].to_csv(
+            season_dir / "players.gz", index=False, compression="gzip"
+        )
+    return datasets_dir
+
+
+def test_load_pid_registry(datasets_dir, tmp_path):
+    registry_path = tmp_path / "pid_registry.json"
+    pid_registry = load_pid_registry(registry_path, datasets_dir)
+    assert len(pid_registry) == 3
+    assert registry_path.exists()
+    assert len(PidRegistry(registry_path)) == 3
+
+
+def test_pid_registry_lookup(datasets_dir, tmp_path):
+    pid_registry = PidRegistry(tmp_path / "pid_registry.json")
+    pid_registry.seed(datasets_dir)
+    # a player's pid does not depend on the team
+    assert pid_registry.lookup("Tom Brady", "NWE", "QB") == "BradTo00"
+    # players with the same name are told apart by team
+    assert pid_registry.lookup("Mike Williams", "NYJ", "WR") == "WillMi07"
+    assert pid_registry.lookup("Mike Williams", "DAL", "WR") is None
+    assert pid_registry.lookup("Aaron Rodgers", "GNB", "QB") is None
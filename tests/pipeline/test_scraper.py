@@ -0,0 +1,243 @@
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path.cwd()))
+from pipeline.scraper import (  # noqa: E402
+    AsyncScraper,
+    TokenBucket,
+    TooManyRequestsError,
+)
+from pipeline.collect.collect_stats import (  # noqa: E402
+    PidClaims,
+    PlayerIdRanker,
+    collect_all_stats,
+    collect_stats_async,
+)
+from pipeline.pid_registry import PidRegistry  # noqa: E402
+
+# recorded gamelog page, trimmed to a single game
+GAMELOG_HTML = """<table><thead>
+<tr><th></th><th></th><th></th><th></th><th></th><th></th><th></th><th></th>
+<th></th><th colspan="2">Passing</th></tr>
+<tr><th>Rk</th><th>Year</th><th>Date</th><th>G#</th><th>Week</th><th>Tm</th>
+<th></th><th>Opp</th><th>Result</th><th>Cmp</th><th>Yds</th></tr>
+</thead><tbody>
+<tr><td>1</td><td>2021</td><td>2021-09-09</td><td>1</td><td>1</td><td>TAM</td>
+<td></td><td>DAL</td><td>W 31-29</td><td>32</td><td>379</td></tr>
+</tbody></table>"""
+
+
+class RecordedPageHandler(BaseHTTPRequestHandler):
+    """Serves recorded pages, answering the first `n_rejections` requests of a
+    path with HTTP 429."""
+
+    pages = {
+        "/players/B/BradTo01/gamelog/2021/": GAMELOG_HTML,
+        "/busy/": "ok",
+        "/always_busy/": "ok",
+    }
+    n_rejections = {"/busy/": 2, "/always_busy/": 100}
+    requests = Counter()
+
+    def do_GET(self):
+        self.requests[self.path] += 1
+        if self.requests[self.path] <= self.n_rejections.get(self.path, 0):
+            self.send_response(429)
+            self.end_headers()
+            return
+        page = self.pages.get(self.path)
+        self.send_response(404 if page is None else 200)
+        self.end_headers()
+        if page is not None:
+            self.wfile.write(page.encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RecordedPageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=20, capacity=1)
+
+    async def acquire(n_tokens):
+        for _ in range(n_tokens):
+            await bucket.acquire()
+
+    start_time = time.monotonic()
+    asyncio.run(acquire(5))
+    # the first token is available immediately, the other 4 take 1/20 seconds
+    assert time.monotonic() - start_time >= 0.19
+
+
+def test_scraper_retries_too_many_requests(server_url):
+    scraper = AsyncScraper(backoff_base=0.01, max_retries=3)
+    result = asyncio.run(scraper.fetch(f"{server_url}/busy/"))
+    assert result == "ok"
+    assert RecordedPageHandler.requests["/busy/"] == 3
+    assert asyncio.run(scraper.fetch(f"{server_url}/missing/")) is None
+
+
+def test_scraper_raises_after_retries(server_url):
+    scraper = AsyncScraper(backoff_base=0.01, max_retries=2)
+    with pytest.raises(TooManyRequestsError):
+        asyncio.run(scraper.fetch(f"{server_url}/always_busy/"))
+    assert RecordedPageHandler.requests["/always_busy/"] == 3
+
+
+def test_collect_stats_async(server_url):
+    scraper = AsyncScraper(default_rate_limit=(100, 10))
+    stats = asyncio.run(
+        collect_stats_async(
+            scraper,
+            player_name="Tom Brady",
+            player_team="TAM",
+            season_year=2021,
+            stats_url=server_url,
+            existing_player_data=set(),
+        )
+    )
+    assert stats["pid"].tolist() == ["BradTo01"]
+    assert stats["Passing_Yds"].tolist() == [379]
+
+
+def test_collect_stats_async_registered_player(server_url, tmp_path):
+    pid_registry = PidRegistry(tmp_path / "pid_registry.json")
+    pid_registry.record("Tom Brady", "TAM", "QB", "BradTo01", source="stats")
+    scraper = AsyncScraper(default_rate_limit=(100, 10))
+    n_requests = sum(RecordedPageHandler.requests.values())
+    stats = asyncio.run(
+        collect_stats_async(
+            scraper,
+            player_name="Tom Brady",
+            player_team="TAM",
+            season_year=2021,
+            stats_url=server_url,
+            existing_player_data=set(),
+            player_position="QB",
+            pid_registry=pid_registry,
+        )
+    )
+    assert stats["pid"].tolist() == ["BradTo01"]
+    # the registered pid is fetched directly, without probing
+    assert sum(RecordedPageHandler.requests.values()) == n_requests + 1
+
+
+def test_collect_stats_async_records_probed_player(server_url, tmp_path):
+    pid_registry = PidRegistry(tmp_path / "pid_registry.json")
+    scraper = AsyncScraper(default_rate_limit=(100, 10))
+    asyncio.run(
+        collect_stats_async(
+            scraper,
+            player_name="Tom Brady",
+            player_team="TAM",
+            season_year=2021,
+            stats_url=server_url,
+            existing_player_data=set(),
+            player_position="QB",
+            pid_registry=pid_registry,
+        )
+    )
+    assert pid_registry.list_entries() == [
+        {
+            "name": "Tom Brady",
+            "team": "TAM",
+            "position": "QB",
+            "pid": "BradTo01",
+            "source": "probe",
+            "probe_index": 1,
+        }
+    ]
+
+
+def test_collect_stats_async_ranked_probing(server_url):
+    player_id_ranker = PlayerIdRanker({"BradTo00": "Tim Brady"})
+    scraper = AsyncScraper(default_rate_limit=(100, 10))
+    n_requests = sum(RecordedPageHandler.requests.values())
+    stats = asyncio.run(
+        collect_stats_async(
+            scraper,
+            player_name="Tom Brady",
+            player_team="TAM",
+            season_year=2021,
+            stats_url=server_url,
+            existing_player_data=set(),
+            player_id_ranker=player_id_ranker,
+            probe_batch_size=1,
+        )
+    )
+    assert stats["pid"].tolist() == ["BradTo01"]
+    # the next unused suffix is probed first, rather than the taken 'BradTo00'
+    assert sum(RecordedPageHandler.requests.values()) == n_requests + 1
+
+
+def test_collect_stats_async_claims_pid_once(server_url, tmp_path):
+    pid_registry = PidRegistry(tmp_path / "pid_registry.json")
+    pid_registry.record("Tom Brady", "TAM", "QB", "BradTo01", source="stats")
+    pid_registry.record("Thomas Brady", "TAM", "QB", "BradTo01", source="stats")
+    scraper = AsyncScraper(default_rate_limit=(100, 10))
+    pid_claims = PidClaims()
+
+    async def collect_both():
+        return await asyncio.gather(
+            *[
+                collect_stats_async(
+                    scraper,
+                    player_name=player_name,
+                    player_team="TAM",
+                    season_year=2021,
+                    stats_url=server_url,
+                    existing_player_data=set(),
+                    player_position="QB",
+                    pid_registry=pid_registry,
+                    pid_claims=pid_claims,
+                )
+                for player_name in ["Tom Brady", "Thomas Brady"]
+            ]
+        )
+
+    all_stats = asyncio.run(collect_both())
+    # both players find the same gamelog, which only the first one keeps
+    assert sorted(stats.empty for stats in all_stats) == [False, True]
+    assert pid_claims.pids == {"BradTo01"}
+
+
+def test_collect_all_stats_skips_failed_players(server_url):
+    class FailingScraper(AsyncScraper):
+        async def fetch(self, url):
+            if "Brad" in url:
+                raise TooManyRequestsError(f"HTTP Error 429 for {url}")
+            return None
+
+    players = pd.DataFrame(
+        {
+            "name": ["Tom Brady", "Mike Evans"],
+            "team": ["TAM", "TAM"],
+            "position": ["QB", "WR"],
+        }
+    )
+    n_collected = asyncio.run(
+        collect_all_stats(
+            FailingScraper(),
+            players,
+            season_year=2021,
+            stats_url=server_url,
+            existing_player_data=set(),
+        )
+    )
+    assert n_collected == 0
@@ -1,3 +1,4 @@
+from datetime import datetime
 from pathlib import Path
 
 import pandas as pd
@@ -5,9 +6,12 @@ import pytest
 import sys
 
 sys.path.append(str(Path.cwd()))
+import pipeline.utils  # noqa: E402
 from pipeline.utils import (  # noqa: E402
     concat_ff_csv,
+    create_calendar,
     create_dir,
+    fetch_current_week,
     get_module_purpose,
     retrieve_team_abbreviation,
     collapse_cols_to_str,
@@ -123,3 +127,26 @@ def test_dedup_with_agg():
     strategy = "max"
     result = dedup_with_agg(duplicated_df, keys, agg_col, strategy)
     assert expected.equals(result)
+
+
+def test_fetch_current_week(monkeypatch):
+    pytest.importorskip("fantasyfootball.data")
+
+    class Wednesday(datetime):
+        @classmethod
+        def today(cls):
+            return cls(2022, 9, 14)
+
+    monkeypatch.setattr(pipeline.utils, "datetime", Wednesday)
+    calendar_df = pd.DataFrame(
+        {
+            "date": ["2022-09-11", "2022-09-18"],
+            "week": [1, 2],
+            "team": ["BUF", "BUF"],
+            "opp": ["LAR", "TEN"],
+            "is_away": [1, 0],
+            "season_year": [2022, 2022],
+        }
+    )
+    # the week of the coming Sunday
+    assert fetch_current_week(create_calendar(calendar_df)) == "2"
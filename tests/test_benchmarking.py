@@ -1,6 +1,8 @@
 import pytest
 import pandas as pd
+import numpy as np
 from fantasyfootball.benchmarking import (
+    evaluate,
     get_benchmarking_data,
     filter_to_prior_week,
     score_benchmark_data,
@@ -349,6 +351,27 @@ def test_score_benchmark_data(df):
     assert result.iloc[0][expected_col_name] == pytest.approx(expected_pts, 1)
 
 
+def test_score_benchmark_data_multiple_sources(df):
+    scoring_sources = ["yahoo", "draft kings"]
+    result = df.score_benchmark_data(scoring_sources)
+    assert result.columns.tolist() == [
+        "name",
+        "team",
+        "position",
+        "season_year",
+        "week",
+        "ff_pts_yahoo_fantasydata_pred",
+        "ff_pts_draft kings_fantasydata_pred",
+    ]
+    assert result.shape[0] == df.shape[0]
+    pd.testing.assert_series_equal(
+        result["ff_pts_yahoo_fantasydata_pred"],
+        df.score_benchmark_data("yahoo")["ff_pts_yahoo_fantasydata_pred"],
+    )
+    with pytest.raises(KeyError):
+        df.score_benchmark_data("unknown source")
+
+
 def test_filter_to_prior_week(df):
     expected = [1, 2, 3, 4, 5, 6, 7, 8, 10, 11, 12, 13, 14]
     season_year = 2021
@@ -357,13 +380,90 @@ def test_filter_to_prior_week(df):
     assert result["week"].tolist() == expected
 
 
-def test_get_benchmarking_data():
+def test_get_benchmarking_data(tmp_path):
     season_year_start = 2018  # min season start is 2015
     season_year_end = 2021
     result = get_benchmarking_data(
-        season_year_start=season_year_start, season_year_end=season_year_end
+        season_year_start=season_year_start,
+        season_year_end=season_year_end,
+        cache_dir=tmp_path,
     )
     assert not result.empty
+    # all seasons and weeks are loaded
+    assert result["season_year"].unique().tolist() == [2018, 2019, 2020, 2021]
+    assert sorted(result["week"].unique()) == list(range(1, 18))
+
+
+def write_benchmark_season(data_dir, passing_yds=300.0):
+    (data_dir / "2021").mkdir(parents=True)
+    for week in range(1, 18):
+        pd.DataFrame(
+            {"name": ["Tom Brady"], "week": [week], "passing_yds": [passing_yds]}
+        ).to_csv(data_dir / "2021" / f"wk{week}.csv", index=False)
+
+
+def test_get_benchmarking_data_cache(tmp_path):
+    pytest.importorskip("pyarrow")
+    data_dir = tmp_path / "season"
+    write_benchmark_season(data_dir)
+    cache_dir = tmp_path / "cache"
+    result = get_benchmarking_data(2021, 2021, data_dir=data_dir, cache_dir=cache_dir)
+    (cache_path,) = cache_dir.glob("benchmark_2021_2021_*.parquet")
+    # the cached file is read while the source files are unchanged
+    pd.DataFrame({"name": ["Tom Brady"]}).to_parquet(cache_path)
+    assert get_benchmarking_data(
+        2021, 2021, data_dir=data_dir, cache_dir=cache_dir
+    ).columns.tolist() == ["name"]
+    assert result.shape == (17, 4)
+
+
+def test_get_benchmarking_data_cache_by_data_dir(tmp_path):
+    pytest.importorskip("pyarrow")
+    cache_dir = tmp_path / "cache"
+    for passing_yds, data_dir in [(300.0, "season_a"), (250.0, "season_b")]:
+        write_benchmark_season(tmp_path / data_dir, passing_yds)
+        result = get_benchmarking_data(
+            2021, 2021, data_dir=tmp_path / data_dir, cache_dir=cache_dir
+        )
+        # the cache of the other directory is not served
+        assert result["passing_yds"].unique().tolist() == [passing_yds]
+    # a changed file replaces the cache of its directory
+    pd.DataFrame({"name": ["Tom Brady"], "week": [1], "passing_yds": [100.0]}).to_csv(
+        tmp_path / "season_a" / "2021" / "wk1.csv", index=False
+    )
+    result = get_benchmarking_data(
+        2021, 2021, data_dir=tmp_path / "season_a", cache_dir=cache_dir
+    )
+    assert result["passing_yds"].iloc[0] == 100.0
+    assert len(list(cache_dir.glob("*.parquet"))) == 2
+
+
+def test_get_benchmarking_data_download(tmp_path):
+    write_benchmark_season(tmp_path / "season")
+    base_url = (tmp_path / "season").as_uri()
+    # the network is only used when downloading is explicitly allowed
+    with pytest.raises(FileNotFoundError):
+        get_benchmarking_data(
+            2021,
+            2021,
+            data_dir=tmp_path / "not_installed",
+            cache_dir=None,
+            base_url=base_url,
+        )
+    result = get_benchmarking_data(
+        2021,
+        2021,
+        data_dir=tmp_path / "not_installed",
+        cache_dir=None,
+        allow_download=True,
+        base_url=base_url,
+    )
+    assert result.shape == (17, 4)
+
+
+def test_get_benchmarking_data_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        get_benchmarking_data(2021, 2021, data_dir=tmp_path, cache_dir=None)
 
 
 def test_get_benchmarking_data_incorrect_year():
@@ -373,3 +473,74 @@ def test_get_benchmarking_data_incorrect_year():
         get_benchmarking_data(
             season_year_start=season_year_start, season_year_end=season_year_end
         )
+
+
+def test_evaluate():
+    keys = ["name", "team", "season_year", "week"]
+    predictions_df = pd.DataFrame(
+        {
+            "name": ["A", "B", "C", "D", "E"],
+            "team": ["TAM", "TAM", "GNB", "GNB", "KAN"],
+            "season_year": [2021] * 5,
+            "week": [1, 1, 1, 1, 2],
+            "position": ["WR"] * 5,
+            "actual": [10.0, 20.0, 30.0, 40.0, 5.0],
+            "pred": [12.0, 18.0, 33.0, 35.0, 5.0],
+        }
+    )
+    benchmark_df = predictions_df[keys + ["position"]].assign(
+        ff_pts_yahoo_fantasydata_pred=[40.0, 30.0, 20.0, 10.0, np.nan]
+    )
+    result = evaluate(
+        predictions_df, benchmark_df, y="actual", y_pred="pred", by=["week"], k=2
+    )
+    assert result[["week", "source"]].values.tolist() == [
+        [1, "model"],
+        [1, "benchmark"],
+    ]
+    model = result.iloc[0]
+    assert model["n_obs"] == 4
+    assert model["mae"] == pytest.approx(3.0)
+    assert model["rmse"] == pytest.approx(np.sqrt(10.5))
+    assert model["bias"] == pytest.approx(-0.5)
+    assert model["rank_corr"] == pytest.approx(1.0)
+    assert model["top_k_hit_rate"] == 1.0
+    benchmark = result.iloc[1]
+    assert benchmark["rank_corr"] == pytest.approx(-1.0)
+    assert benchmark["top_k_hit_rate"] == 0.0
+
+
+def test_evaluate_bootstrap():
+    rng = np.random.default_rng(0)
+    predictions_df = pd.DataFrame(
+        {
+            "name": [f"player_{i}" for i in range(200)],
+            "team": "TAM",
+            "season_year": 2021,
+            "week": np.repeat([1, 2], 100),
+            "position": "RB",
+            "actual": rng.normal(10, 5, 200),
+        }
+    ).assign(pred=lambda x: x["actual"] + rng.normal(0, 2, 200))
+    benchmark_df = predictions_df.drop(columns=["actual", "pred"]).assign(
+        ff_pts_yahoo_fantasydata_pred=predictions_df["actual"] + rng.normal(0, 4, 200)
+    )
+    result = evaluate(
+        predictions_df,
+        benchmark_df,
+        y="actual",
+        y_pred="pred",
+        n_bootstrap=200,
+        random_state=0,
+    )
+    assert result.shape[0] == 4
+    for metric in ["mae", "rmse", "bias"]:
+        assert (result[f"{metric}_lower"] <= result[metric]).all()
+        assert (result[metric] <= result[f"{metric}_upper"]).all()
+    with pytest.raises(ValueError):
+        evaluate(
+            predictions_df,
+            benchmark_df.drop(columns="ff_pts_yahoo_fantasydata_pred"),
+            y="actual",
+            y_pred="pred",
+        )
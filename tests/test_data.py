@@ -2,7 +2,12 @@ import pytest
 import pandas as pd
 import numpy as np
 from fantasyfootball.config import root_dir, data_sources, scoring
-from fantasyfootball.data import FantasyData
+from fantasyfootball.data import (
+    Calendar,
+    FantasyData,
+    TeamWeekCube,
+    _cached_season_csv,
+)
 from urllib.error import HTTPError
 
 
@@ -110,3 +115,95 @@ def test_create_fantasy_points_column(df):
     expected = [18, 11]
     result = fantasy_data.ff_data[fantasy_data.ff_data.columns[-1]].tolist()
     assert result == expected
+
+
+def test__read_season_source():
+    ff_data_dir = root_dir / "datasets" / "season" / "2021"
+    _read_season_source = FantasyData._read_season_source
+    first_df = _read_season_source(ff_data_dir, "calendar")
+    expected = first_df.copy()
+    first_df.loc[0, "team"] = "XXX"
+    hits = _cached_season_csv.cache_info().hits
+    second_df = _read_season_source(ff_data_dir, "calendar")
+    # second read is served from the cache, as an independent copy
+    assert _cached_season_csv.cache_info().hits == hits + 1
+    pd.testing.assert_frame_equal(second_df, expected)
+
+
+def test_calendar():
+    calendar = Calendar.from_season(2021)
+    # built once per season and shared across call sites
+    assert Calendar.from_season(2021) is calendar
+    assert calendar.max_date(1) == "2021-09-13"
+    assert calendar.week_of("2021-09-12") == 1
+    assert calendar.week_dates(1) == ["2021-09-09", "2021-09-12", "2021-09-13"]
+    assert calendar.opponent("TAM", 1) == ("DAL", 0)
+    assert calendar.opponent("DAL", 1) == ("TAM", 1)
+    result = calendar.weeks_of(pd.Series(["2021-09-12", "2021-09-10", "2021-09-19"]))
+    assert result.tolist() == [1, -1, 2]
+    with pytest.raises(KeyError):
+        calendar.max_date(30)
+
+
+def test__load_data_week():
+    week = 10
+    ff_data_dir = root_dir / "datasets" / "season" / "2021"
+    _load_data = FantasyData._load_data
+    season_df = _load_data(ff_data_dir, data_sources, "stats")
+    keys = ["date", "team", "name", "position"]
+    expected = season_df[season_df["week"] == week].sort_values(keys)
+    result = _load_data(ff_data_dir, data_sources, "stats", week=week)
+    pd.testing.assert_frame_equal(
+        result.sort_values(keys).reset_index(drop=True),
+        expected.reset_index(drop=True),
+        check_dtype=False,
+    )
+
+
+@pytest.fixture(scope="module")
+def team_week_df():
+    columns = ["team", "opp", "season_year", "week", "position"]
+    columns += ["receiving_tgt", "ff_pts"]
+    data = [
+        ["TAM", "NOR", 2021, 1, "WR", 8, 10.0],
+        ["TAM", "NOR", 2021, 1, "WR", 4, 6.0],
+        ["NOR", "TAM", 2021, 1, "WR", 5, 12.0],
+        ["NOR", "TAM", 2021, 1, "RB", 2, 3.0],
+        ["TAM", "ATL", 2021, 2, "WR", 10, 20.0],
+        ["ATL", "TAM", 2021, 2, "WR", 6, 8.0],
+        # NOR has a bye in week 2
+        ["TAM", "NOR", 2021, 3, "WR", np.nan, np.nan],
+        ["NOR", "TAM", 2021, 3, "WR", np.nan, np.nan],
+    ]
+    return pd.DataFrame(data, columns=columns)
+
+
+def test_TeamWeekCube(team_week_df):
+    cube = TeamWeekCube.from_frame(team_week_df, ["receiving_tgt", "ff_pts"])
+    assert cube.values.shape == (3, 3, 2, 2)
+    assert cube.lookup(
+        ["TAM", "NOR"], [2021, 2021], [1, 1], "receiving_tgt"
+    ).tolist() == [
+        12,
+        7,
+    ]
+    assert cube.lookup(["NOR"], [2021], [1], "receiving_tgt", position="WR") == [5]
+    # points allowed by TAM to WRs in week 1
+    assert cube.lookup(["TAM"], [2021], [1], "ff_pts", "WR", allowed=True) == [12]
+    # NOR allowed 16 WR points in week 1, then had a bye before week 3
+    allowed = cube.lookup(
+        ["NOR", "NOR", "TAM"], [2021] * 3, [3, 2, 3], "ff_pts", "WR", True, window=2
+    )
+    assert np.allclose(allowed, [16.0, 16.0, 10.0])
+    assert np.isnan(cube.lookup(["DAL"], [2021], [1], "ff_pts")).all()
+    with pytest.raises(KeyError):
+        cube.lookup(["TAM"], [2021], [1], "passing_yds")
+
+
+def test_team_week_cube():
+    fantasy_data = FantasyData(season_year_start=2021, season_year_end=2021)
+    ff_df = fantasy_data.data
+    cube = fantasy_data.team_week_cube
+    assert cube is fantasy_data.team_week_cube
+    expected = ff_df.query("team == 'TAM' & week == 8")["passing_att"].sum()
+    assert cube.lookup(["TAM"], [2021], [8], "passing_att") == [expected]
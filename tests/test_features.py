@@ -1,11 +1,20 @@
 import pandas as pd
 import numpy as np
 import pytest
+from scipy import sparse
 from fantasyfootball.config import data_sources, root_dir
 from fantasyfootball.features import (
     FantasyFeatures,
     CategoryConsolidatorFeatureTransformer,
+    EWMFeatureTransformer,
+    GroupFeatureTransformer,
+    LagFeatureTransformer,
+    MAFeatureTransformer,
+    OneHotFeatureTransformer,
+    PlayerFeatureState,
     TargetEncoderFeatureTransformer,
+    TrendFeatureTransformer,
+    WindowFeatureTransformer,
 )
 
 
@@ -489,3 +498,540 @@ def test_add_category_consolidator_feature(df):
 
     # check column values correct
     assert result[category_columns].values.tolist() == expected_values
+
+
+def test_WindowFeatureTransformer(df):
+    player_group_columns = ["pid", "name", "team", "season_year"]
+    lag = LagFeatureTransformer(
+        n_week_lag=[1, 2],
+        lag_columns=["passing_yds"],
+        player_group_columns=player_group_columns,
+    )
+    ma = MAFeatureTransformer(
+        n_week_window=[2],
+        window_columns=["passing_yds"],
+        player_group_columns=player_group_columns,
+    )
+    window = WindowFeatureTransformer(
+        window_specs=[
+            ("lag", "passing_yds", 1),
+            ("lag", "passing_yds", 2),
+            ("ma", "passing_yds", 2),
+        ],
+        player_group_columns=player_group_columns,
+    )
+    sorted_df = df.sort_values(player_group_columns + ["week"])
+    expected = ma.fit_transform(lag.fit_transform(sorted_df))
+    result = window.fit_transform(sorted_df)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_create_ff_signature_plans_single_window_step(df):
+    features = FantasyFeatures(df, y="actual_pts", position="QB")
+    features.add_lag_feature(n_week_lag=1, lag_columns="passing_yds")
+    features.add_target_encoded_feature(category_columns="injury_type")
+    features.add_moving_avg_feature(n_week_window=2, window_columns="passing_yds")
+    features.add_moving_avg_feature(n_week_window=3, window_columns="rushing_yds")
+    steps = features._plan_pipeline_steps()
+    assert [type(step).__name__ for _, step in steps] == [
+        "WindowFeatureTransformer",
+        "TargetEncoderFeatureTransformer",
+    ]
+    result = features.create_ff_signature().get("feature_df")
+    assert {"passing_yds_lag_1", "passing_yds_ma_2", "rushing_yds_ma_3"} <= set(
+        result.columns
+    )
+
+
+def test_prune_columns(df):
+    features = FantasyFeatures(df, y="actual_pts", position="QB")
+    features.add_lag_feature(n_week_lag=1, lag_columns="passing_yds")
+    features.add_target_encoded_feature(category_columns="injury_type")
+    expected = features.create_ff_signature().get("feature_df")
+    features.prune_columns(keep_columns="opp")
+    assert features.data.columns.tolist() == [
+        "date",
+        "week",
+        "team",
+        "opp",
+        "season_year",
+        "name",
+        "pid",
+        "position",
+        "passing_yds",
+        "injury_type",
+        "actual_pts",
+    ]
+    result = features.create_ff_signature().get("feature_df")
+    pd.testing.assert_frame_equal(result, expected[result.columns])
+    with pytest.raises(ValueError):
+        features.prune_columns(keep_columns="avg_temp")
+
+
+def test_prune_columns_team_steps():
+    roster_df = pd.DataFrame(
+        {
+            "pid": ["A", "A", "B", "B", "C", "C"],
+            "name": ["A", "A", "B", "B", "C", "C"],
+            "team": ["TAM", "TAM", "DAL", "DAL", "TAM", "TAM"],
+            "opp": ["DAL", "DAL", "TAM", "TAM", "DAL", "DAL"],
+            "season_year": [2021] * 6,
+            "week": [1, 2, 1, 2, 1, 2],
+            "position": ["WR", "WR", "WR", "WR", "TE", "TE"],
+            "receiving_tgt": [6.0, 4.0, 2.0, 5.0, 2.0, 1.0],
+            "receiving_yds": [60.0, 40.0, 20.0, 50.0, 20.0, 10.0],
+            "actual_pts": [1.0] * 6,
+        }
+    )
+    features = FantasyFeatures(
+        roster_df,
+        y="actual_pts",
+        position="WR",
+        player_group_columns=["pid", "name", "season_year"],
+    )
+    features.add_team_share_feature(share_columns="receiving_tgt", n_week_lag=0)
+    features.add_opponent_allowed_feature(
+        n_week_window=1, allowed_columns="receiving_tgt"
+    )
+    expected = features.create_ff_signature()["feature_df"]
+    features.prune_columns()
+    assert "receiving_yds" not in features.data.columns
+    assert {"team", "opp", "receiving_tgt_team_total"} <= set(features.data.columns)
+    result = features.create_ff_signature()["feature_df"]
+    pd.testing.assert_frame_equal(result, expected[result.columns])
+
+
+def test_add_ewm_feature(df):
+    player_group_columns = ["pid", "name", "team", "season_year"]
+    ewm_df = df.assign(
+        passing_yds=df["passing_yds"].where(df["week"] != 7),
+        actual_pts=pd.to_numeric(df["actual_pts"]),
+    )
+    features = FantasyFeatures(ewm_df, y="actual_pts", position="QB")
+    features.add_ewm_feature(ewm_columns="passing_yds", halflife=[1, 2])
+    features.add_ewm_feature(ewm_columns="actual_pts", alpha=0.5)
+    signature = features.create_ff_signature()
+    assert signature["pipeline_feature_names"] == [
+        "passing_yds_ewm_hl_1",
+        "passing_yds_ewm_hl_2",
+        "actual_pts_ewm_alpha_0.5",
+    ]
+    result = signature["feature_df"]
+    grouped = features.data.groupby(player_group_columns)
+    expected = grouped["passing_yds"].transform(
+        lambda x: x.ewm(halflife=2).mean().shift(1)
+    )
+    assert np.allclose(
+        result["passing_yds_ewm_hl_2"], expected.loc[result.index], equal_nan=True
+    )
+    with pytest.raises(ValueError):
+        features.add_ewm_feature(ewm_columns="passing_yds", halflife=2, alpha=0.5)
+    with pytest.raises(ValueError):
+        features.add_ewm_feature(ewm_columns="passing_yds", alpha=1.5)
+
+
+def test_EWMFeatureTransformer_future_week():
+    X = pd.DataFrame(
+        {
+            "pid": ["A", "A", "A", "B", "B"],
+            "week": [1, 2, 3, 1, 2],
+            "pts": [10.0, 20.0, np.nan, 5.0, np.nan],
+        }
+    )
+    ewm = EWMFeatureTransformer(
+        ewm_columns=["pts"], player_group_columns=["pid"], alpha=[0.5]
+    )
+    result = ewm.fit_transform(X)["pts_ewm_alpha_0.5"]
+    # the unplayed week carries the average of the completed weeks
+    expected = [np.nan, 10.0, (0.5 * 10 + 20) / 1.5, np.nan, 5.0]
+    assert np.allclose(result, expected, equal_nan=True)
+
+
+def test_add_rolling_quantile_feature(df):
+    player_group_columns = ["pid", "name", "team", "season_year"]
+    quantile_df = df.assign(passing_yds=df["passing_yds"].where(df["week"] != 7))
+    features = FantasyFeatures(quantile_df, y="actual_pts", position="QB")
+    features.add_rolling_quantile_feature(
+        n_week_window=[2, 3], window_columns="passing_yds", quantiles=[0, 0.25, 1]
+    )
+    signature = features.create_ff_signature()
+    assert signature["pipeline_feature_names"] == [
+        "passing_yds_min_2",
+        "passing_yds_min_3",
+        "passing_yds_p25_2",
+        "passing_yds_p25_3",
+        "passing_yds_max_2",
+        "passing_yds_max_3",
+    ]
+    result = signature["feature_df"]
+    grouped = features.data.groupby(player_group_columns)["passing_yds"]
+    for quantile, name in [(0, "min"), (0.25, "p25"), (1, "max")]:
+        expected = grouped.transform(
+            lambda x: x.rolling(3, min_periods=1).quantile(quantile).shift(1)
+        )
+        assert np.allclose(
+            result[f"passing_yds_{name}_3"],
+            expected.loc[result.index],
+            equal_nan=True,
+        )
+    with pytest.raises(ValueError):
+        features.add_rolling_quantile_feature(
+            n_week_window=2, window_columns="passing_yds", quantiles=75
+        )
+
+
+def test_TrendFeatureTransformer():
+    X = pd.DataFrame(
+        {
+            "pid": ["A"] * 5 + ["B"] * 3,
+            "week": [1, 2, 3, 4, 5, 1, 2, 3],
+            "pts": [2.0, 4.0, 6.0, 14.0, np.nan, 5.0, 5.0, 5.0],
+        }
+    )
+    trend = TrendFeatureTransformer(
+        n_week_window=[3], window_columns=["pts"], player_group_columns=["pid"]
+    )
+    result = trend.fit_transform(X)
+    # weeks 1-3 of player A increase by 2 points per game
+    assert np.allclose(
+        result["pts_slope_3"].iloc[:4], [np.nan, np.nan, 2.0, 2.0], equal_nan=True
+    )
+    assert result["pts_intercept_3"].iloc[3] == pytest.approx(6.0)
+    # week 4 is 10 points above the mean of weeks 1-3, which have a sd of 2
+    assert result["pts_zscore_3"].iloc[4] == pytest.approx(5.0)
+    # a constant window has no z-score
+    assert np.isnan(result["pts_zscore_3"].iloc[7])
+
+
+def test_add_trend_feature(df):
+    features = FantasyFeatures(df, y="actual_pts", position="QB")
+    features.add_trend_feature(n_week_window=3, window_columns="passing_yds")
+    signature = features.create_ff_signature()
+    assert signature["pipeline_feature_names"] == [
+        "passing_yds_slope_3",
+        "passing_yds_intercept_3",
+        "passing_yds_zscore_3",
+    ]
+    assert set(signature["pipeline_feature_names"]) <= set(
+        signature["feature_df"].columns
+    )
+
+
+def test_GroupFeatureTransformer():
+    X = pd.DataFrame(
+        {
+            "pid": ["A", "A", "B", "B", "C", "C"],
+            "team": ["TAM", "TAM", "TAM", "TAM", "GNB", "GNB"],
+            "season_year": [2021] * 6,
+            "week": [1, 2, 1, 2, 1, 2],
+            "salary": [7000, 7000, 6000, 7000, 5000, np.nan],
+            "receiving_tgt": [6, 4, 2, np.nan, 5, 8],
+        }
+    )
+    player_group_columns = ["pid", "season_year"]
+    rank = GroupFeatureTransformer(
+        feature_type="rank",
+        group_feature_columns=["salary"],
+        group_columns=["season_year", "week"],
+        n_week_lag=0,
+        player_group_columns=player_group_columns,
+    )
+    result = rank.fit_transform(X).sort_index()
+    assert np.allclose(result["salary_rank"], [1, 1, 2, 1, 3, np.nan], equal_nan=True)
+    share = GroupFeatureTransformer(
+        feature_type="share",
+        group_feature_columns=["receiving_tgt"],
+        group_columns=["season_year", "week", "team"],
+        n_week_lag=1,
+        player_group_columns=player_group_columns,
+    )
+    result = share.fit_transform(X).sort_index()
+    # week 2 carries the share of team targets from week 1
+    assert np.allclose(
+        result["receiving_tgt_share_lag_1"],
+        [np.nan, 0.75, np.nan, 0.25, np.nan, 1.0],
+        equal_nan=True,
+    )
+
+
+def test_add_group_rank_and_team_share_feature(df):
+    features = FantasyFeatures(df, y="actual_pts", position="QB")
+    features.add_group_rank_feature(rank_columns="projected_pts")
+    features.add_team_share_feature(share_columns="passing_yds")
+    signature = features.create_ff_signature()
+    assert signature["pipeline_feature_names"] == [
+        "projected_pts_rank",
+        "passing_yds_share_lag_1",
+    ]
+    assert set(signature["pipeline_feature_names"]) <= set(
+        signature["feature_df"].columns
+    )
+
+
+def test_add_team_share_feature_totals_all_positions():
+    roster_df = pd.DataFrame(
+        {
+            "pid": ["A", "A", "B", "B", "C", "C"],
+            "name": ["A", "A", "B", "B", "C", "C"],
+            "team": ["TAM"] * 6,
+            "opp": ["DAL"] * 6,
+            "season_year": [2021] * 6,
+            "week": [1, 2, 1, 2, 1, 2],
+            "position": ["WR", "WR", "WR", "WR", "TE", "TE"],
+            "receiving_tgt": [6.0, 4.0, 2.0, 5.0, 2.0, 1.0],
+            "actual_pts": [1.0] * 6,
+        }
+    )
+    features = FantasyFeatures(roster_df, y="actual_pts", position="WR")
+    features.add_team_share_feature(share_columns="receiving_tgt", n_week_lag=0)
+    # the team total is an input of the share step, so it survives pruning
+    features.prune_columns()
+    result = features.create_ff_signature()["feature_df"].sort_values(["pid", "week"])
+    # the TE's targets count toward the team total
+    assert result["receiving_tgt_team_total"].tolist() == [10.0, 10.0, 10.0, 10.0]
+    assert np.allclose(result["receiving_tgt_share"], [0.6, 0.4, 0.2, 0.5])
+    built = FantasyFeatures.build_all_positions(
+        roster_df,
+        y="actual_pts",
+        recipe=[
+            (
+                "add_team_share_feature",
+                {"share_columns": "receiving_tgt", "n_week_lag": 0},
+            )
+        ],
+        positions=["WR", "TE"],
+        player_group_columns=["pid", "name", "team", "season_year"],
+        n_jobs=1,
+    )
+    built_df = built["WR"]["feature_df"].sort_values(["pid", "week"])
+    assert np.allclose(built_df["receiving_tgt_share"], [0.6, 0.4, 0.2, 0.5])
+    share = GroupFeatureTransformer(
+        feature_type="share",
+        group_feature_columns=["receiving_tgt"],
+        group_columns=["season_year", "week", "team"],
+        n_week_lag=0,
+        player_group_columns=["pid"],
+        total_columns={"receiving_tgt": "receiving_tgt_team_total"},
+    )
+    with pytest.raises(ValueError):
+        share.transform(roster_df)
+
+
+def test_add_opponent_allowed_feature(df):
+    features = FantasyFeatures(df, y="actual_pts", position="QB")
+    features.add_opponent_allowed_feature(
+        n_week_window=2, allowed_columns="passing_yds"
+    )
+    signature = features.create_ff_signature()
+    assert signature["pipeline_feature_names"] == ["passing_yds_allowed_2"]
+    result = signature["feature_df"]
+    # average passing yards allowed to QBs by the opponent over its prior 2 games
+    opp_df = (
+        features.data.groupby(["opp", "season_year", "week"])["passing_yds"]
+        .sum()
+        .groupby(["opp", "season_year"])
+        .transform(lambda x: x.rolling(2, min_periods=1).mean().shift(1))
+        .rename("expected")
+        .reset_index()
+    )
+    result = pd.merge(result, opp_df, on=["opp", "season_year", "week"])
+    assert np.allclose(
+        result["passing_yds_allowed_2"], result["expected"], equal_nan=True
+    )
+
+
+def test_PlayerFeatureState(df):
+    player_group_columns = ["pid", "name", "team", "season_year"]
+    window_specs = [
+        ("lag", "passing_yds", 1),
+        ("lag", "passing_yds", 2),
+        ("ma", "passing_yds", 2),
+    ]
+    window = WindowFeatureTransformer(
+        window_specs=window_specs, player_group_columns=player_group_columns
+    )
+    expected = window.fit_transform(df).query("week == 8").sort_index()
+    feature_state = PlayerFeatureState(
+        window_specs=window_specs,
+        player_group_columns=player_group_columns,
+        y="actual_pts",
+        cv_window=2,
+    )
+    # fit on weeks 5-6, then fold in the newly completed week 7
+    feature_state.fit(df[df["week"] <= 6]).update(df[df["week"] == 7])
+    result = feature_state.transform(df[df["week"] == 8]).sort_index()
+    for feature_type, column, value in window_specs:
+        col_name = f"{column}_{feature_type}_{value}"
+        pd.testing.assert_series_equal(result[col_name], expected[col_name])
+
+
+def test_PlayerFeatureState_cv(df):
+    future_df = (
+        df.assign(
+            is_future_week=(df["week"] == 8).astype(int),
+            actual_pts=pd.to_numeric(df["actual_pts"]).where(df["week"] != 8),
+            # Aaron Rodgers changes teams in week 7, so the signature drops his
+            # first game with the new team for the missing lag
+            team=df["team"].mask((df["pid"] == "RodgAa00") & (df["week"] >= 7), "DEN"),
+        )
+        .sort_values(["pid", "name", "team", "season_year", "week"])
+        .reset_index(drop=True)
+    )
+    features = FantasyFeatures(future_df, y="actual_pts", position="QB")
+    features.add_coefficient_of_variation(n_week_window=2)
+    features.add_lag_feature(n_week_lag=1, lag_columns="passing_yds")
+    feature_df = features.create_ff_signature()["feature_df"]
+    expected = feature_df.query("is_future_week == 1").set_index("pid")["cv"]
+    history_df = features.data.query("is_future_week == 0")
+    feature_state = features.create_feature_state()
+    updated_state = features.create_feature_state()
+    # fit on weeks 5-6, then fold in the newly completed week 7
+    updated_state.fit(history_df.query("week <= 6")).update(
+        history_df.query("week == 7")
+    )
+    for state in [feature_state, updated_state]:
+        result = features.transform_future_week(state).set_index("pid")["cv"]
+        # the cv of every player matches the cv carried forward by the signature
+        pd.testing.assert_series_equal(result.loc[expected.index], expected)
+        # and players whose future week the signature drops have no cv
+        assert result.drop(expected.index).isna().all()
+    # Tom Brady scored 1 and 2 points over his two most recent games, while
+    # the cv of Aaron Rodgers' only game kept by the signature is missing
+    assert expected["BradTo00"] == 47.0
+    assert np.isnan(expected["RodgAa00"])
+
+
+def test_transform_future_week(df):
+    future_df = df.assign(is_future_week=(df["week"] == 8).astype(int))
+    features = FantasyFeatures(future_df, y="actual_pts", position="QB")
+    features.add_lag_feature(n_week_lag=1, lag_columns="passing_yds")
+    feature_state = features.create_feature_state()
+    result = features.transform_future_week(feature_state)
+    assert result["is_future_week"].eq(1).all()
+    assert result.set_index("pid")["passing_yds_lag_1"].fillna(0).to_dict() == {
+        "BradTo00": 211.0,
+        "PresDa01": 445.0,
+        "FlacJo00": 0.0,
+        "RodgAa00": 274.0,
+    }
+
+
+def test_build_all_positions(df):
+    all_positions_df = pd.concat([df, df.assign(position="WR")], ignore_index=True)
+    recipe = [
+        ("filter_inactive_games", {"status_column": "is_active"}),
+        ("add_lag_feature", {"n_week_lag": 1, "lag_columns": "passing_yds"}),
+    ]
+    result = FantasyFeatures.build_all_positions(
+        all_positions_df, y="actual_pts", recipe=recipe, positions=["QB", "WR"]
+    )
+    sorted_df = df.sort_values(["pid", "name", "team", "season_year", "week"])
+    expected = FantasyFeatures(
+        sorted_df.reset_index(drop=True), y="actual_pts", position="QB"
+    )
+    expected.filter_inactive_games(status_column="is_active")
+    expected.add_lag_feature(n_week_lag=1, lag_columns="passing_yds")
+    expected_df = expected.create_ff_signature().get("feature_df")
+    assert set(result.keys()) == {"QB", "WR"}
+    for position in ["QB", "WR"]:
+        result_df = result[position].get("feature_df")
+        assert result_df["position"].eq(position).all()
+        assert (
+            result_df["passing_yds_lag_1"].fillna(0).tolist()
+            == expected_df["passing_yds_lag_1"].fillna(0).tolist()
+        )
+
+
+def test_build_all_positions_invalid_recipe(df):
+    with pytest.raises(ValueError):
+        FantasyFeatures.build_all_positions(
+            df, y="actual_pts", recipe=[("_validate_column_present", {})]
+        )
+
+
+def test_export_model_matrix(df, tmp_path):
+    features = FantasyFeatures(df, y="actual_pts", position="QB")
+    features.add_lag_feature(n_week_lag=1, lag_columns="passing_yds")
+    features.add_moving_avg_feature(n_week_window=2, window_columns="rushing_yds")
+    signature = features.create_ff_signature()
+    feature_df = signature.get("feature_df")
+    result = features.export_model_matrix(signature)
+    assert result["X"].dtype == np.float32
+    assert result["X"].flags["C_CONTIGUOUS"]
+    assert result["X"].shape == (feature_df.shape[0], 2)
+    assert result["metadata"].columns.tolist() == [
+        "pid",
+        "season_year",
+        "week",
+        "position",
+        "name",
+        "team",
+    ]
+    assert result["metadata"]["position"].eq("QB").all()
+    np.testing.assert_array_equal(
+        result["X"][:, 0], feature_df["passing_yds_lag_1"].to_numpy(np.float32)
+    )
+    np.testing.assert_array_equal(
+        result["y"], feature_df["actual_pts"].to_numpy(np.float32)
+    )
+    npy_result = features.export_model_matrix(
+        signature, output="npy", path=tmp_path / "X.npy"
+    )
+    assert isinstance(npy_result["X"], np.memmap)
+    np.testing.assert_array_equal(npy_result["X"], result["X"])
+
+
+def test_add_one_hot_feature(df):
+    features = FantasyFeatures(df, y="actual_pts", position="QB")
+    features.add_lag_feature(n_week_lag=1, lag_columns="passing_yds")
+    features.add_one_hot_feature(category_columns=["team", "injury_type"])
+    signature = features.create_ff_signature()
+    assert signature["pipeline_feature_names"] == ["passing_yds_lag_1"]
+    feature_df = signature["feature_df"]
+    categories = signature["one_hot_categories"]
+    assert categories["team"] == sorted(features.data["team"].unique())
+    result = features.export_model_matrix(signature)
+    X = result["X"]
+    assert sparse.isspmatrix_csr(X)
+    assert X.dtype == np.float32
+    n_one_hot = len(categories["team"]) + len(categories["injury_type"])
+    assert X.shape == (feature_df.shape[0], 1 + n_one_hot)
+    assert result["feature_names"][:2] == ["passing_yds_lag_1", "team_DAL"]
+    dense_X = X.toarray()
+    np.testing.assert_array_equal(
+        dense_X[:, 1], (feature_df["team"] == "DAL").to_numpy(np.float32)
+    )
+    # each row has exactly one team
+    assert (dense_X[:, 1 : 1 + len(categories["team"])].sum(axis=1) == 1).all()
+    with pytest.raises(ValueError):
+        features.export_model_matrix(signature, output="arrow")
+
+
+def test_OneHotFeatureTransformer_unseen_category():
+    one_hot = OneHotFeatureTransformer(category_columns=["roof_type"])
+    one_hot.fit(pd.DataFrame({"roof_type": ["dome", "outdoors", None]}))
+    X = one_hot.transform(pd.DataFrame({"roof_type": ["outdoors", "retractable"]}))
+    X_one_hot, names = OneHotFeatureTransformer.to_sparse(X, one_hot.categories_)
+    assert names == ["roof_type_dome", "roof_type_outdoors"]
+    np.testing.assert_array_equal(X_one_hot.toarray(), [[0, 1], [0, 0]])
+
+
+def test_export_model_matrix_arrow(df):
+    pytest.importorskip("pyarrow")
+    features = FantasyFeatures(df, y="actual_pts", position="QB")
+    features.add_lag_feature(n_week_lag=1, lag_columns="passing_yds")
+    signature = features.create_ff_signature()
+    record_batch = features.export_model_matrix(signature, output="arrow")[
+        "record_batch"
+    ]
+    assert record_batch.schema.names == [
+        "passing_yds_lag_1",
+        "actual_pts",
+        "pid",
+        "season_year",
+        "week",
+        "position",
+        "name",
+        "team",
+    ]
+    assert record_batch.num_rows == signature["feature_df"].shape[0]
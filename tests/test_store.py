@@ -0,0 +1,80 @@
+import pytest
+import pandas as pd
+from fantasyfootball.features import FantasyFeatures
+from fantasyfootball.store import FeatureStore, main
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture(scope="module")
+def df():
+    columns = ["date", "week", "name", "pid", "team", "season_year", "position"]
+    columns += ["passing_yds", "actual_pts"]
+    data = [
+        ["2021-10-14", 6, "Tom Brady", "BradTo00", "TAM", 2021, "QB", 297.0, 1.0],
+        ["2021-10-24", 7, "Tom Brady", "BradTo00", "TAM", 2021, "QB", 211.0, 2.0],
+        ["2021-10-31", 8, "Tom Brady", "BradTo00", "TAM", 2021, "QB", 375.0, 2.0],
+        ["2021-10-17", 6, "Aaron Rodgers", "RodgAa00", "GNB", 2021, "QB", 195.0, 1.0],
+        ["2021-10-24", 7, "Aaron Rodgers", "RodgAa00", "GNB", 2021, "QB", 274.0, 2.0],
+        ["2021-10-28", 8, "Aaron Rodgers", "RodgAa00", "GNB", 2021, "QB", 184.0, 1.0],
+    ]
+    return pd.DataFrame(data, columns=columns)
+
+
+def test_create_key():
+    key_args = ["QB", "actual_pts", ["pid"], [("step", "Transformer", {"a": 1})]]
+    key = FeatureStore.create_key(*key_args, "checksum")
+    assert key == FeatureStore.create_key(*key_args, "checksum")
+    assert key != FeatureStore.create_key(*key_args, "other checksum")
+
+
+def test_create_ff_signature_feature_store(df, tmp_path):
+    feature_store = FeatureStore(store_dir=tmp_path)
+    signatures = list()
+    for _ in range(2):
+        features = FantasyFeatures(df, y="actual_pts", position="QB")
+        features.add_lag_feature(n_week_lag=1, lag_columns="passing_yds")
+        signatures.append(features.create_ff_signature(feature_store=feature_store))
+    assert len(feature_store.list_entries()) == 1
+    assert signatures[1]["pipeline_feature_names"] == ["passing_yds_lag_1"]
+    pd.testing.assert_frame_equal(
+        signatures[1]["feature_df"], signatures[0]["feature_df"]
+    )
+
+
+def test_feature_store_evicts_least_recently_used(df, tmp_path):
+    feature_store = FeatureStore(store_dir=tmp_path, max_size_mb=0)
+    signature = {"feature_df": df, "pipeline_feature_names": []}
+    feature_store.put("first", signature)
+    feature_store.put("second", signature)
+    assert feature_store.list_entries()["key"].tolist() == ["second"]
+    assert feature_store.get("first") is None
+
+
+def test_feature_store_cli_purge(df, tmp_path, capsys):
+    feature_store = FeatureStore(store_dir=tmp_path)
+    signature = {"feature_df": df, "pipeline_feature_names": []}
+    feature_store.put("abc123", signature)
+    feature_store.put("def456", signature)
+    main(["purge", "--store_dir", str(tmp_path), "--key", "abc"])
+    assert "Purged 1" in capsys.readouterr().out
+    assert feature_store.list_entries()["key"].tolist() == ["def456"]
+
+
+def test_feature_store_one_hot_categories(df, tmp_path):
+    feature_store = FeatureStore(store_dir=tmp_path)
+    features = FantasyFeatures(df, y="actual_pts", position="QB")
+    features.add_one_hot_feature(category_columns="team")
+    signature = features.create_ff_signature(feature_store=feature_store)
+    stored_signature = feature_store.get(feature_store.list_entries()["key"][0])
+    assert stored_signature["one_hot_categories"] == signature["one_hot_categories"]
+
+
+def test_feature_store_round_trip(df, tmp_path):
+    feature_store = FeatureStore(store_dir=tmp_path)
+    feature_df = df.assign(
+        ff_pts_yahoo=pd.Series([10.5, 12.0, 8.25, 9.0, 11.0, 7.5], dtype=object)
+    ).set_index(pd.Index([3, 5, 8, 13, 21, 34]))
+    feature_store.put("key", {"feature_df": feature_df, "pipeline_feature_names": []})
+    # a loaded frame matches the frame created on a store miss
+    pd.testing.assert_frame_equal(feature_store.get("key")["feature_df"], feature_df)
@@ -0,0 +1,120 @@
+import pytest
+import pandas as pd
+import numpy as np
+from sklearn.linear_model import LinearRegression
+from fantasyfootball.validation import WalkForwardSplit, backtest, walk_forward_validate
+
+
+@pytest.fixture(scope="module")
+def metadata():
+    # two players over weeks 16-17 of 2020 and weeks 1-2 of 2021
+    periods = [(2020, 16), (2020, 17), (2021, 1), (2021, 2)]
+    data = [
+        [pid, position, season_year, week]
+        for season_year, week in periods
+        for pid, position in [("BradTo00", "QB"), ("AdamDa01", "WR")]
+    ]
+    return pd.DataFrame(data, columns=["pid", "position", "season_year", "week"])
+
+
+def test_WalkForwardSplit(metadata):
+    splitter = WalkForwardSplit(min_train_periods=2)
+    expected_periods = [(2021, 1), (2021, 2)]
+    assert splitter.get_test_periods(metadata) == expected_periods
+    assert splitter.get_n_splits(metadata) == 2
+    for (train, test), (season_year, week) in zip(
+        splitter.split(metadata), expected_periods
+    ):
+        test_df = metadata.iloc[test]
+        train_df = metadata.iloc[train]
+        assert (test_df["season_year"] == season_year).all()
+        assert (test_df["week"] == week).all()
+        # all training rows occur before the test week
+        assert (train_df["season_year"] * 100 + train_df["week"]).max() < (
+            season_year * 100 + week
+        )
+        assert len(train) + len(test) == len(
+            metadata.query(f"season_year * 100 + week <= {season_year * 100 + week}")
+        )
+
+
+def test_WalkForwardSplit_test_periods(metadata):
+    splitter = WalkForwardSplit(test_periods=[(2021, 2)])
+    assert splitter.get_test_periods(metadata) == [(2021, 2)]
+
+
+def test_walk_forward_validate(metadata):
+    X = np.arange(metadata.shape[0], dtype=np.float32).reshape(-1, 1)
+    y = 2 * X[:, 0] + 1
+    metrics_df, predictions_df = walk_forward_validate(
+        LinearRegression(),
+        X,
+        y,
+        metadata,
+        splitter=WalkForwardSplit(min_train_periods=1),
+        n_jobs=2,
+        return_predictions=True,
+    )
+    assert metrics_df.columns.tolist() == [
+        "position",
+        "season_year",
+        "week",
+        "n_obs",
+        "mae",
+        "rmse",
+        "rank_corr",
+    ]
+    # 3 test weeks for each of the 2 positions
+    assert metrics_df.shape[0] == 6
+    # a linear target is recovered exactly
+    assert metrics_df["mae"].max() == pytest.approx(0, abs=1e-4)
+    assert predictions_df.shape[0] == 6
+
+
+def test_walk_forward_validate_missing_target(metadata):
+    X = np.arange(metadata.shape[0], dtype=np.float32).reshape(-1, 1)
+    y = 2 * X[:, 0] + 1
+    # outcomes of a completed week and of the unplayed future week are missing
+    y[metadata["week"].isin([17, 2]).to_numpy()] = np.nan
+    metrics_df = walk_forward_validate(
+        LinearRegression(),
+        X,
+        y,
+        metadata,
+        splitter=WalkForwardSplit(test_periods=[(2021, 1), (2021, 2)]),
+        n_jobs=1,
+    )
+    # training rows with a missing outcome are skipped rather than failing the fit
+    assert metrics_df.query("week == 1")["mae"].max() == pytest.approx(0, abs=1e-4)
+    assert metrics_df.query("week == 2")["mae"].isna().all()
+
+
+def test_backtest(metadata, tmp_path):
+    feature_df = metadata.assign(x=np.arange(metadata.shape[0], dtype=float))
+    feature_df["actual_pts"] = 2 * feature_df["x"] + 1
+    backtest_args = dict(
+        estimator=LinearRegression(),
+        feature_df=feature_df,
+        y="actual_pts",
+        feature_names=["x"],
+        min_train_periods=2,
+        checkpoint_dir=tmp_path,
+    )
+    results_df = backtest(**backtest_args, n_jobs=2)
+    assert results_df.columns.tolist() == [
+        "pid",
+        "position",
+        "season_year",
+        "week",
+        "actual_pts",
+        "actual_pts_pred",
+    ]
+    # 2 test weeks for each of the 2 players
+    assert results_df.shape[0] == 4
+    np.testing.assert_allclose(results_df["actual_pts_pred"], results_df["actual_pts"])
+    checkpoint_paths = sorted(tmp_path.glob("*/*.pkl"))
+    assert [path.name for path in checkpoint_paths] == ["2021_01.pkl", "2021_02.pkl"]
+    # a rerun resumes from the checkpoints, refitting only the missing week
+    checkpoint_paths[1].unlink()
+    pd.testing.assert_frame_equal(backtest(**backtest_args, n_jobs=1), results_df)
+    assert checkpoint_paths[1].exists()